@@ -0,0 +1,85 @@
+import os
+import re
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .routers import pin_to_primary, unpin
+
+PRIMARY_COOKIE_NAME = 'use_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ReplicaPinningMiddleware:
+    """
+    Provide read-your-writes consistency on top of PrimaryReplicaRouter.
+
+    Writing requests (POST etc.) run entirely against the primary and leave a
+    short-lived cookie behind, so the redirect that follows (e.g. round_create
+    -> game_detail) keeps reading from the primary until the replicas caught up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        is_write = request.method not in SAFE_METHODS
+        token = None
+        if is_write or PRIMARY_COOKIE_NAME in request.COOKIES:
+            token = pin_to_primary()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                unpin(token)
+
+        if is_write:
+            response.set_cookie(
+                PRIMARY_COOKIE_NAME, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+# URLs that can have a pre-rendered snapshot, see score_tracker.snapshots
+SNAPSHOT_URL = re.compile(r'^/games/(\d+)/(index\.json|timeline/)?$')
+SNAPSHOT_FILES = {None: 'index.html', 'index.json': 'index.json', 'timeline/': 'timeline.json'}
+
+
+class SnapshotMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that also serves the snapshots of completed games.
+
+    A request for a game page that has a snapshot in SNAPSHOT_ROOT is
+    answered from disk, precompressed and revalidated by the client on
+    every use, without touching the database. So is the timeline its chart
+    loads. Requests carrying flash messages (e.g. right
+    after ending the game) still go to the view so the messages are shown.
+    """
+
+    def __call__(self, request):
+        path = request.path_info
+        match = SNAPSHOT_URL.match(path)
+        if (
+            request.method in ('GET', 'HEAD')
+            and match
+            and CookieStorage.cookie_name not in request.COOKIES
+            # Only the default timeline is snapshotted; ?points= goes to the view
+            and not (match.group(2) == 'timeline/' and request.GET)
+        ):
+            snapshot = os.path.join(settings.SNAPSHOT_ROOT, 'games', match.group(1), SNAPSHOT_FILES[match.group(2)])
+            if os.path.isfile(snapshot):
+                return self.serve(self.get_static_file(snapshot, path), request)
+        return super().__call__(request)
+
+    def add_cache_headers(self, headers, path, url):
+        if SNAPSHOT_URL.match(url):
+            # Snapshot URLs carry no content hash and are replaced or removed
+            # when the game changes: clients revalidate every time, which
+            # WhiteNoise answers from the ETag and Last-Modified of the file
+            headers['Cache-Control'] = 'no-cache'
+            return
+        super().add_cache_headers(headers, path, url)
@@ -0,0 +1,40 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+
+def pin_to_primary():
+    """Send all reads of the current request to the primary database."""
+    return _pinned_to_primary.set(True)
+
+
+def unpin(token):
+    """Undo a previous pin_to_primary() call."""
+    _pinned_to_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Route reads to the read replicas and writes to the primary database."""
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'REPLICA_DATABASES', [])
+        if not replicas or _pinned_to_primary.get():
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction must see the transaction's own writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary and replicas hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'REPLICA_DATABASES', [])
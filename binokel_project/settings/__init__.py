@@ -0,0 +1,8 @@
+"""
+Settings profiles of the Binokel score tracker.
+
+base holds what every profile shares. dev (the default of manage.py) adds
+the development tools and turns DEBUG on, test is used by manage.py test,
+and prod (the default of the WSGI and ASGI entry points) loads only what
+serving requests needs.
+"""
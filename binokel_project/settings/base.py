@@ -1,19 +1,28 @@
+"""
+Settings shared by every profile.
+
+Profiles (dev, test, prod) import everything from here and add what only
+they need; point DJANGO_SETTINGS_MODULE at one of them.
+"""
 import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-4wk34@3i@jyxs+ot%@q#d_8+^r^0l@-cf@!t&lh@#=^l5h$rtm'
+SECRET_KEY = os.environ.get(
+    'SECRET_KEY', 'django-insecure-4wk34@3i@jyxs+ot%@q#d_8+^r^0l@-cf@!t&lh@#=^l5h$rtm'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = bool(int(os.environ.get('DEBUG', 1)))
+DEBUG = False
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0']
+ALLOWED_HOSTS += [host.strip() for host in os.environ.get('ALLOWED_HOSTS', '').split(',') if host.strip()]
 
 # Application definition
 
@@ -27,7 +36,6 @@ INSTALLED_APPS = [
     
     # Third-party apps
     'django_bootstrap5',
-    'behave_django',
     
     # Local apps
     'score_tracker',
@@ -35,7 +43,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'binokel_project.middleware.SnapshotMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -72,6 +80,15 @@ DATABASES = {
     }
 }
 
+# Opt-in SQLite profile for venues where several tables enter rounds at
+# once: WAL journaling, immediate write transactions and a busy timeout (in
+# seconds) instead of "database is locked" errors
+if bool(int(os.environ.get('SQLITE_HIGH_CONCURRENCY', 0))):
+    DATABASES['default']['ENGINE'] = 'binokel_project.sqlite_backend'
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': float(os.environ.get('SQLITE_BUSY_TIMEOUT', 20)),
+    }
+
 # Only use PostgreSQL if explicitly configured (like in Docker)
 if 'POSTGRES_HOST' in os.environ:
     DATABASES = {
@@ -85,6 +102,39 @@ if 'POSTGRES_HOST' in os.environ:
         }
     }
 
+# Optional read replicas. Reads are routed to the replicas, writes to the
+# primary ('default'). POSTGRES_REPLICA_HOSTS takes a comma-separated list of
+# hosts sharing the primary's credentials; SQLITE_REPLICAS takes a
+# comma-separated list of SQLite files for local testing.
+REPLICA_DATABASES = []
+
+if 'POSTGRES_HOST' in os.environ:
+    replica_names = [h.strip() for h in os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',') if h.strip()]
+    replica_key = 'HOST'
+else:
+    replica_names = [p.strip() for p in os.environ.get('SQLITE_REPLICAS', '').split(',') if p.strip()]
+    replica_key = 'NAME'
+
+for index, replica_name in enumerate(replica_names, start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        replica_key: replica_name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+# Seconds a client keeps reading from the primary after a write
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+if REPLICA_DATABASES:
+    DATABASE_ROUTERS = ['binokel_project.routers.PrimaryReplicaRouter']
+    MIDDLEWARE.insert(1, 'binokel_project.middleware.ReplicaPinningMiddleware')
+
+# Where standings are computed: 'python', 'sql' (inside the database) or
+# 'auto' (SQL on PostgreSQL, Python on SQLite)
+SCORING_BACKEND = os.environ.get('SCORING_BACKEND', 'auto')
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -124,6 +174,9 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Pre-rendered pages of completed games, served by SnapshotMiddleware
+SNAPSHOT_ROOT = Path(os.environ.get('SNAPSHOT_ROOT', BASE_DIR / 'snapshots'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
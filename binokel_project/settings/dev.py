@@ -0,0 +1,10 @@
+"""Local development: DEBUG on unless DEBUG=0, plus the BDD test tools."""
+import os
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = bool(int(os.environ.get('DEBUG', 1)))
+
+INSTALLED_APPS += [
+    'behave_django',
+]
@@ -0,0 +1,21 @@
+"""Serving requests: no development apps, DEBUG off unless DEBUG=1."""
+import os
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = bool(int(os.environ.get('DEBUG', 0)))
+
+# Compile every template once per process
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
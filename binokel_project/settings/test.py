@@ -0,0 +1,11 @@
+"""Settings for manage.py test; behave runs under dev unless DJANGO_SETTINGS_MODULE selects this profile."""
+from .base import *  # noqa: F401,F403
+
+INSTALLED_APPS += [
+    'behave_django',
+]
+
+# Test users do not need expensive password hashing
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
@@ -0,0 +1,38 @@
+"""
+SQLite backend tuned for several tables writing at the same time.
+
+- Every connection switches to WAL journaling, so readers never block the
+  writer and the writer never blocks readers.
+- synchronous=NORMAL only syncs at checkpoints, which is safe in WAL mode.
+- Transactions start with BEGIN IMMEDIATE. A deferred transaction that reads
+  before it writes (like round_create counting rounds) cannot wait for the
+  write lock and fails with "database is locked" at once; an immediate one
+  takes the write lock up front and waits for it up to the busy timeout
+  (OPTIONS['timeout']).
+"""
+from django.db.backends.signals import connection_created
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Negative values are KiB: 64 MB of page cache per connection
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
+
+
+def set_pragmas(sender, connection, **kwargs):
+    """Apply PRAGMAS to every new connection of this backend."""
+    with connection.cursor() as cursor:
+        for name, value in PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+connection_created.connect(set_pragmas, sender=DatabaseWrapper)
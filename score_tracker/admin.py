@@ -1,5 +1,113 @@
 from django.contrib import admin
-from .models import Player, Game, Round, Score
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .models import Player, Game, Round, Score, Tournament
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator that estimates the size of large unfiltered tables.
+
+    On PostgreSQL an unfiltered changelist takes the row count from the
+    planner statistics instead of running COUNT(*) over the whole table.
+    Filtered querysets and other databases are counted exactly.
+    """
+    # Below this estimate the exact count is cheap enough
+    exact_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.exact_threshold:
+                return row[0]
+        return super().count
+
+
+class RelatedInputFilter(admin.SimpleListFilter):
+    """
+    Filter on a related object by id or name typed into a text field.
+
+    Unlike the default related filter it does not list every related object
+    in the sidebar, so it stays fast however many games and players exist.
+    """
+    template = 'admin/score_tracker/input_filter.html'
+    # Lookup of the related object's primary key and name, e.g. 'game__name'
+    id_lookup = None
+    name_lookup = None
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value:
+            return queryset
+        if value.isdigit():
+            return queryset.filter(**{self.id_lookup: value})
+        return queryset.filter(**{f'{self.name_lookup}__icontains': value})
+
+    def choices(self, changelist):
+        # The other active parameters are kept as hidden fields of the form
+        yield {
+            'value': self.value() or '',
+            'other_parameters': [
+                (key, value) for key, value in changelist.params.items()
+                if key not in (self.parameter_name, 'p')
+            ],
+        }
+
+
+class GameInputFilter(RelatedInputFilter):
+    title = 'game (id or name)'
+    parameter_name = 'game'
+    id_lookup = 'game_id'
+    name_lookup = 'game__name'
+
+
+class GameMakerInputFilter(RelatedInputFilter):
+    title = 'game maker (id or name)'
+    parameter_name = 'game_maker'
+    id_lookup = 'game_maker_id'
+    name_lookup = 'game_maker__name'
+
+
+class PlayerInputFilter(RelatedInputFilter):
+    title = 'player (id or name)'
+    parameter_name = 'player'
+    id_lookup = 'player_id'
+    name_lookup = 'player__name'
+
+
+class RoundGameInputFilter(RelatedInputFilter):
+    title = 'game (id or name)'
+    parameter_name = 'game'
+    id_lookup = 'round__game_id'
+    name_lookup = 'round__game__name'
+
+
+class TournamentInputFilter(RelatedInputFilter):
+    title = 'tournament (id or name)'
+    parameter_name = 'tournament'
+    id_lookup = 'tournament_id'
+    name_lookup = 'tournament__name'
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with millions of rows."""
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Player)
@@ -11,23 +119,45 @@ class PlayerAdmin(admin.ModelAdmin):
 class ScoreInline(admin.TabularInline):
     model = Score
     extra = 0
+    autocomplete_fields = ('player',)
 
 
 @admin.register(Round)
-class RoundAdmin(admin.ModelAdmin):
-    list_display = ('game', 'round_number', 'game_maker', 'bid_amount', 'is_success')
-    list_filter = ('game', 'game_maker', 'is_success', 'is_abgehen', 'is_durch', 'is_doppelt_abgehen')
+class RoundAdmin(LargeTableAdmin):
+    list_display = ('game', 'round_number', 'game_maker', 'bid_amount', 'outcome')
+    list_filter = (GameInputFilter, GameMakerInputFilter, 'outcome')
+    list_select_related = ('game', 'game_maker')
+    autocomplete_fields = ('game', 'game_maker', 'last_trick_winner')
+    # Edited through the score inline
+    exclude = ('opponent_points',)
     inlines = [ScoreInline]
 
 
+@admin.register(Tournament)
+class TournamentAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name',)
+
+
 @admin.register(Game)
-class GameAdmin(admin.ModelAdmin):
-    list_display = ('name', 'start_date', 'is_active')
-    list_filter = ('is_active', 'start_date')
-    filter_horizontal = ('players',)
+class GameAdmin(LargeTableAdmin):
+    list_display = ('name', 'start_date', 'is_active', 'tournament')
+    list_filter = ('is_active', 'start_date', TournamentInputFilter)
+    list_select_related = ('tournament',)
+    search_fields = ('name',)
+    autocomplete_fields = ('players', 'tournament')
+
+    def get_readonly_fields(self, request, obj=None):
+        # Archived games stay completed, see Game.clean
+        if obj is not None and obj.is_archived:
+            return ('is_active',)
+        return ()
 
 
 @admin.register(Score)
-class ScoreAdmin(admin.ModelAdmin):
+class ScoreAdmin(LargeTableAdmin):
     list_display = ('player', 'round', 'meld_points', 'trick_points', 'total_points')
-    list_filter = ('player', 'round__game')
\ No newline at end of file
+    list_filter = (PlayerInputFilter, RoundGameInputFilter)
+    list_select_related = ('player', 'round')
+    raw_id_fields = ('round',)
+    autocomplete_fields = ('player',)
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class ScoreTrackerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'score_tracker'
\ No newline at end of file
+    name = 'score_tracker'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,146 @@
+"""
+Compact storage for completed games.
+
+An archived game keeps its rounds and opponent points in a single
+zlib-compressed JSON blob on the Game row, stored column by column, instead
+of one Round row per round. Timestamps are reduced to the round's
+creation time in whole seconds.
+"""
+import json
+import zlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+
+from .models import OUTCOME_FLAGS, Game, Player, Round, Score, outcome_from_flags
+from .scoring import get_standings_for_games, invalidate_tournament_standings
+from .signals import delete_rows
+
+ARCHIVE_VERSION = 2
+
+ROUND_COLUMNS = (
+    'round_number', 'game_maker_id', 'bid_amount', 'outcome',
+    'meld_points', 'trick_points', 'last_trick_winner_id', 'created_at',
+)
+SCORE_COLUMNS = ('round', 'player_id', 'meld_points', 'trick_points')
+
+
+def pack_game(game):
+    """Return the archive blob for the rounds and scores of a game."""
+    rounds = list(game.rounds.order_by('round_number'))
+
+    round_columns = {column: [] for column in ROUND_COLUMNS}
+    for round_obj in rounds:
+        round_columns['round_number'].append(round_obj.round_number)
+        round_columns['game_maker_id'].append(round_obj.game_maker_id)
+        round_columns['bid_amount'].append(round_obj.bid_amount)
+        round_columns['outcome'].append(round_obj.outcome)
+        round_columns['meld_points'].append(round_obj.meld_points)
+        round_columns['trick_points'].append(round_obj.trick_points)
+        round_columns['last_trick_winner_id'].append(round_obj.last_trick_winner_id)
+        round_columns['created_at'].append(int(round_obj.created_at.timestamp()))
+
+    score_columns = {column: [] for column in SCORE_COLUMNS}
+    for index, round_obj in enumerate(rounds):
+        for player_id, (meld_points, trick_points) in sorted(
+            (int(player_id), points) for player_id, points in round_obj.opponent_points.items()
+        ):
+            score_columns['round'].append(index)
+            score_columns['player_id'].append(player_id)
+            score_columns['meld_points'].append(meld_points)
+            score_columns['trick_points'].append(trick_points)
+
+    payload = {'v': ARCHIVE_VERSION, 'rounds': round_columns, 'scores': score_columns}
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode(), 9)
+
+
+def unpack_rounds(game):
+    """
+    Rebuild the rounds of an archived game as unsaved Round objects.
+
+    Each round carries its opponents' scores as unsaved Score objects in
+    round.archived_scores; players are resolved from the game's roster.
+    """
+    payload = json.loads(zlib.decompress(bytes(game.archive)))
+    round_columns = payload['rounds']
+    if payload['v'] == 1:
+        # Version 1 stored the old outcome flags as a bitmask
+        round_columns['outcome'] = [
+            outcome_from_flags(*(bool(flags & (1 << bit)) for bit in range(len(OUTCOME_FLAGS))))
+            for flags in round_columns.pop('flags')
+        ]
+    score_columns = payload['scores']
+
+    players = {player.id: player for player in game.roster}
+    referenced = set(round_columns['game_maker_id']) | set(score_columns['player_id'])
+    referenced |= set(round_columns['last_trick_winner_id']) - {None}
+    if not referenced <= set(players):
+        # Players that have been removed from the roster since
+        players.update(Player.objects.in_bulk(referenced - set(players)))
+
+    rounds = []
+    for values in zip(*(round_columns[column] for column in ROUND_COLUMNS)):
+        row = dict(zip(ROUND_COLUMNS, values))
+        created_at = datetime.fromtimestamp(row['created_at'], tz=dt_timezone.utc)
+        round_obj = Round(
+            game=game,
+            round_number=row['round_number'],
+            game_maker=players[row['game_maker_id']],
+            bid_amount=row['bid_amount'],
+            outcome=row['outcome'],
+            meld_points=row['meld_points'],
+            trick_points=row['trick_points'],
+            last_trick_winner=players.get(row['last_trick_winner_id']),
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        round_obj.archived_scores = []
+        rounds.append(round_obj)
+
+    for values in zip(*(score_columns[column] for column in SCORE_COLUMNS)):
+        row = dict(zip(SCORE_COLUMNS, values))
+        round_obj = rounds[row['round']]
+        round_obj.set_opponent_points(row['player_id'], row['meld_points'], row['trick_points'])
+        round_obj.archived_scores.append(Score(
+            round=round_obj,
+            player=players[row['player_id']],
+            meld_points=row['meld_points'],
+            trick_points=row['trick_points'],
+        ))
+    return rounds
+
+
+def archive_game(game):
+    """
+    Pack a completed game into its archive and delete its Round rows.
+
+    Returns the size of the archive blob in bytes.
+    """
+    if game.is_active:
+        raise ValueError(f"Game {game.pk} is still active and cannot be archived.")
+
+    with transaction.atomic():
+        standings = get_standings_for_games([game])[game.pk]
+        game.archive = pack_game(game)
+        game.final_standings = {
+            'rounds': game.rounds.count(),
+            'players': {
+                str(player_id): [data['score'], data['rounds_won']]
+                for player_id, data in standings.items()
+            },
+        }
+        game.is_archived = True
+        game.save(update_fields=['archive', 'final_standings', 'is_archived', 'updated_at'])
+
+        # The page does not change, so the snapshot stays; the tournament
+        # standings are dropped below
+        delete_rows(Round.objects.filter(game=game))
+
+    if game.tournament_id is not None:
+        invalidate_tournament_standings(game.tournament_id)
+    return len(game.archive)
+
+
+def archivable_games():
+    """Completed games that have not been archived yet."""
+    return Game.objects.filter(is_active=False, is_archived=False).order_by('pk')
@@ -0,0 +1,214 @@
+"""
+Vendored frontend assets.
+
+Bootstrap is served from static/vendor/bootstrap by WhiteNoise instead of a
+CDN, so pages load at venues without a working internet connection. The
+stylesheet is trimmed to the rules that can match a class name used by the
+project: every word in the templates, the project's JavaScript and Python
+code and the django_bootstrap5 package counts as used, plus the classes
+Bootstrap's JavaScript and the message tags add at runtime (SAFELIST). The
+JavaScript is Bootstrap's plugin bundle without Popper, which only tooltips,
+popovers and dropdowns need.
+
+``manage.py vendor_bootstrap <dist>`` regenerates the files from an unpacked
+Bootstrap distribution; run it again after using new Bootstrap classes.
+"""
+import re
+from pathlib import Path
+
+import django_bootstrap5
+from django.conf import settings
+
+VENDOR_DIR = Path('vendor') / 'bootstrap'
+VENDOR_FILES = {
+    'css/bootstrap.min.css': Path('css') / 'bootstrap.min.css',
+    'js/bootstrap.min.js': Path('js') / 'bootstrap.min.js',
+}
+
+# Classes that only appear at runtime
+SAFELIST = {
+    # Set by the collapse, modal, tab and alert plugins
+    'active', 'collapse', 'collapsing', 'collapse-horizontal', 'fade', 'show', 'showing', 'hiding',
+    'modal-backdrop', 'modal-open', 'modal-static',
+    # alert-{{ message.tags }}
+    'alert-debug', 'alert-info', 'alert-success', 'alert-warning', 'alert-error',
+}
+
+SOURCE_SUFFIXES = {'.html', '.js', '.py'}
+WORD = re.compile(r'[A-Za-z_-][\w-]*')
+CLASS_NAME = re.compile(r'\.(-?[A-Za-z_][\w-]*)')
+GROUP_RULES = ('@media', '@supports')
+
+
+def class_sources():
+    """The files searched for class names."""
+    static_dirs = [Path(directory) for directory in settings.STATICFILES_DIRS]
+    roots = [Path(directory) for template in settings.TEMPLATES for directory in template['DIRS']]
+    roots += [Path(settings.BASE_DIR) / 'score_tracker', Path(django_bootstrap5.__file__).parent]
+    roots += [directory / 'js' for directory in static_dirs]
+    vendor_dirs = [directory / VENDOR_DIR for directory in static_dirs]
+    for root in roots:
+        for path in sorted(root.rglob('*')):
+            if path.suffix in SOURCE_SUFFIXES and not any(vendor in path.parents for vendor in vendor_dirs):
+                yield path
+
+
+def used_class_names(paths=None):
+    """Every word in the given source files, plus SAFELIST."""
+    words = set(SAFELIST)
+    for path in class_sources() if paths is None else paths:
+        words.update(WORD.findall(Path(path).read_text(encoding='utf-8')))
+    return words
+
+
+def _skip_string(css, pos):
+    """Return the position after the string starting at pos."""
+    return css.index(css[pos], pos + 1) + 1
+
+
+def _closing_brace(css, pos):
+    """Return the position of the brace closing the block opened at pos."""
+    depth = 0
+    while True:
+        char = css[pos]
+        if char in '"\'':
+            pos = _skip_string(css, pos)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return pos
+        pos += 1
+
+
+def parse_css(css, pos=0):
+    """
+    Parse a stylesheet into a list of nodes; return (nodes, end position).
+
+    Nodes are ('raw', text) for statements and kept comments, ('rule',
+    prelude, body) for style rules and other at-rules, and ('group', prelude,
+    nodes) for @media and @supports blocks. Only /*! comments are kept.
+    """
+    nodes = []
+    start = pos
+    while pos < len(css):
+        char = css[pos]
+        if char in '"\'':
+            pos = _skip_string(css, pos)
+        elif css.startswith('/*', pos):
+            end = css.index('*/', pos) + 2
+            if css.startswith('/*!', pos):
+                nodes.append(('raw', css[pos:end]))
+            pos = start = end
+        elif char == ';':
+            nodes.append(('raw', css[start:pos + 1].strip()))
+            pos = start = pos + 1
+        elif char == '}':
+            return nodes, pos + 1
+        elif char == '{':
+            prelude = css[start:pos].strip()
+            if prelude.startswith(GROUP_RULES):
+                children, pos = parse_css(css, pos + 1)
+                nodes.append(('group', prelude, children))
+            else:
+                end = _closing_brace(css, pos)
+                nodes.append(('rule', prelude, css[pos + 1:end]))
+                pos = end + 1
+            start = pos
+        else:
+            pos += 1
+    return nodes, pos
+
+
+def _split_selectors(prelude):
+    """Split a selector list at the commas outside parentheses."""
+    selectors = []
+    depth = 0
+    start = 0
+    for pos, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:pos])
+            start = pos + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def _required_classes(selector):
+    """Class names a selector needs; those inside :not() and attribute selectors do not count."""
+    outside = []
+    depth = 0
+    for char in selector:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif depth == 0:
+            outside.append(char)
+    return CLASS_NAME.findall(''.join(outside))
+
+
+def trim_nodes(nodes, keep):
+    """Drop the selectors needing a class not in keep, and rules and groups left empty."""
+    trimmed = []
+    for node in nodes:
+        if node[0] == 'group':
+            children = trim_nodes(node[2], keep)
+            if children:
+                trimmed.append(('group', node[1], children))
+        elif node[0] == 'rule' and not node[1].startswith('@'):
+            selectors = [
+                selector for selector in _split_selectors(node[1])
+                if all(name in keep for name in _required_classes(selector))
+            ]
+            if selectors:
+                trimmed.append(('rule', ','.join(selectors), node[2]))
+        else:
+            trimmed.append(node)
+    return trimmed
+
+
+def serialize_css(nodes):
+    """Write parsed nodes back out as minified CSS."""
+    parts = []
+    for node in nodes:
+        if node[0] == 'raw':
+            parts.append(node[1])
+        elif node[0] == 'rule':
+            parts.append(f'{node[1]}{{{node[2]}}}')
+        else:
+            parts.append(f'{node[1]}{{{serialize_css(node[2])}}}')
+    return ''.join(parts)
+
+
+def trim_css(css, keep):
+    """Return css with only the rules that can match the class names in keep."""
+    nodes, _ = parse_css(css)
+    return serialize_css(trim_nodes(nodes, keep))
+
+
+def vendor_bootstrap(dist, static_dir=None):
+    """
+    Copy Bootstrap from an unpacked distribution into the static files, trimmed.
+
+    Returns {file: (bytes in the distribution, bytes written)}.
+    """
+    dist = Path(dist)
+    target = Path(static_dir or settings.STATICFILES_DIRS[0]) / VENDOR_DIR
+    keep = used_class_names()
+    sizes = {}
+    for source, destination in VENDOR_FILES.items():
+        content = (dist / source).read_text(encoding='utf-8')
+        output = trim_css(content, keep) if source.endswith('.css') else content
+        # The source map is not shipped
+        output = re.sub(r'\n?//# sourceMappingURL=\S+\s*$', '\n', output)
+        path = target / destination
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(output, encoding='utf-8')
+        sizes[str(VENDOR_DIR / destination)] = (len(content.encode()), len(output.encode()))
+    return sizes
@@ -0,0 +1,251 @@
+"""
+Whole-database backup and restore of the score tracker.
+
+A backup is a gzip-compressed stream of JSON lines. After a header line,
+every model gets a line listing its columns, its rows in batches stored
+column by column, and a closing line with the row count and a SHA-256
+checksum of the rows. Timestamps are stored as integer microseconds since
+the epoch and binary fields as base64.
+
+Backups and restores stream batch by batch, so memory use does not grow
+with the size of the database. Score is a view over Round.opponent_points
+and is restored with the rounds.
+"""
+import base64
+import gzip
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from .signals import delete_rows, invalidate_all_games
+
+BACKUP_FORMAT = 'binokel-backup'
+BACKUP_VERSION = 1
+BATCH_SIZE = 5000
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class BackupError(Exception):
+    """Raised when a backup cannot be read or does not match the database."""
+
+
+def backup_models():
+    """The models a backup contains, including the game/player membership table."""
+    return [
+        model for model in apps.get_app_config('score_tracker').get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+    ]
+
+
+def _encode_datetime(value):
+    return (value - EPOCH) // MICROSECOND
+
+
+def _decode_datetime(value):
+    return EPOCH + value * MICROSECOND
+
+
+def _encode_binary(value):
+    return base64.b64encode(bytes(value)).decode()
+
+
+CODECS = {
+    'DateTimeField': (_encode_datetime, _decode_datetime),
+    'BinaryField': (_encode_binary, base64.b64decode),
+}
+
+
+def _columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _codecs(model, position):
+    """(column index, codec) for the columns that are not stored as they are."""
+    return [
+        (index, CODECS[field.get_internal_type()][position])
+        for index, field in enumerate(model._meta.concrete_fields)
+        if field.get_internal_type() in CODECS
+    ]
+
+
+def _checksum_row(checksum, row):
+    checksum.update(json.dumps(row, separators=(',', ':'), sort_keys=True).encode())
+    checksum.update(b'\n')
+
+
+def _iter_rows(model):
+    """Yield the encoded rows of a model in primary key order."""
+    encoders = _codecs(model, 0)
+    rows = model._base_manager.order_by('pk').values_list(*_columns(model))
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        row = list(row)
+        for index, encode in encoders:
+            if row[index] is not None:
+                row[index] = encode(row[index])
+        yield row
+
+
+def _write_line(stream, data):
+    stream.write(json.dumps(data, separators=(',', ':')))
+    stream.write('\n')
+
+
+def write_backup(path):
+    """
+    Write a backup of all score tracker data to path.
+
+    Returns {model label: rows written}.
+    """
+    counts = {}
+    models = backup_models()
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as stream, transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # One snapshot for all tables
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        _write_line(stream, {
+            'format': BACKUP_FORMAT,
+            'version': BACKUP_VERSION,
+            'models': [model._meta.label_lower for model in models],
+        })
+        for model in models:
+            label = model._meta.label_lower
+            columns = _columns(model)
+            _write_line(stream, {'model': label, 'columns': columns})
+
+            checksum = hashlib.sha256()
+            count = 0
+            batch = []
+            for row in _iter_rows(model):
+                _checksum_row(checksum, row)
+                batch.append(row)
+                if len(batch) == BATCH_SIZE:
+                    _write_line(stream, {'data': [list(column) for column in zip(*batch)]})
+                    count += len(batch)
+                    batch = []
+            if batch:
+                _write_line(stream, {'data': [list(column) for column in zip(*batch)]})
+                count += len(batch)
+            _write_line(stream, {'end': label, 'rows': count, 'sha256': checksum.hexdigest()})
+            counts[label] = count
+    return counts
+
+
+def _read_lines(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as stream:
+        for line in stream:
+            yield json.loads(line)
+
+
+def _database_checksum(model):
+    checksum = hashlib.sha256()
+    count = 0
+    for row in _iter_rows(model):
+        _checksum_row(checksum, row)
+        count += 1
+    return count, checksum.hexdigest()
+
+
+def _restore_model(model, columns, lines):
+    """Insert the batches of one model; return (rows, checksum, end line) of what was read."""
+    decoders = _codecs(model, 1)
+    fields = model._meta.concrete_fields
+    # Only some columns need converting to what the database driver takes
+    preparers = [
+        (index, field.get_db_prep_save) for index, field in enumerate(fields)
+        if field.get_internal_type() in ('DateTimeField', 'BinaryField', 'JSONField')
+    ]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    checksum = hashlib.sha256()
+    count = 0
+    for line in lines:
+        if 'end' in line:
+            return count, checksum.hexdigest(), line
+        rows = [list(row) for row in zip(*line['data'])]
+        for row in rows:
+            _checksum_row(checksum, row)
+            for index, decode in decoders:
+                if row[index] is not None:
+                    row[index] = decode(row[index])
+            for index, prepare in preparers:
+                row[index] = prepare(row[index], connection)
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        count += len(rows)
+    raise BackupError(f"The backup ends in the middle of {model._meta.label_lower}.")
+
+
+def restore_backup(path, flush=False):
+    """
+    Restore a backup written by write_backup into the database.
+
+    The tables must be empty unless flush is set, which deletes all score
+    tracker data first. Foreign key checks are deferred until all rows are
+    in, and every table is checked against the row count and checksum of
+    the backup before the transaction commits. Returns {model label: rows}.
+    """
+    models = {model._meta.label_lower: model for model in backup_models()}
+    lines = _read_lines(path)
+    try:
+        header = next(lines)
+    except (StopIteration, OSError, ValueError) as error:
+        raise BackupError(f"{path} is not a score tracker backup.") from error
+    if header.get('format') != BACKUP_FORMAT or header.get('version') != BACKUP_VERSION:
+        raise BackupError(f"{path} is not a version {BACKUP_VERSION} score tracker backup.")
+    if set(header['models']) != set(models):
+        raise BackupError("The backup was written for a different set of models.")
+
+    counts = {}
+    checksums = {}
+    with transaction.atomic():
+        if flush:
+            # The snapshots and cached standings of the replaced games go too
+            invalidate_all_games()
+            for model in reversed(list(models.values())):
+                delete_rows(model._base_manager.all())
+        else:
+            non_empty = [label for label, model in models.items() if model._base_manager.exists()]
+            if non_empty:
+                raise BackupError(f"Tables are not empty: {', '.join(non_empty)}. Use --flush to replace them.")
+
+        with connection.constraint_checks_disabled():
+            for line in lines:
+                model = models.get(line.get('model'))
+                if model is None:
+                    raise BackupError(f"The backup contains an unknown model: {line.get('model')}.")
+                if line['columns'] != _columns(model):
+                    raise BackupError(f"The columns of {line['model']} do not match the current schema.")
+                count, checksum, end = _restore_model(model, line['columns'], lines)
+                if (count, checksum) != (end['rows'], end['sha256']):
+                    raise BackupError(f"The backup of {line['model']} is damaged: checksum mismatch.")
+                counts[line['model']] = count
+                checksums[line['model']] = checksum
+
+        if set(counts) != set(models):
+            raise BackupError("The backup is incomplete.")
+        connection.check_constraints(table_names=[model._meta.db_table for model in models.values()])
+
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), list(models.values()))
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+        # Read everything back so the data in the database is what was backed up
+        for label, model in models.items():
+            if _database_checksum(model) != (counts[label], checksums[label]):
+                raise BackupError(f"{label} does not match the backup after restoring it.")
+
+        # Snapshots and cached standings left over from earlier data under the same ids
+        invalidate_all_games()
+    return counts
@@ -0,0 +1,774 @@
+"""
+Benchmarks run through ``manage.py benchmark <name>``.
+
+Each benchmark seeds its own data inside a transaction that is rolled back
+afterwards, so it can be run against any database without leaving rows behind.
+"""
+import random
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.db.models import Q
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from .models import OUTCOME_FLAGS, Game, Player, Round, Tournament
+from .seeding import random_round, seed_games, seed_players
+
+BENCHMARKS = {}
+
+
+def benchmark(name, rollback=True):
+    """
+    Register a benchmark function under name.
+
+    Benchmarks with rollback=False run outside the rolled-back transaction,
+    for example because other threads must see their data, and clean up
+    after themselves.
+    """
+    def decorator(func):
+        func.rollback = rollback
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def measure(func, repeat, setup=None):
+    """
+    Call func repeat times and return (median ms, max ms, queries of the last call).
+
+    setup, if given, runs untimed before every call.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), max(timings), len(queries)
+
+
+def get_view(view, path, *args, **kwargs):
+    """Call a view function directly, skipping the middleware stack."""
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    return view(request, *args, **kwargs)
+
+
+def report(out, label, result):
+    median, worst, queries = result
+    out.write(f"{label:<40} median {median:8.2f} ms   max {worst:8.2f} ms   {queries:3d} queries")
+
+
+@benchmark('tournament')
+def tournament_standings(out, games=50, rounds=30, players=3, repeat=20, **options):
+    """Render the tournament projector view with many tables in play."""
+    from .views import tournament_detail
+
+    tournament = Tournament.objects.create(name="Benchmark Tournament")
+    pool = seed_players(games * players, prefix="Benchmark Player")
+    seed_games(games, pool, players_per_game=players, rounds_per_game=rounds,
+               tournament=tournament, seed=1)
+    path = f'/tournaments/{tournament.pk}/'
+    out.write(f"{games} tables, {rounds} rounds each, {players} players per table")
+
+    def cold():
+        cache.clear()
+        get_view(tournament_detail, path, pk=tournament.pk)
+
+    def warm():
+        get_view(tournament_detail, path, pk=tournament.pk)
+
+    report(out, "standings, cold cache", measure(cold, repeat))
+    get_view(tournament_detail, path, pk=tournament.pk)
+    report(out, "standings, no new rounds", measure(warm, repeat))
+
+    # Every table reports one more round between two projector refreshes
+    rng = random.Random(2)
+    tables = [(game, list(game.players.all())) for game in tournament.games.prefetch_related('players')]
+    next_round = {game.pk: rounds + 1 for game, _ in tables}
+
+    def add_rounds():
+        for game, roster in tables:
+            fields, opponent_points = random_round(rng, roster)
+            round_obj = Round(game=game, round_number=next_round[game.pk], **fields)
+            for player, (meld, trick) in opponent_points.items():
+                round_obj.set_opponent_points(player.id, meld, trick)
+            round_obj.save()
+            next_round[game.pk] += 1
+
+    report(out, "standings, one new round per table", measure(warm, repeat, setup=add_rounds))
+
+
+@benchmark('archive')
+def archived_games(out, games=50, rounds=30, players=3, repeat=20, **options):
+    """Compare database size and game_detail latency before and after archiving."""
+    from .archive import archive_game
+    from .dbstats import database_size, table_sizes
+    from .views import game_detail
+
+    last_pk = Game.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    pool = seed_players(games * players, prefix="Benchmark Player")
+    seed_games(games, pool, players_per_game=players, rounds_per_game=rounds,
+               active_ratio=0, seed=1)
+    game_ids = list(Game.objects.filter(pk__gt=last_pk).values_list('pk', flat=True))
+    sample = game_ids[0]
+    tables = [Game._meta.db_table, Round._meta.db_table]
+    out.write(f"{len(game_ids)} completed games, {rounds} rounds each, {players} players per game")
+
+    def render():
+        get_view(game_detail, f'/games/{sample}/', pk=sample)
+
+    size_before, tables_before = database_size(), table_sizes(tables)
+    report(out, "game_detail, Round rows", measure(render, repeat))
+
+    for game in Game.objects.filter(pk__in=game_ids):
+        archive_game(game)
+
+    size_after, tables_after = database_size(), table_sizes(tables)
+    report(out, "game_detail, archived", measure(render, repeat))
+
+    if size_before is not None:
+        out.write(f"{'database bytes in use':<40} {size_before:>12} -> {size_after:>12}")
+    for table in tables_before or {}:
+        out.write(f"{table:<40} {tables_before[table]:>12} -> {tables_after[table]:>12}")
+
+
+@benchmark('scoring')
+def scoring_backends(out, games=1, rounds=2000, players=3, repeat=20, **options):
+    """Compare the Python and SQL scoring backends on long games (try --rounds 5000)."""
+    from .scoring import get_standings_for_games
+
+    pool = seed_players(games * players, prefix="Benchmark Player")
+    last_pk = Game.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    seed_games(games, pool, players_per_game=players, rounds_per_game=rounds, seed=1)
+    game_list = list(Game.objects.filter(pk__gt=last_pk))
+    round_rows = Round.objects.filter(game__in=game_list).count()
+    out.write(f"{games} game(s), {rounds} rounds each, {players} players per game")
+
+    for backend in ('python', 'sql'):
+        report(out, f"{backend} backend",
+               measure(lambda: get_standings_for_games(game_list, backend=backend), repeat))
+    out.write(
+        f"{'rows transferred':<40} python {games * players + round_rows}"
+        f"   sql {2 * games * players}"
+    )
+
+
+@benchmark('writers', rollback=False)
+def concurrent_writers(out, games=None, rounds=50, players=3, repeat=None, threads=(1, 2, 4, 8), **options):
+    """Enter rounds from several threads at once (try SQLITE_HIGH_CONCURRENCY=1)."""
+    threads = [threads] if isinstance(threads, int) else threads
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            out.write(f"{connection.settings_dict['ENGINE']}, journal mode {cursor.fetchone()[0]}")
+    pool = seed_players(max(threads) * players, prefix="Benchmark Player")
+    tables = []
+    for index in range(max(threads)):
+        game = Game.objects.create(name=f"Benchmark Table {index + 1}")
+        roster = pool[index * players:(index + 1) * players]
+        game.players.set(roster)
+        tables.append((game, roster))
+
+    def writer(game, roster, seed, results):
+        # Same pattern as round_create: count the rounds, then write
+        rng = random.Random(seed)
+        written = errors = 0
+        try:
+            for _ in range(rounds):
+                fields, opponent_points = random_round(rng, roster)
+                try:
+                    with transaction.atomic():
+                        round_obj = Round(game=game, round_number=game.rounds.count() + 1, **fields)
+                        for player, (meld, trick) in opponent_points.items():
+                            round_obj.set_opponent_points(player.id, meld, trick)
+                        round_obj.save()
+                    written += 1
+                except OperationalError:
+                    errors += 1
+        finally:
+            connection.close()
+        results.append((written, errors))
+
+    try:
+        for count in threads:
+            results = []
+            workers = [
+                threading.Thread(target=writer, args=(*tables[index], index, results))
+                for index in range(count)
+            ]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+            written = sum(result[0] for result in results)
+            errors = sum(result[1] for result in results)
+            out.write(
+                f"{count:>2} writer(s)   {written / elapsed:8.1f} rounds/s   "
+                f"{errors:5d} of {count * rounds} rounds failed ({errors / (count * rounds):6.1%})"
+            )
+    finally:
+        Game.objects.filter(pk__in=[game.pk for game, _ in tables]).delete()
+        Player.objects.filter(pk__in=[player.pk for player in pool]).delete()
+
+
+# The Score table as it was before opponent points moved onto the round
+SCORE_ROWS_TABLE = 'benchmark_score_rows'
+
+
+def create_score_rows_table():
+    """
+    Copy the opponent points of all rounds into a Score-style table, one row per opponent.
+
+    Same columns, indexes and unique constraint as the score table of
+    migration 0001. Benchmarks run in a rolled-back transaction, so it goes
+    away again afterwards.
+    """
+    from .models import Score
+
+    types, suffixes, quote = connection.data_types, connection.data_types_suffix, connection.ops.quote_name
+    table = quote(SCORE_ROWS_TABLE)
+    columns = ['round_id', 'player_id', 'meld_points', 'trick_points', 'created_at', 'updated_at']
+    select, params = Score.objects.order_by().values_list(*columns).query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {table} ("
+            f"id {types['BigAutoField']} NOT NULL PRIMARY KEY {suffixes.get('BigAutoField', '')}, "
+            f"round_id {types['BigIntegerField']} NOT NULL, player_id {types['BigIntegerField']} NOT NULL, "
+            f"meld_points {types['IntegerField']} NOT NULL, trick_points {types['IntegerField']} NOT NULL, "
+            f"created_at {types['DateTimeField']} NOT NULL, updated_at {types['DateTimeField']} NOT NULL, "
+            f"UNIQUE (round_id, player_id))"
+        )
+        for column in ('round_id', 'player_id'):
+            cursor.execute(f"CREATE INDEX {quote(f'{SCORE_ROWS_TABLE}_{column}')} ON {table} ({column})")
+        cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) {select}", params)
+
+
+def iter_score_row_rounds(game_ids):
+    """scoring.iter_rounds for the Score-row layout: the rounds, then their scores, in two queries."""
+    from .scoring import ROUND_FIELDS
+
+    rounds = list(
+        Round.objects.filter(game_id__in=game_ids).order_by('game_id', 'round_number').values(*ROUND_FIELDS)
+    )
+    opponent_points = {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT s.round_id, s.player_id, s.meld_points + s.trick_points "
+            f"FROM {connection.ops.quote_name(SCORE_ROWS_TABLE)} s "
+            f"INNER JOIN {connection.ops.quote_name(Round._meta.db_table)} r ON r.id = s.round_id "
+            f"WHERE r.game_id IN ({', '.join(['%s'] * len(game_ids))})",
+            list(game_ids),
+        )
+        for round_id, player_id, points in cursor.fetchall():
+            opponent_points.setdefault(round_id, {})[player_id] = points
+    for round_row in rounds:
+        yield round_row, opponent_points.get(round_row['id'], {})
+
+
+def opponent_points_bytes():
+    """Bytes the opponent_points column takes in the round table, or None."""
+    column = connection.ops.quote_name(Round._meta.get_field('opponent_points').column)
+    length = {'sqlite': 'LENGTH', 'postgresql': 'pg_column_size'}.get(connection.vendor)
+    if length is None:
+        return None
+    table = connection.ops.quote_name(Round._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(SUM({length}({column})), 0) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+@benchmark('storage')
+def round_storage(out, games=200, rounds=50, players=3, repeat=20, **options):
+    """Compare storage and read latency of opponent points on the round with one Score row per opponent."""
+    from .dbstats import table_sizes
+    from .scoring import (
+        apply_round, build_standings, get_standings_for_games, initial_state, iter_rounds, load_rosters,
+    )
+    from .views import game_detail
+
+    last_pk = Game.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    pool = seed_players(games * players, prefix="Benchmark Player")
+    seed_games(games, pool, players_per_game=players, rounds_per_game=rounds, seed=1)
+    game_list = list(Game.objects.filter(pk__gt=last_pk))
+    game_ids = [game.pk for game in game_list]
+    sample = game_list[0]
+    create_score_rows_table()
+    out.write(f"{games} games, {rounds} rounds each, {players} players per game")
+
+    sizes = table_sizes([Round._meta.db_table, SCORE_ROWS_TABLE])
+    column_bytes = opponent_points_bytes()
+    if sizes is not None and column_bytes is not None:
+        round_bytes = sizes[Round._meta.db_table]
+        out.write(f"{'opponent_points: round table':<40} {round_bytes:>12} bytes")
+        out.write(f"{'Score rows: score table':<40} {sizes[SCORE_ROWS_TABLE]:>12} bytes")
+        # The round table without the column is estimated from the bytes the column holds
+        total = round_bytes - column_bytes + sizes[SCORE_ROWS_TABLE]
+        out.write(f"{'Score rows: round + score tables':<40} {total:>12} bytes")
+
+    def score_row_standings():
+        rosters = load_rosters(game_ids)
+        states = {game.pk: initial_state(game, rosters[game.pk]) for game in game_list}
+        for round_row, opponent_points in iter_score_row_rounds(game_ids):
+            apply_round(states[round_row['game_id']], round_row, opponent_points)
+        return {game_id: build_standings(rosters[game_id], states[game_id]) for game_id in game_ids}
+
+    # Both layouts must read the same points
+    assert list(iter_score_row_rounds([sample.pk])) == [
+        ({field: value for field, value in row.items() if field != 'opponent_points'}, points)
+        for row, points in iter_rounds(Q(game_id=sample.pk))
+    ]
+    report(out, "history of one game, opponent_points", measure(
+        lambda: list(iter_rounds(Q(game_id=sample.pk))), repeat))
+    report(out, "history of one game, Score rows", measure(
+        lambda: list(iter_score_row_rounds([sample.pk])), repeat))
+    report(out, f"standings of {games} games, opponent_points", measure(
+        lambda: get_standings_for_games(game_list, backend='python'), repeat))
+    report(out, f"standings of {games} games, Score rows", measure(score_row_standings, repeat))
+    # The views only read the column, so the page has no Score-row arm
+    report(out, "game_detail, opponent_points", measure(
+        lambda: get_view(game_detail, f'/games/{sample.pk}/', pk=sample.pk), repeat))
+
+
+@benchmark('outcome')
+def round_outcomes(out, games=2000, rounds=50, players=3, repeat=20, **options):
+    """Count rounds by outcome with and without the outcome index."""
+    from django.db.models import Count, F
+
+    from .dbstats import table_sizes
+    from .models import Outcome
+
+    last_pk = Game.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    pool = seed_players(games * players, prefix="Benchmark Player")
+    seed_games(games, pool, players_per_game=players, rounds_per_game=rounds, seed=1, batch_size=5000)
+    seeded = Round.objects.filter(game__gt=last_pk)
+    out.write(f"{seeded.count()} rounds, {games} games")
+
+    sizes = table_sizes([Round._meta.db_table])
+    if sizes is not None:
+        out.write(f"{'round table and indexes':<40} {sizes[Round._meta.db_table]:>12} bytes")
+    if connection.vendor == 'sqlite':
+        column = Round._meta.get_field('outcome').column
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN "
+                "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND sql LIKE %s)",
+                [Round._meta.db_table, f'%"{column}"%'],
+            )
+            out.write(f"{'outcome index':<40} {cursor.fetchone()[0]:>12} bytes")
+
+    report(out, "rounds per outcome, index", measure(
+        lambda: dict(Round.objects.values_list('outcome').annotate(Count('pk')).order_by()), repeat))
+    # + 0 hides the column from the index, as with the flag columns it replaced
+    report(out, "rounds per outcome, table scan", measure(
+        lambda: dict(Round.objects.annotate(plain=F('outcome') + 0).values_list('plain')
+                     .annotate(Count('pk')).order_by()), repeat))
+    report(out, "Durch rounds, index", measure(
+        lambda: Round.objects.filter(outcome=Outcome.DURCH).count(), repeat))
+
+
+@benchmark('batch')
+def batch_entry(out, games=None, rounds=50, players=3, repeat=5, **options):
+    """Compare entering rounds one POST at a time with one batch POST."""
+    import json
+
+    from django.core.signals import request_started
+    from django.db import reset_queries
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client(HTTP_HOST='localhost')
+    pool = seed_players(players, prefix="Benchmark Player")
+    rng = random.Random(1)
+    entries = []
+    for _ in range(rounds):
+        fields, opponent_points = random_round(rng, pool)
+        flags = Round(outcome=fields['outcome'])
+        entries.append({
+            'game_maker': fields['game_maker'].pk,
+            'bid_amount': fields['bid_amount'],
+            'meld_points': fields['meld_points'],
+            'trick_points': fields['trick_points'],
+            **{flag: True for flag in OUTCOME_FLAGS if getattr(flags, flag)},
+            'opponent_points': {str(player.pk): points for player, points in opponent_points.items()},
+        })
+    out.write(f"{rounds} rounds, {players} players")
+
+    def new_game():
+        game = Game.objects.create(name="Benchmark Game")
+        game.players.set(pool)
+        return game
+
+    def one_by_one():
+        # What round_create costs: a POST and the game page it redirects to
+        game = new_game()
+        for entry in entries:
+            data = {key: value for key, value in entry.items() if key != 'opponent_points'}
+            for player_id, (meld_points, trick_points) in entry['opponent_points'].items():
+                data[f'player_{player_id}_meld_points'] = meld_points
+                data[f'player_{player_id}_trick_points'] = trick_points
+            client.post(reverse('score_tracker:round_create', args=[game.pk]), data)
+            client.get(reverse('score_tracker:game_detail', args=[game.pk]))
+
+    def batch():
+        game = new_game()
+        client.post(reverse('score_tracker:round_batch_create', args=[game.pk]),
+                    json.dumps({'rounds': entries}), content_type='application/json')
+
+    # The test client resets the query log on every request
+    request_started.disconnect(reset_queries)
+    try:
+        report(out, f"{rounds} x round_create + redirect", measure(one_by_one, repeat, setup=reset_queries))
+        report(out, "one batch POST", measure(batch, repeat, setup=reset_queries))
+    finally:
+        request_started.connect(reset_queries)
+
+
+@benchmark('backup')
+def backup_restore(out, games=500, rounds=30, players=3, repeat=3, **options):
+    """Compare the backup and restore commands with dumpdata and loaddata."""
+    import os
+    import tempfile
+
+    from django.core.management import call_command
+
+    from .backup import backup_models, restore_backup, write_backup
+    from .signals import delete_rows
+
+    pool = seed_players(games * players, prefix="Benchmark Player")
+    seed_games(games, pool, players_per_game=players, rounds_per_game=rounds, seed=1)
+    # Score is a view over the rounds and is not dumped separately
+    labels = [model._meta.label_lower for model in backup_models() if not model._meta.auto_created]
+    rows = sum(model._base_manager.count() for model in backup_models())
+    out.write(f"{rows} rows in {len(labels)} tables and the game/player table")
+
+    def clear():
+        # Rolled back afterwards, so nothing needs invalidating
+        for model in reversed(backup_models()):
+            delete_rows(model._base_manager.all())
+
+    with tempfile.TemporaryDirectory() as directory:
+        backup_path = os.path.join(directory, 'binokel.backup.gz')
+        dump_path = os.path.join(directory, 'binokel.json')
+
+        report(out, "backup", measure(lambda: write_backup(backup_path), repeat))
+        report(out, "dumpdata", measure(
+            lambda: call_command('dumpdata', *labels, output=dump_path, verbosity=0), repeat))
+        report(out, "restore", measure(lambda: restore_backup(backup_path), repeat, setup=clear))
+        report(out, "loaddata", measure(lambda: call_command('loaddata', dump_path, verbosity=0),
+                                        repeat, setup=clear))
+        out.write(f"{'backup file':<40} {os.path.getsize(backup_path):>12} bytes")
+        out.write(f"{'dumpdata file (uncompressed)':<40} {os.path.getsize(dump_path):>12} bytes")
+
+
+@benchmark('fuzz')
+def scorer_fuzz(out, games=20, rounds=100, players=4, repeat=5, **options):
+    """Check every scorer against the reference on random games and compare their throughput."""
+    from django.db import reset_queries
+
+    from .fuzzing import SCORERS, compare, fuzz, random_round, reference_scores
+
+    mismatches = fuzz(20, seed=1)
+    out.write(f"{'fuzzed cases':<40} 20   mismatches {len(mismatches)}")
+    for mismatch in mismatches[:10]:
+        out.write(f"  {mismatch}")
+
+    rng = random.Random(2)
+    tournament = Tournament.objects.create(name="Benchmark Fuzz")
+    pool = seed_players(games * players, prefix="Benchmark Player")
+    game_list = []
+    round_objs = []
+    for index in range(games):
+        game = Game.objects.create(name=f"Benchmark Fuzz {index}", tournament=tournament)
+        roster = pool[index * players:(index + 1) * players]
+        game.players.set(roster)
+        game_list.append(game)
+        round_objs += [random_round(rng, game, number, roster) for number in range(1, rounds + 1)]
+    Round.objects.bulk_create(round_objs, batch_size=5000)
+    out.write(f"{games} games, {rounds} rounds each, {players} players per game")
+    out.write(f"{'mismatches on these games':<40} {len(compare(game_list))}")
+
+    for name, scorer in {'reference': reference_scores, **SCORERS}.items():
+        result = measure(lambda: scorer(game_list), repeat, setup=reset_queries)
+        report(out, f"{name:<12} {games * rounds / result[0] * 1000:10.0f} rounds/s", result)
+
+
+@benchmark('snapshots')
+def game_snapshots(out, games=20, rounds=60, players=3, repeat=50, **options):
+    """Compare rendering a completed game with serving its snapshot."""
+    import tempfile
+
+    from django.core.signals import request_started
+    from django.db import reset_queries
+    from django.test import Client, override_settings
+
+    from .snapshots import write_snapshots
+
+    last_pk = Game.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    pool = seed_players(games * players, prefix="Benchmark Player")
+    seed_games(games, pool, players_per_game=players, rounds_per_game=rounds, active_ratio=0, seed=1)
+    game_ids = list(Game.objects.filter(pk__gt=last_pk).values_list('pk', flat=True))
+    path = f'/games/{game_ids[0]}/'
+    client = Client(HTTP_HOST='localhost', HTTP_ACCEPT_ENCODING='gzip')
+    out.write(f"{games} completed games, {rounds} rounds each, {players} players per game")
+
+    def visit():
+        # The test client closes a streamed response once it has been read
+        response = client.get(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+
+    # The test client resets the query log on every request
+    request_started.disconnect(reset_queries)
+    try:
+        with tempfile.TemporaryDirectory() as root, override_settings(SNAPSHOT_ROOT=root):
+            report(out, "game_detail, rendered", measure(visit, repeat, setup=reset_queries))
+            start = time.perf_counter()
+            written = sum(size for _, size in write_snapshots(game_ids, workers=1))
+            elapsed = time.perf_counter() - start
+            out.write(f"{'snapshot_games, 1 process':<40} {games / elapsed:8.1f} games/s   {written} bytes")
+            report(out, "game_detail, snapshot", measure(visit, repeat, setup=reset_queries))
+    finally:
+        request_started.connect(reset_queries)
+
+
+# The per-player fields of the round form as they were rendered before the
+# player_points_fields tag, kept to compare against
+FILTER_POINT_FIELDS = """{% load django_bootstrap5 score_tracker_tags %}
+{% for player in game.roster %}
+<div class="card mb-3"><div class="card-header bg-light"><h6 class="mb-0">{{ player.name }}</h6></div>
+<div class="card-body"><div class="row">
+<div class="col-md-6">{% with field_name="player_"|add:player.id|add:"_meld_points" %}{% with field=form|get_field_by_name:field_name %}{% if field %}{% bootstrap_field field %}{% endif %}{% endwith %}{% endwith %}</div>
+<div class="col-md-6">{% with field_name="player_"|add:player.id|add:"_trick_points" %}{% with field=form|get_field_by_name:field_name %}{% if field %}{% bootstrap_field field %}{% endif %}{% endwith %}{% endwith %}</div>
+</div></div></div>
+{% endfor %}"""
+
+
+@benchmark('round_form')
+def round_form_rendering(out, games=None, rounds=30, players=(3, 4), repeat=200, **options):
+    """Compare the ways of rendering the round form's per-player fields."""
+    from django.conf import settings
+    from django.template import engines
+    from django.test import override_settings
+
+    from .forms import RoundForm
+    from .views import round_create
+
+    players = [players] if isinstance(players, int) else players
+    pool = seed_players(max(players), prefix="Benchmark Player")
+    django_engine = engines['django']
+    filter_fields = django_engine.from_string(FILTER_POINT_FIELDS)
+    tag_fields = django_engine.from_string(
+        "{% load score_tracker_tags %}{% player_points_fields form game.roster %}"
+    )
+    # Every template is read and compiled again on each render
+    uncached = [{
+        **settings.TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {**settings.TEMPLATES[0]['OPTIONS'], 'loaders': [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]},
+    }]
+
+    for count in players:
+        seed_games(1, pool[:count], rounds_per_game=rounds, active_ratio=1, seed=count)
+        game = Game.objects.order_by('-pk').first()
+        path = f'/games/{game.pk}/round/new/'
+        context = {'form': RoundForm(game=game), 'game': game}
+        out.write(f"{count} players, {rounds} rounds")
+        report(out, "  player fields, filters", measure(lambda: filter_fields.render(context), repeat))
+        report(out, "  player fields, inclusion tag", measure(lambda: tag_fields.render(context), repeat))
+        report(out, "  round form page, cached loader", measure(
+            lambda: get_view(round_create, path, pk=game.pk), repeat,
+        ))
+        with override_settings(TEMPLATES=uncached):
+            report(out, "  round form page, uncached loaders", measure(
+                lambda: get_view(round_create, path, pk=game.pk), repeat,
+            ))
+
+
+@benchmark('page_weight')
+def page_weight(out, games=None, rounds=30, players=3, repeat=None, **options):
+    """Report the bytes of every page with its stylesheets and scripts, raw and precompressed."""
+    import os
+    import re
+
+    from django.contrib.staticfiles.storage import staticfiles_storage
+    from django.test import Client
+    from django.urls import reverse
+
+    pool = seed_players(players * 2, prefix="Benchmark Player")
+    tournament = Tournament.objects.create(name="Benchmark Tournament")
+    seed_games(2, pool, players_per_game=players, rounds_per_game=rounds, active_ratio=0.5,
+               tournament=tournament, seed=1)
+    game = tournament.games.filter(is_active=True).first()
+    pages = {
+        'home': reverse('score_tracker:home'),
+        'game_list': reverse('score_tracker:game_list'),
+        'game_form': reverse('score_tracker:game_create'),
+        'game_detail': reverse('score_tracker:game_detail', args=[game.pk]),
+        'round_form': reverse('score_tracker:round_create', args=[game.pk]),
+        'round_batch_form': reverse('score_tracker:round_batch_create', args=[game.pk]),
+        'tournament_list': reverse('score_tracker:tournament_list'),
+        'tournament_detail': reverse('score_tracker:tournament_detail', args=[tournament.pk]),
+    }
+    client = Client(HTTP_HOST='localhost')
+    asset_url = re.compile(r'<(?:link[^>]*\bhref|script[^>]*\bsrc)="([^"]+)"')
+
+    def file_size(path):
+        return os.path.getsize(path) if os.path.exists(path) else None
+
+    out.write(f"{'page':<20} {'html':>8} {'css+js':>8} {'raw':>8} {'gzip':>8} {'brotli':>8}   external")
+    for label, path in pages.items():
+        html = client.get(path).content
+        raw = gzip_size = brotli_size = len(html)
+        assets = 0
+        external = []
+        for url in asset_url.findall(html.decode()):
+            if not url.startswith(staticfiles_storage.base_url):
+                external.append(url)
+                continue
+            asset = staticfiles_storage.path(url[len(staticfiles_storage.base_url):])
+            size = os.path.getsize(asset)
+            assets += size
+            raw += size
+            # What WhiteNoise sends to clients accepting each encoding
+            gzip_size += file_size(asset + '.gz') or size
+            brotli_size += file_size(asset + '.br') or file_size(asset + '.gz') or size
+        out.write(
+            f"{label:<20} {len(html):8d} {assets:8d} {raw:8d} {gzip_size:8d} {brotli_size:8d}   "
+            f"{', '.join(external) or '-'}"
+        )
+
+
+@benchmark('close_stale')
+def close_stale(out, games=2000, rounds=5, players=3, repeat=3, **options):
+    """Compare ending stale games one save at a time with the batched UPDATEs of close_stale_games."""
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from .stale import close_stale_games, stale_games
+
+    last_pk = Game.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    pool = seed_players(games * players, prefix="Benchmark Player")
+    seed_games(games, pool, players_per_game=players, rounds_per_game=rounds, seed=1)
+    seeded = Game.objects.filter(pk__gt=last_pk)
+    # Every other game was abandoned a month ago
+    abandoned = timezone.now() - timedelta(days=30)
+    seeded.filter(pk__in=list(seeded.values_list('pk', flat=True)[::2])).update(start_date=abandoned)
+    Round.objects.filter(game__in=seeded.filter(start_date=abandoned)).update(created_at=abandoned)
+    idle = timedelta(days=7)
+    out.write(f"{games} active games, {rounds} rounds each, {stale_games(timezone.now() - idle).count()} stale")
+
+    def one_by_one():
+        for game in stale_games(timezone.now() - idle):
+            game.end_game()
+
+    def batched():
+        for _ in close_stale_games(idle):
+            pass
+
+    for label, func in (("end_game() per game", one_by_one), ("close_stale_games", batched)):
+        timings = []
+        for _ in range(repeat):
+            # Every run closes the same games
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    func()
+                    timings.append((time.perf_counter() - start) * 1000)
+                transaction.set_rollback(True)
+        report(out, label, (statistics.median(timings), max(timings), len(queries)))
+
+
+@benchmark('search')
+def game_search(out, games=100000, rounds=0, players=3, repeat=5, **options):
+    """Time game searches and paging deep into the results (try --games 1000000)."""
+    import datetime
+
+    from django.utils import timezone
+
+    from .search import get_page, make_cursor, search_games
+
+    pool = seed_players(max(players, games // 200), prefix="Benchmark Player")
+    seed_games(games, pool, players_per_game=players, rounds_per_game=rounds, active_ratio=0.02,
+               seed=1, batch_size=5000)
+    player = pool[len(pool) // 2]
+    partner = next(other for other in Game.objects.filter(players=player).first().roster if other != player)
+    deep = search_games(status='completed')[games // 20]
+    day = (timezone.now() - datetime.timedelta(days=400)).date()
+    out.write(f"{games} games, {len(pool)} players")
+
+    searches = {
+        "newest games": ({}, None),
+        f"completed, {games // 20} games deep": ({'status': 'completed'}, make_cursor(deep)),
+        "active": ({'status': 'active'}, None),
+        "one player": ({'players': [player.name]}, None),
+        "two players": ({'players': [player.name, partner.name]}, None),
+        "one month": ({'date_from': day, 'date_to': day + datetime.timedelta(days=30)}, None),
+        "one player, one year, completed": (
+            {'players': [player.name], 'date_from': day, 'date_to': day + datetime.timedelta(days=365),
+             'status': 'completed'},
+            None,
+        ),
+    }
+    for label, (filters, cursor) in searches.items():
+        report(out, label, measure(lambda: get_page(search_games(**filters), cursor=cursor), repeat))
+
+
+@benchmark('timeline')
+def score_timeline(out, games=None, rounds=3000, players=4, repeat=20, **options):
+    """Compute the score chart of a long game, raw and downsampled, cold and cached."""
+    import json
+
+    from .timeline import MAX_POINTS, get_score_timeline, score_timeline
+
+    pool = seed_players(players, prefix="Benchmark Player")
+    seed_games(1, pool, players_per_game=players, rounds_per_game=rounds, seed=1)
+    game = Game.objects.filter(players=pool[0]).get()
+    out.write(f"1 game, {rounds} rounds, {players} players")
+
+    for label, points in (("every round", rounds + 1), (f"downsampled to {MAX_POINTS}", MAX_POINTS)):
+        timeline = score_timeline(game, max_points=points)
+        size = len(json.dumps(timeline, separators=(',', ':')))
+        report(out, f"{label}, computed", measure(lambda: score_timeline(game, max_points=points), repeat))
+        crossings = sum(len(player['crossings']) for player in timeline['players'])
+        out.write(f"{'':<40} {len(timeline['rounds'])} points, {crossings} crossings, {size} bytes of JSON")
+    cache.clear()
+    get_score_timeline(game)
+    report(out, f"downsampled to {MAX_POINTS}, cached", measure(lambda: get_score_timeline(game), repeat))
+
+
+@benchmark('head_to_head')
+def head_to_head(out, games=2000, rounds=20, players=4, repeat=5, **options):
+    """Compare computing a head-to-head matrix from the games with reading the kept statistics."""
+    from .headtohead import _tally, head_to_head_matrix, rebuild_pair_stats
+
+    pool = seed_players(12, prefix="Benchmark Player")
+    seed_games(games, pool, players_per_game=players, rounds_per_game=rounds, active_ratio=0, seed=1)
+    completed = Game.objects.filter(is_active=False, players__in=pool).distinct()
+    out.write(f"{games} completed games, {rounds} rounds each, {len(pool)} players")
+    report(out, "rebuild_pair_stats", measure(rebuild_pair_stats, repeat))
+    # Without the table the page has to score every game the players shared
+    report(out, "matrix, computed", measure(lambda: _tally(list(completed)), repeat))
+    report(out, "matrix, from table", measure(lambda: head_to_head_matrix(pool), repeat))
+
+    seed_games(1, pool, players_per_game=players, rounds_per_game=rounds, seed=2)
+    game = Game.objects.filter(is_active=True, players__in=pool).distinct().get()
+
+    def reopen():
+        Game.objects.filter(pk=game.pk).update(is_active=True)
+        game.is_active = True
+
+    report(out, "end_game", measure(game.end_game, repeat, setup=reopen))
@@ -0,0 +1,42 @@
+"""Database and table size measurements for SQLite and PostgreSQL."""
+from django.db import connection
+
+
+def database_size():
+    """Bytes used by the current database (free SQLite pages not counted)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT pg_database_size(current_database())")
+            return cursor.fetchone()[0]
+        if connection.vendor == 'sqlite':
+            cursor.execute("PRAGMA page_count")
+            page_count = cursor.fetchone()[0]
+            cursor.execute("PRAGMA freelist_count")
+            free_pages = cursor.fetchone()[0]
+            cursor.execute("PRAGMA page_size")
+            return (page_count - free_pages) * cursor.fetchone()[0]
+    return None
+
+
+def table_sizes(tables):
+    """
+    Return {table: bytes} including the table's indexes.
+
+    Returns None for databases without size statistics.
+    """
+    sizes = {}
+    with connection.cursor() as cursor:
+        for table in tables:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            elif connection.vendor == 'sqlite':
+                # dbstat lists every b-tree page; indexes are matched by table name
+                cursor.execute(
+                    "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE tbl_name = %s)",
+                    [table],
+                )
+            else:
+                return None
+            sizes[table] = cursor.fetchone()[0]
+    return sizes
@@ -1,13 +1,14 @@
 from django import forms
 from django.forms import inlineformset_factory
-from .models import Game, Round, Player, Score
+from django.forms.models import ModelChoiceIterator
+from .models import OUTCOME_FLAGS, Game, Round, Player, Score, outcome_from_flags
 
 
 class GameForm(forms.ModelForm):
     """Form for creating a new game."""
     class Meta:
         model = Game
-        fields = ['name']
+        fields = ['name', 'tournament']
 
 
 class PlayerForm(forms.ModelForm):
@@ -36,30 +37,126 @@ PlayerFormSet = forms.formset_factory(
 )
 
 
+class PlayerNamesField(forms.CharField):
+    """Comma-separated player names, cleaned to a list of names that exist."""
+
+    def to_python(self, value):
+        names = dict.fromkeys(name.strip() for name in super().to_python(value).split(','))
+        return [name for name in names if name]
+
+    def validate(self, value):
+        super().validate(value)
+        known = set(Player.objects.filter(name__in=value).values_list('name', flat=True))
+        unknown = [name for name in value if name not in known]
+        if unknown:
+            raise forms.ValidationError(f"No player named {', '.join(unknown)}.")
+
+
+class GameSearchForm(forms.Form):
+    """Filters of the game search; every field is optional."""
+    STATUS_CHOICES = [('', "Any"), ('active', "Active"), ('completed', "Completed")]
+
+    players = PlayerNamesField(
+        required=False,
+        help_text="Comma-separated names; games all of them took part in.",
+    )
+    date_from = forms.DateField(
+        label="Played from", required=False, widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    date_to = forms.DateField(
+        label="Played until", required=False, widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    status = forms.ChoiceField(choices=STATUS_CHOICES, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("The start of the date range must not be after its end.")
+        cleaned_data['status'] = cleaned_data.get('status') or None
+        return cleaned_data
+
+
+class HeadToHeadForm(forms.Form):
+    """Players to compare in the head-to-head matrix."""
+    players = PlayerNamesField(help_text="Comma-separated names.")
+
+
+class RosterChoiceIterator(ModelChoiceIterator):
+    """Choices from the field's roster instead of a query."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for player in self.field.roster:
+            yield self.choice(player)
+
+    def __len__(self):
+        return len(self.field.roster) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.roster)
+
+
+class RosterChoiceField(forms.ModelChoiceField):
+    """Player choice limited to a game's roster, resolved without queries."""
+    iterator = RosterChoiceIterator
+
+    def __init__(self, roster, **kwargs):
+        self.roster = roster
+        queryset = Player.objects.filter(pk__in=[player.pk for player in roster])
+        super().__init__(queryset, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        value = getattr(value, 'pk', value)
+        for player in self.roster:
+            if str(player.pk) == str(value):
+                return player
+        raise forms.ValidationError(
+            self.error_messages['invalid_choice'],
+            code='invalid_choice',
+            params={'value': value},
+        )
+
+
 class RoundForm(forms.ModelForm):
     """Form for creating a new round."""
+    # The outcome is entered as checkboxes and stored as Round.outcome
+    is_success = forms.BooleanField(required=False, widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
+    is_abgehen = forms.BooleanField(required=False, widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
+    is_durch = forms.BooleanField(required=False, widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
+    is_doppelt_abgehen = forms.BooleanField(required=False, widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
+
     class Meta:
         model = Round
         fields = [
             'game_maker', 'bid_amount', 'is_success', 'is_abgehen', 'is_durch', 'is_doppelt_abgehen',
             'meld_points', 'trick_points', 'last_trick_winner'
         ]
-        widgets = {
-            'is_success': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
-            'is_abgehen': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
-            'is_durch': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
-            'is_doppelt_abgehen': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
-        }
     
     def __init__(self, *args, **kwargs):
         self.game = kwargs.pop('game', None)
         super().__init__(*args, **kwargs)
         
+        if self.instance.pk:
+            for flag in OUTCOME_FLAGS:
+                self.initial.setdefault(flag, getattr(self.instance, flag))
+        
         if self.game:
             # Limit player choices to players in this game
-            players = self.game.players.all()
-            self.fields['game_maker'].queryset = players
-            self.fields['last_trick_winner'].queryset = players
+            players = self.game.roster
+            for name in ('game_maker', 'last_trick_winner'):
+                field = self.fields[name]
+                self.fields[name] = RosterChoiceField(
+                    players,
+                    required=field.required,
+                    label=field.label,
+                    help_text=field.help_text,
+                    empty_label=field.empty_label,
+                )
             
             # Add fields for each player's meld points and trick points
             for player in players:
@@ -78,6 +175,13 @@ class RoundForm(forms.ModelForm):
                     widget=forms.NumberInput(attrs={'class': 'form-control'})
                 )
 
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        if self.game:
+            # RosterChoiceField already resolved these to existing players
+            exclude |= {'game_maker', 'last_trick_winner'}
+        return exclude
+
     def clean(self):
         """Custom validation for the entire form."""
         cleaned_data = super().clean()
@@ -94,7 +198,7 @@ class RoundForm(forms.ModelForm):
         total_trick_points += game_maker_trick_points
         
         # Add other players' trick points (excluding game maker)
-        for player in self.game.players.all():
+        for player in self.game.roster:
             if game_maker_id and player.id != game_maker_id.id:
                 player_trick_points = cleaned_data.get(f'player_{player.id}_trick_points', 0) or 0
                 total_trick_points += player_trick_points
@@ -105,4 +209,51 @@ class RoundForm(forms.ModelForm):
                 f"In Binokel, there are exactly 250 trick points per round."
             )
         
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+    def save(self, commit=True):
+        round_obj = super().save(commit=False)
+        round_obj.outcome = outcome_from_flags(**{flag: self.cleaned_data.get(flag) for flag in OUTCOME_FLAGS})
+        if self.game:
+            # Store the points of all players except the game maker
+            for player in self.game.roster:
+                if player.id != round_obj.game_maker_id:
+                    round_obj.set_opponent_points(
+                        player.id,
+                        self.cleaned_data.get(f'player_{player.id}_meld_points') or 0,
+                        self.cleaned_data.get(f'player_{player.id}_trick_points') or 0,
+                    )
+        if commit:
+            round_obj.save()
+        return round_obj
+
+
+# Rounds transcribed from paper are entered in one submit
+BATCH_ROWS = 10
+MAX_BATCH_ROUNDS = 100
+
+
+class BaseRoundBatchFormSet(forms.BaseFormSet):
+    """Formset of rounds; rows left blank are ignored."""
+
+    @property
+    def filled_forms(self):
+        return [form for form in self.forms if form.has_changed()]
+
+    def clean(self):
+        if any(self.errors):
+            return
+        if not self.filled_forms:
+            raise forms.ValidationError("Enter at least one round.")
+
+
+def round_batch_formset(rows=BATCH_ROWS):
+    """Return a formset class for entering several rounds at once."""
+    return forms.formset_factory(
+        RoundForm,
+        formset=BaseRoundBatchFormSet,
+        extra=rows,
+        max_num=MAX_BATCH_ROUNDS,
+        absolute_max=MAX_BATCH_ROUNDS,
+        validate_max=True,
+    )
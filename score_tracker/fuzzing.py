@@ -0,0 +1,171 @@
+"""
+Differential fuzzing of the scoring implementations.
+
+Random games are written to the database and scored by every implementation
+in SCORERS; each result is compared with Game.get_current_score, the
+reference. The games are drawn to hit the rules that are easy to get wrong:
+every combination of outcome flags (including the ones that fall back to
+doppelt abgehen), meld and trick points counted on failed rounds, missing
+opponent points, negative running scores and bids large enough to cross
+1000 twice in one round.
+
+The caller owns the transaction; run the harness inside one that is rolled
+back, as the tests and the 'fuzz' benchmark do.
+"""
+import random
+
+from .archive import pack_game, unpack_rounds
+from .models import OUTCOME_FLAGS, Game, Round, Tournament, outcome_from_flags
+from .scoring import (
+    apply_round, get_tournament_standings, invalidate_tournament_standings, python_standings, sql_standings,
+)
+from .seeding import seed_players
+from .timeline import score_timeline
+
+
+def _scores(standings):
+    """{player_id: (score, rounds_won)} from a get_current_score() style result."""
+    return {player_id: (data['score'], data['rounds_won']) for player_id, data in standings.items()}
+
+
+def reference_scores(games):
+    return {game.pk: _scores(game.get_current_score()) for game in games}
+
+
+def python_scores(games):
+    return {game_id: _scores(standings) for game_id, standings in python_standings(games).items()}
+
+
+def sql_scores(games):
+    return {game_id: _scores(standings) for game_id, standings in sql_standings(games).items()}
+
+
+def tournament_scores(games):
+    # The incremental path is only taken when the cache is already warm
+    results = {}
+    for tournament in Tournament.objects.filter(games__in=games).distinct():
+        for game_id, table in get_tournament_standings(tournament).items():
+            results[game_id] = _scores(table['scores'])
+    return {game.pk: results[game.pk] for game in games}
+
+
+def archive_scores(games):
+    # Replays the archive blob of every game without storing it
+    results = {}
+    for game in Game.objects.filter(pk__in=[game.pk for game in games]).prefetch_related('players'):
+        game.archive = pack_game(game)
+        state = {player.id: [0, 0] for player in game.players.all()}
+        for round_obj in unpack_rounds(game):
+            opponent_points = {
+                int(player_id): meld_points + trick_points
+                for player_id, (meld_points, trick_points) in round_obj.opponent_points.items()
+            }
+            apply_round(state, {
+                'game_maker_id': round_obj.game_maker_id,
+                'bid_amount': round_obj.bid_amount,
+                'outcome': round_obj.outcome,
+                'meld_points': round_obj.meld_points,
+                'trick_points': round_obj.trick_points,
+            }, opponent_points)
+        results[game.pk] = {player_id: tuple(value) for player_id, value in state.items()}
+    return results
+
+
+def timeline_scores(games):
+    # The chart's last point must show the final standings
+    results = {}
+    for game in Game.objects.filter(pk__in=[game.pk for game in games]).prefetch_related('players'):
+        results[game.pk] = {
+            player['id']: (player['scores'][-1], player['rounds_won'][-1])
+            for player in score_timeline(game)['players']
+        }
+    return results
+
+
+SCORERS = {
+    'python': python_scores,
+    'sql': sql_scores,
+    'tournament': tournament_scores,
+    'archive': archive_scores,
+    'timeline': timeline_scores,
+}
+
+
+def random_round(rng, game, round_number, roster):
+    """Return an unsaved round drawn to exercise the scoring edge cases."""
+    game_maker = rng.choice(roster)
+    flags = {flag: rng.random() < 0.4 for flag in OUTCOME_FLAGS}
+    if rng.random() < 0.15:
+        # Big enough to cross 1000 twice, or to sink deep below zero
+        bid_amount = rng.randrange(1000, 2600, 10)
+    else:
+        bid_amount = rng.randrange(150, 410, 10)
+    round_obj = Round(
+        game=game,
+        round_number=round_number,
+        game_maker=game_maker,
+        bid_amount=bid_amount,
+        outcome=outcome_from_flags(**flags),
+        # Counted on failed rounds as well
+        meld_points=rng.randrange(0, 300, 10),
+        trick_points=rng.randint(0, 250),
+    )
+    for player in roster:
+        if player != game_maker and rng.random() < 0.9:
+            round_obj.set_opponent_points(player.id, rng.randrange(0, 300, 10), rng.randint(0, 250))
+    return round_obj
+
+
+def compare(games, scorers=None):
+    """
+    Score games with every scorer and return the differences to the reference.
+
+    Returns a list of human readable mismatches, empty if all scorers agree.
+    """
+    scorers = SCORERS if scorers is None else scorers
+    expected = reference_scores(games)
+    mismatches = []
+    for name, scorer in scorers.items():
+        actual = scorer(games)
+        for game in games:
+            if actual.get(game.pk) != expected[game.pk]:
+                mismatches.append(
+                    f"{name}: game {game.pk} expected {expected[game.pk]}, got {actual.get(game.pk)}"
+                )
+    return mismatches
+
+
+def fuzz(cases, seed=0, games_per_case=3, max_rounds=40, scorers=None):
+    """
+    Generate cases tournaments of random games and compare all scorers.
+
+    Every case is checked twice: after the first part of its rounds and again
+    after the rest, so cached scorers are checked on their incremental path.
+    Returns the list of mismatches, each prefixed with the seed of its case.
+    """
+    mismatches = []
+    for case in range(cases):
+        case_seed = f"{seed}:{case}"
+        rng = random.Random(case_seed)
+        tournament = Tournament.objects.create(name=f"Fuzz {case_seed}")
+        # Primary keys come back after a rollback; never start from stale cached standings
+        invalidate_tournament_standings(tournament.pk)
+        players = seed_players(rng.randint(3, 4) * games_per_case, prefix=f"Fuzz {case_seed}")
+        games = []
+        rounds = []
+        for index in range(games_per_case):
+            game = Game.objects.create(name=f"Fuzz {case_seed}/{index}", tournament=tournament)
+            roster = rng.sample(players, rng.randint(3, 4))
+            game.players.set(roster)
+            games.append(game)
+            rounds.append([
+                random_round(rng, game, number, roster)
+                for number in range(1, rng.randint(0, max_rounds) + 1)
+            ])
+
+        split = [rng.randint(0, len(game_rounds)) for game_rounds in rounds]
+        Round.objects.bulk_create([r for game_rounds, cut in zip(rounds, split) for r in game_rounds[:cut]])
+        mismatches += [f"[{case_seed}] {mismatch}" for mismatch in compare(games, scorers)]
+        Round.objects.bulk_create([r for game_rounds, cut in zip(rounds, split) for r in game_rounds[cut:]])
+        mismatches += [f"[{case_seed}] {mismatch}" for mismatch in compare(games, scorers)]
+    return mismatches
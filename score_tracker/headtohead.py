@@ -0,0 +1,159 @@
+"""
+Head-to-head statistics between players.
+
+For every two players who finished a game together, PlayerPairStats keeps
+the number of shared games, the games each finished ahead of the other
+(by rounds won, then score, as get_leader ranks them) and the summed
+difference of their points (rounds won * 1000 + score).
+
+record_games adds games as they end, with a fixed number of queries per
+batch of games. rebuild_pair_stats recounts everything from the completed
+games, reading them chunk by chunk, for after completed games were edited
+or deleted.
+"""
+from collections import defaultdict
+from itertools import permutations
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Game, PlayerPairStats
+from .scoring import ROUND_WIN_POINTS, get_standings_for_games
+
+CHUNK_SIZE = 500
+# In the order _tally adds them up
+STAT_COLUMNS = ('games', 'wins', 'losses', 'points_difference')
+# Pairs per UPDATE, to keep the CASE expressions small
+UPDATE_CHUNK_SIZE = 100
+
+
+def pair_results(standings):
+    """
+    Yield (player id, opponent id, won, lost, points difference) for every
+    ordered pair of players in a get_current_score() style result.
+    """
+    rank = {
+        player_id: (data['rounds_won'], data['score'])
+        for player_id, data in standings.items()
+    }
+    for player_id, opponent_id in permutations(standings, 2):
+        player, opponent = standings[player_id], standings[opponent_id]
+        difference = (
+            (player['rounds_won'] - opponent['rounds_won']) * ROUND_WIN_POINTS
+            + player['score'] - opponent['score']
+        )
+        yield (
+            player_id, opponent_id,
+            int(rank[player_id] > rank[opponent_id]), int(rank[player_id] < rank[opponent_id]),
+            difference,
+        )
+
+
+def _tally(games, totals=None):
+    """Add up the pair results of games into totals: {(player, opponent): [games, wins, losses, difference]}."""
+    totals = defaultdict(lambda: [0, 0, 0, 0]) if totals is None else totals
+    for standings in get_standings_for_games(games).values():
+        for player_id, opponent_id, won, lost, difference in pair_results(standings):
+            total = totals[player_id, opponent_id]
+            total[0] += 1
+            total[1] += won
+            total[2] += lost
+            total[3] += difference
+    return totals
+
+
+def _increment(column, pks_by_value):
+    """F(column) plus the value of the row's pk in pks_by_value ({value: [pk]}), or plus nothing."""
+    whens = [When(pk__in=pks, then=Value(value)) for value, pks in pks_by_value.items() if value]
+    if not whens:
+        return F(column)
+    return F(column) + Case(*whens, default=Value(0), output_field=IntegerField())
+
+
+def record_games(games):
+    """
+    Add completed games to the head-to-head statistics.
+
+    Call this once per game, when it ends. Missing rows are inserted and all
+    pairs are then updated in place with one UPDATE per UPDATE_CHUNK_SIZE
+    pairs, so concurrent callers add up instead of overwriting each other.
+    """
+    totals = _tally(games)
+    if not totals:
+        return
+    player_ids = {player_id for player_id, _ in totals}
+    with transaction.atomic():
+        PlayerPairStats.objects.bulk_create(
+            [PlayerPairStats(player_id=player_id, opponent_id=opponent_id) for player_id, opponent_id in totals],
+            ignore_conflicts=True,
+        )
+        rows = PlayerPairStats.objects.filter(player_id__in=player_ids, opponent_id__in=player_ids)
+        pks = {
+            (player_id, opponent_id): pk
+            for pk, player_id, opponent_id in rows.values_list('pk', 'player_id', 'opponent_id')
+            if (player_id, opponent_id) in totals
+        }
+        pairs = list(totals.items())
+        for start in range(0, len(pairs), UPDATE_CHUNK_SIZE):
+            chunk = pairs[start:start + UPDATE_CHUNK_SIZE]
+            # Pairs mostly share their increments (one game, no or one win),
+            # so grouping them by value keeps the CASE expressions short
+            pks_by_value = [defaultdict(list) for _ in STAT_COLUMNS]
+            for pair, total in chunk:
+                for index, value in enumerate(total):
+                    pks_by_value[index][value].append(pks[pair])
+            PlayerPairStats.objects.filter(pk__in=[pks[pair] for pair, _ in chunk]).update(**{
+                column: _increment(column, pks_by_value[index]) for index, column in enumerate(STAT_COLUMNS)
+            })
+
+
+def rebuild_pair_stats(chunk_size=CHUNK_SIZE):
+    """
+    Recount the head-to-head statistics from all completed games.
+
+    Games are scored chunk_size at a time; only the per-pair totals are kept
+    in memory. The table is replaced in one transaction. Returns (games
+    counted, pairs written).
+    """
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    counted = 0
+    last_pk = 0
+    completed = Game.objects.filter(is_active=False).order_by('pk')
+    while True:
+        games = list(completed.filter(pk__gt=last_pk)[:chunk_size])
+        if not games:
+            break
+        _tally(games, totals)
+        counted += len(games)
+        last_pk = games[-1].pk
+
+    with transaction.atomic():
+        PlayerPairStats.objects.all().delete()
+        PlayerPairStats.objects.bulk_create(
+            [
+                PlayerPairStats(
+                    player_id=player_id, opponent_id=opponent_id,
+                    games=games, wins=wins, losses=losses, points_difference=difference,
+                )
+                for (player_id, opponent_id), (games, wins, losses, difference) in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return counted, len(totals)
+
+
+def head_to_head_matrix(players):
+    """
+    Return [(player, [PlayerPairStats or None per player])] for players, from one query.
+
+    The diagonal and pairs that never finished a game together are None.
+    """
+    ids = [player.pk for player in players]
+    stats = {
+        (row.player_id, row.opponent_id): row
+        for row in PlayerPairStats.objects.filter(player_id__in=ids, opponent_id__in=ids)
+    }
+    return [
+        (player, [stats.get((player.pk, opponent.pk)) for opponent in players])
+        for player in players
+    ]
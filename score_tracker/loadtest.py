@@ -0,0 +1,228 @@
+"""
+Load generator for a running server.
+
+Every simulated table is a thread with its own cookies, playing a session
+the way a table does: create a game with game_create, then per round load
+the round form, submit it with its CSRF token and poll game_detail the way
+the other phones at the table would. Only the standard library is used, so
+the generator runs from any machine that can reach the server, against any
+database the server is configured with.
+
+Each request is timed on its own; redirects are not followed.
+"""
+import http.cookiejar
+import math
+import random
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Paths of score_tracker.urls, kept literal so the generator needs no Django settings
+GAME_CREATE_PATH = '/games/new/'
+ROUND_CREATE_PATH = '/games/{}/round/new/'
+GAME_DETAIL_PATH = '/games/{}/'
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+PLAYER_FIELD = re.compile(r'name="player_(\d+)_meld_points"')
+GAME_URL = re.compile(r'/games/(\d+)/$')
+TRICK_POINTS = 250
+REQUEST_TIMEOUT = 30
+
+
+class LoadTestError(Exception):
+    """Raised when a response cannot be used to continue a session."""
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Recorder:
+    """Collects latencies and errors of all tables, per kind of request."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.messages = []
+
+    def add(self, label, seconds, error=None):
+        with self.lock:
+            self.latencies.setdefault(label, []).append(seconds)
+            self.errors.setdefault(label, 0)
+            if error is not None:
+                self.errors[label] += 1
+                if len(self.messages) < 10:
+                    self.messages.append(f"{label}: {error}")
+
+
+class Session:
+    """One table's browser: keeps cookies and times every request."""
+
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect,
+        )
+
+    def request(self, label, path, data=None, expect=None):
+        """
+        Return (status, body, Location header) of one GET, or POST if data is given.
+
+        Error statuses, and any status but expect if it is given, count as errors.
+        """
+        body = None if data is None else urllib.parse.urlencode(data).encode()
+        request = urllib.request.Request(self.base_url + path, data=body)
+        start = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=REQUEST_TIMEOUT) as response:
+                status, content, location = response.status, response.read(), None
+        except urllib.error.HTTPError as response:
+            status, content, location = response.code, response.read(), response.headers.get('Location')
+        except (urllib.error.URLError, OSError) as error:
+            self.recorder.add(label, time.perf_counter() - start, error=error)
+            raise LoadTestError(f"{label}: {error}") from error
+        elapsed = time.perf_counter() - start
+        if status >= 400 or expect not in (None, status):
+            self.recorder.add(label, elapsed, error=f"HTTP {status}")
+            raise LoadTestError(f"{label}: HTTP {status}")
+        self.recorder.add(label, elapsed)
+        return status, content.decode(), location
+
+    def form(self, label, path):
+        """GET a form page and return (its HTML, its CSRF token)."""
+        _, html, _ = self.request(label, path)
+        match = CSRF_TOKEN.search(html)
+        if match is None:
+            raise LoadTestError(f"{label}: no CSRF token in {path}")
+        return html, match.group(1)
+
+
+def round_data(rng, player_ids):
+    """Valid round form data: a random game maker, bid and split of the 250 trick points."""
+    game_maker = rng.choice(player_ids)
+    cuts = sorted(rng.randint(0, TRICK_POINTS) for _ in range(len(player_ids) - 1))
+    tricks = [high - low for low, high in zip([0] + cuts, cuts + [TRICK_POINTS])]
+    data = {
+        'game_maker': game_maker,
+        'bid_amount': rng.randrange(150, 410, 10),
+        'meld_points': rng.randrange(0, 200, 10),
+        'trick_points': tricks[0],
+        'last_trick_winner': rng.choice(player_ids),
+    }
+    if rng.random() < 0.7:
+        data['is_success'] = 'on'
+    opponents = [player_id for player_id in player_ids if player_id != game_maker]
+    for player_id, trick_points in zip(opponents, tricks[1:]):
+        data[f'player_{player_id}_meld_points'] = rng.randrange(0, 200, 10)
+        data[f'player_{player_id}_trick_points'] = trick_points
+    return data
+
+
+def play_table(base_url, table, recorder, rounds=20, polls=1, think_time=0.0, seed=0):
+    """Play one table's session. Returns the number of rounds entered."""
+    rng = random.Random(f"{seed}:{table}")
+    session = Session(base_url, recorder)
+    path = GAME_CREATE_PATH
+    _, token = session.form('game_create GET', path)
+    players = rng.choice([3, 4])
+    data = {
+        'csrfmiddlewaretoken': token,
+        'name': f"Load test table {table}",
+        'players-TOTAL_FORMS': players,
+        'players-INITIAL_FORMS': 0,
+        'players-MIN_NUM_FORMS': 3,
+        'players-MAX_NUM_FORMS': 1000,
+    }
+    for index in range(players):
+        data[f'players-{index}-name'] = f"Load {seed} table {table} player {index + 1}"
+    _, _, location = session.request('game_create POST', path, data, expect=302)
+    match = GAME_URL.search(location or '')
+    if match is None:
+        raise LoadTestError(f"table {table}: redirected to {location} instead of the new game")
+    game_id = int(match.group(1))
+
+    round_path = ROUND_CREATE_PATH.format(game_id)
+    detail_path = GAME_DETAIL_PATH.format(game_id)
+    entered = 0
+    for _ in range(rounds):
+        # A failed request is recorded and the table goes on with the next round
+        try:
+            html, token = session.form('round_create GET', round_path)
+            player_ids = [int(player_id) for player_id in PLAYER_FIELD.findall(html)]
+            # A form coming back with errors answers 200 instead of redirecting
+            session.request(
+                'round_create POST', round_path, {'csrfmiddlewaretoken': token, **round_data(rng, player_ids)},
+                expect=302,
+            )
+            entered += 1
+            for _ in range(polls):
+                if think_time:
+                    time.sleep(rng.uniform(0, 2 * think_time))
+                session.request('game_detail GET', detail_path)
+        except LoadTestError:
+            continue
+    return entered
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a sorted list."""
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def run_load(base_url, tables=10, rounds=20, polls=1, think_time=0.0, seed=0):
+    """
+    Play tables sessions at once against the server at base_url.
+
+    Returns a report: {'elapsed': seconds, 'tables': tables that got a game,
+    'rounds': rounds entered, 'requests': {label: stats}, 'total': stats,
+    'errors': the first error messages}, where
+    stats hold count, errors, rate (per second) and p50/p90/p99/max in ms.
+    """
+    recorder = Recorder()
+    start = time.perf_counter()
+    finished = entered = 0
+    with ThreadPoolExecutor(max_workers=tables) as executor:
+        futures = [
+            executor.submit(play_table, base_url, table, recorder, rounds, polls, think_time, seed)
+            for table in range(1, tables + 1)
+        ]
+        for future in futures:
+            try:
+                entered += future.result()
+                finished += 1
+            except LoadTestError:
+                pass
+    elapsed = time.perf_counter() - start
+
+    def stats(latencies, errors):
+        latencies = sorted(latency * 1000 for latency in latencies)
+        return {
+            'count': len(latencies),
+            'errors': errors,
+            'rate': len(latencies) / elapsed,
+            'mean': statistics.fmean(latencies) if latencies else 0,
+            **{f'p{p}': percentile(latencies, p) if latencies else 0 for p in (50, 90, 99)},
+            'max': latencies[-1] if latencies else 0,
+        }
+
+    return {
+        'elapsed': elapsed,
+        'tables': finished,
+        'rounds': entered,
+        'requests': {
+            label: stats(recorder.latencies[label], recorder.errors[label])
+            for label in sorted(recorder.latencies)
+        },
+        'total': stats(
+            [latency for latencies in recorder.latencies.values() for latency in latencies],
+            sum(recorder.errors.values()),
+        ),
+        'errors': recorder.messages,
+    }
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from score_tracker.archive import archivable_games, archive_game
+from score_tracker.dbstats import database_size
+from score_tracker.models import Round, Score
+
+
+class Command(BaseCommand):
+    help = "Pack the rounds and scores of completed games into compact archives."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--game', type=int, action='append', dest='games',
+                            help="Archive only this game (repeatable)")
+        parser.add_argument('--limit', type=int, default=None, help="Archive at most this many games")
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be archived")
+
+    def handle(self, *args, **options):
+        games = archivable_games()
+        if options['games']:
+            games = games.filter(pk__in=options['games'])
+        if options['limit']:
+            games = games[:options['limit']]
+
+        if options['dry_run']:
+            self.stdout.write(f"{games.count()} completed games would be archived.")
+            return
+
+        size_before = database_size()
+        rows = 0
+        archived = 0
+        archive_bytes = 0
+        for game in games.iterator():
+            rows += Round.objects.filter(game=game).count() + Score.objects.filter(round__game=game).count()
+            archive_bytes += archive_game(game)
+            archived += 1
+        size_after = database_size()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} games: {rows} Round/Score rows packed into {archive_bytes} bytes."
+        ))
+        if size_before is not None:
+            self.stdout.write(
+                f"Database size: {size_before} -> {size_after} bytes in use "
+                f"(run VACUUM to return freed pages to the file system)."
+            )
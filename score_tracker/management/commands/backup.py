@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from score_tracker.backup import write_backup
+
+
+class Command(BaseCommand):
+    help = "Write all score tracker data to a compressed backup file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Backup file to write, e.g. binokel.backup.gz")
+
+    def handle(self, *args, **options):
+        counts = write_backup(options['path'])
+        for label, count in counts.items():
+            self.stdout.write(f"{label:<40} {count:>10} rows")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {sum(counts.values())} rows to {options['path']}."))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from score_tracker.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Run a performance benchmark against throw-away seeded data."
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help="Benchmark to run (omit to list them)")
+        # Left out options fall back to the benchmark's own defaults
+        parser.add_argument('--games', type=int)
+        parser.add_argument('--rounds', type=int)
+        parser.add_argument('--players', type=int)
+        parser.add_argument('--repeat', type=int)
+        parser.add_argument('--threads', type=int)
+
+    def handle(self, *args, name=None, **options):
+        if name is None:
+            for benchmark_name, func in sorted(BENCHMARKS.items()):
+                self.stdout.write(f"{benchmark_name:<20} {func.__doc__.strip()}")
+            return
+        if name not in BENCHMARKS:
+            raise CommandError(f"Unknown benchmark '{name}'. Choose from: {', '.join(sorted(BENCHMARKS))}")
+
+        sizes = {
+            option: options[option]
+            for option in ('games', 'rounds', 'players', 'repeat', 'threads')
+            if options[option] is not None
+        }
+        benchmark = BENCHMARKS[name]
+        if not benchmark.rollback:
+            benchmark(self.stdout, **sizes)
+            return
+        # Seeded rows are rolled back once the benchmark is done
+        with transaction.atomic():
+            benchmark(self.stdout, **sizes)
+            transaction.set_rollback(True)
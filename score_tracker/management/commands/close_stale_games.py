@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from score_tracker.snapshots import write_snapshots
+from score_tracker.stale import BATCH_SIZE, close_stale_games, stale_games
+
+
+class Command(BaseCommand):
+    help = "End active games that have not had a new round for a while."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=7,
+                            help="Close games without a new round for this many days (default: 7)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f"Games closed per UPDATE (default: {BATCH_SIZE})")
+        parser.add_argument('--snapshot', action='store_true',
+                            help="Pre-render the pages of the closed games, as ending a game does")
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be closed")
+
+    def handle(self, *args, days, batch_size, snapshot, dry_run, **options):
+        if days <= 0 or batch_size < 1:
+            raise CommandError("--days and --batch-size must be positive.")
+        idle = timedelta(days=days)
+
+        if dry_run:
+            count = stale_games(timezone.now() - idle).count()
+            self.stdout.write(f"{count} games without a new round for {days:g} days would be closed.")
+            return
+
+        closed = []
+        for game_ids in close_stale_games(idle, batch_size=batch_size):
+            closed += game_ids
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Closed {len(closed)} games so far.")
+        if snapshot:
+            for _ in write_snapshots(closed):
+                pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {len(closed)} games without a new round for {days:g} days."
+        ))
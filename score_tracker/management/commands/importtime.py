@@ -0,0 +1,39 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from score_tracker.startup import TARGETS, by_package, profile_startup
+
+
+class Command(BaseCommand):
+    help = "Profile the cold start of a worker or manage.py under one or more settings modules."
+
+    def add_arguments(self, parser):
+        parser.add_argument('settings_modules', nargs='*', metavar='settings_module',
+                            help="Settings modules to compare (default: the current one)")
+        parser.add_argument('--target', choices=sorted(TARGETS), default='wsgi',
+                            help="wsgi: a worker importing the application; setup: django.setup() only")
+        parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters timed per settings module")
+        parser.add_argument('--top', type=int, default=15, help="Modules and packages to list")
+
+    def handle(self, *args, settings_modules, target, repeat, top, **options):
+        settings_modules = settings_modules or [os.environ['DJANGO_SETTINGS_MODULE']]
+        for settings_module in settings_modules:
+            try:
+                profile = profile_startup(settings_module, target=target, repeat=repeat)
+            except RuntimeError as error:
+                raise CommandError(str(error))
+            imports = profile['imports']
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{settings_module}: {profile['ms']:.0f} ms, {profile['rss_kb'] / 1024:.1f} MB peak RSS, "
+                f"{profile['modules']} modules ({target}, median of {repeat})"
+            ))
+
+            self.stdout.write(f"  {'self [us]':>10} | {'cumulative':>10} | slowest modules")
+            for name, self_us, cumulative_us in sorted(imports, key=lambda item: item[1], reverse=True)[:top]:
+                self.stdout.write(f"  {self_us:10d} | {cumulative_us:10d} | {name}")
+
+            self.stdout.write(f"  {'self [us]':>10} | {'share':>10} | packages")
+            total = sum(self_us for _, self_us, _ in imports) or 1
+            for package, self_us in by_package(imports)[:top]:
+                self.stdout.write(f"  {self_us:10d} | {self_us / total:10.1%} | {package}")
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from score_tracker.loadtest import run_load
+
+
+class Command(BaseCommand):
+    help = "Drive a running server with concurrent tables and report throughput and latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='?', default='http://127.0.0.1:8000',
+                            help="Base URL of the server (default: http://127.0.0.1:8000)")
+        parser.add_argument('--tables', type=int, default=10, help="Tables playing at once")
+        parser.add_argument('--rounds', type=int, default=20, help="Rounds entered per table")
+        parser.add_argument('--polls', type=int, default=1, help="game_detail requests after every round")
+        parser.add_argument('--think-time', type=float, default=0.0,
+                            help="Mean seconds a table waits before each poll")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, url, **options):
+        if options['tables'] < 1:
+            raise CommandError("--tables must be at least 1.")
+        self.stdout.write(f"{options['tables']} tables, {options['rounds']} rounds each, against {url}")
+        report = run_load(
+            url, tables=options['tables'], rounds=options['rounds'], polls=options['polls'],
+            think_time=options['think_time'], seed=options['seed'],
+        )
+
+        self.stdout.write(
+            f"{'request':<20} {'count':>6} {'errors':>6} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        for label, stats in [*report['requests'].items(), ('total', report['total'])]:
+            self.stdout.write(
+                f"{label:<20} {stats['count']:6d} {stats['errors']:6d} {stats['rate']:8.1f} "
+                f"{stats['p50']:8.1f} {stats['p90']:8.1f} {stats['p99']:8.1f} {stats['max']:8.1f}"
+            )
+        for message in report['errors']:
+            self.stderr.write(f"  {message}")
+
+        total = report['total']
+        error_rate = total['errors'] / total['count'] if total['count'] else 0
+        style = self.style.SUCCESS if not total['errors'] else self.style.WARNING
+        self.stdout.write(style(
+            f"{report['tables']}/{options['tables']} tables entered {report['rounds']} rounds "
+            f"in {report['elapsed']:.1f} s, "
+            f"error rate {error_rate:.2%}."
+        ))
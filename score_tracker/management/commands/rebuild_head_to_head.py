@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from score_tracker.headtohead import CHUNK_SIZE, rebuild_pair_stats
+
+
+class Command(BaseCommand):
+    help = "Recount the head-to-head statistics of all players from the completed games."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f"Games scored per batch (default: {CHUNK_SIZE})")
+
+    def handle(self, *args, chunk_size, **options):
+        start = time.perf_counter()
+        games, pairs = rebuild_pair_stats(chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Counted {games} completed games into {pairs} player pairs in {elapsed:.1f} s."
+        ))
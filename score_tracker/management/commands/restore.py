@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from score_tracker.backup import BackupError, restore_backup
+
+
+class Command(BaseCommand):
+    help = "Restore a backup written by the backup command."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Backup file to restore")
+        parser.add_argument('--flush', action='store_true',
+                            help="Delete all existing score tracker data before restoring")
+
+    def handle(self, *args, **options):
+        try:
+            counts = restore_backup(options['path'], flush=options['flush'])
+        except (BackupError, OSError) as error:
+            raise CommandError(str(error)) from error
+        for label, count in counts.items():
+            self.stdout.write(f"{label:<40} {count:>10} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {sum(counts.values())} rows; row counts and checksums match the backup."
+        ))
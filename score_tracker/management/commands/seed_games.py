@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from score_tracker.models import Tournament
+from score_tracker.seeding import seed_games, seed_players
+
+
+class Command(BaseCommand):
+    help = "Fill the database with random games for benchmarks and load tests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=100)
+        parser.add_argument('--rounds', type=int, default=20, help="Rounds per game")
+        parser.add_argument('--players', type=int, default=3, help="Players per game")
+        parser.add_argument('--player-pool', type=int, default=50, help="Distinct players to draw from")
+        parser.add_argument('--active-ratio', type=float, default=0.2, help="Share of games still active")
+        parser.add_argument('--tournament', help="Put all games into a new tournament with this name")
+        parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible data")
+
+    def handle(self, *args, **options):
+        tournament = None
+        if options['tournament']:
+            tournament = Tournament.objects.create(name=options['tournament'])
+
+        players = seed_players(max(options['player_pool'], options['players']))
+        created = seed_games(
+            options['games'], players,
+            players_per_game=options['players'],
+            rounds_per_game=options['rounds'],
+            tournament=tournament,
+            active_ratio=options['active_ratio'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Created {created} games with {options['rounds']} rounds each."))
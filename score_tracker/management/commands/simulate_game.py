@@ -0,0 +1,71 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from score_tracker.models import Game
+from score_tracker.simulation import (
+    DEFAULT_HORIZON, DEFAULT_PLAYOUTS, NotEnoughHistory, load_history, project_game, simulate,
+)
+from score_tracker.scoring import get_standings_for_games
+
+
+class Command(BaseCommand):
+    help = "Project each player's probability to reach the next 1000 in a game."
+
+    def add_arguments(self, parser):
+        parser.add_argument('game_id', type=int)
+        parser.add_argument('--playouts', type=int, default=DEFAULT_PLAYOUTS)
+        parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help="Rounds to play out")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+        parser.add_argument('--benchmark', action='store_true',
+                            help="Measure simulations per second with one and with all workers")
+
+    def handle(self, *args, **options):
+        try:
+            game = Game.objects.get(pk=options['game_id'])
+        except Game.DoesNotExist:
+            raise CommandError(f"Game {options['game_id']} does not exist.")
+
+        try:
+            if options['benchmark']:
+                self.benchmark(game, options)
+                return
+            projection = project_game(
+                game, playouts=options['playouts'], horizon=options['horizon'],
+                seed=options['seed'], workers=options['workers'],
+            )
+        except NotEnoughHistory as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(
+            f"{game} after round {projection['round']} "
+            f"({projection['playouts']} playouts of {projection['horizon']} rounds)"
+        )
+        for player in projection['players']:
+            self.stdout.write(
+                f"  {player['name']:<20} score {player['score']:5d}  won {player['rounds_won']:2d}  "
+                f"next 1000: {player['probability']:6.1%}"
+            )
+
+    def benchmark(self, game, options):
+        """Time uncached simulations with a single worker and with all of them."""
+        standings = get_standings_for_games([game])[game.pk]
+        player_ids = list(standings)
+        maker_points, opponent_points = load_history(player_ids)
+        inputs = (
+            [standings[pid]['score'] for pid in player_ids],
+            [maker_points[pid] for pid in player_ids],
+            [opponent_points[pid] for pid in player_ids],
+        )
+        cores = options['workers'] or os.cpu_count() or 1
+        for workers in sorted({1, cores}):
+            start = time.perf_counter()
+            simulate(*inputs, playouts=options['playouts'], horizon=options['horizon'],
+                     seed=options['seed'], workers=workers)
+            rate = options['playouts'] / (time.perf_counter() - start)
+            self.stdout.write(
+                f"{workers:3d} worker(s): {rate:10.0f} simulations/s  "
+                f"{rate / workers:10.0f} simulations/s per core"
+            )
@@ -0,0 +1,39 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from score_tracker.models import Game
+from score_tracker.snapshots import snapshot_dir, write_snapshots
+
+
+class Command(BaseCommand):
+    help = "Pre-render the pages of completed games so they are served from disk."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--game', type=int, action='append', dest='games',
+                            help="Snapshot only this game (repeatable)")
+        parser.add_argument('--force', action='store_true',
+                            help="Render games again that already have a snapshot")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Worker processes (default: one per CPU)")
+
+    def handle(self, *args, **options):
+        games = Game.objects.filter(is_active=False).order_by('pk')
+        if options['games']:
+            games = games.filter(pk__in=options['games'])
+        game_ids = list(games.values_list('pk', flat=True))
+        if not options['force']:
+            game_ids = [game_id for game_id in game_ids if not os.path.isdir(snapshot_dir(game_id))]
+
+        start = time.perf_counter()
+        done = written = 0
+        for count, size in write_snapshots(game_ids, workers=options['workers']):
+            done += count
+            written += size
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshotted {done} games ({written} bytes) in {elapsed:.1f} s "
+            f"({done / elapsed if elapsed else 0:.0f} games/s)."
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from score_tracker.assets import vendor_bootstrap
+
+
+class Command(BaseCommand):
+    help = "Copy Bootstrap into static/vendor, trimmed to the classes the project uses."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dist', help="Unpacked Bootstrap distribution (the directory holding css/ and js/)")
+
+    def handle(self, *args, dist, **options):
+        try:
+            sizes = vendor_bootstrap(dist)
+        except FileNotFoundError as error:
+            raise CommandError(f"{error.filename} not found; pass the dist directory of a Bootstrap release.")
+        for path, (before, after) in sizes.items():
+            self.stdout.write(f"{path:<40} {before:8d} -> {after:8d} bytes")
+        self.stdout.write(self.style.SUCCESS("Run collectstatic to precompress the new files."))
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.8 on 2026-10-19 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('score_tracker', '0003_tournament'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='archive',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='final_standings',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='is_archived',
+            field=models.BooleanField(default=False),
+        ),
+    ]
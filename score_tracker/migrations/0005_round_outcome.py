@@ -0,0 +1,59 @@
+# Generated by Django 4.2.8 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+# Outcome values as of this migration, see score_tracker.models.Outcome
+FAILED, SUCCESS, ABGEHEN, DOPPELT_ABGEHEN, DURCH, DURCH_FAILED = range(6)
+
+
+def flags_to_outcome(apps, schema_editor):
+    """
+    Set the outcome of every round from its boolean flags.
+
+    Flags are applied in scoring order, so every round keeps its score: a
+    successful round is SUCCESS (DURCH if it was a Durch), then Abgehen,
+    then a failed Durch, then doppelt abgehen. Everything else stays FAILED.
+    """
+    Round = apps.get_model('score_tracker', 'Round')
+    rounds = Round.objects.using(schema_editor.connection.alias)
+    rounds.filter(is_doppelt_abgehen=True).update(outcome=DOPPELT_ABGEHEN)
+    rounds.filter(is_durch=True).update(outcome=DURCH_FAILED)
+    rounds.filter(is_abgehen=True).update(outcome=ABGEHEN)
+    rounds.filter(is_success=True).update(outcome=SUCCESS)
+    rounds.filter(is_success=True, is_durch=True).update(outcome=DURCH)
+
+
+def outcome_to_flags(apps, schema_editor):
+    Round = apps.get_model('score_tracker', 'Round')
+    rounds = Round.objects.using(schema_editor.connection.alias)
+    rounds.filter(outcome__in=[SUCCESS, DURCH]).update(is_success=True)
+    rounds.filter(outcome=ABGEHEN).update(is_abgehen=True)
+    rounds.filter(outcome__in=[DURCH, DURCH_FAILED]).update(is_durch=True)
+    rounds.filter(outcome=DOPPELT_ABGEHEN).update(is_doppelt_abgehen=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('score_tracker', '0004_game_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='round',
+            name='outcome',
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, 'Failed'), (1, 'Success'), (2, 'Abgehen'),
+                    (3, 'Doppelt abgehen'), (4, 'Durch'), (5, 'Durch (failed)'),
+                ],
+                db_index=True,
+                default=0,
+            ),
+        ),
+        migrations.RunPython(flags_to_outcome, outcome_to_flags),
+        migrations.RemoveField(model_name='round', name='is_success'),
+        migrations.RemoveField(model_name='round', name='is_abgehen'),
+        migrations.RemoveField(model_name='round', name='is_durch'),
+        migrations.RemoveField(model_name='round', name='is_doppelt_abgehen'),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 4.2.8 on 2026-10-19 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+SCORE_VIEW_SQL = {
+    'sqlite': """
+        CREATE VIEW score_tracker_score AS
+        SELECT r.id || ':' || s.key AS id,
+               r.id AS round_id,
+               CAST(s.key AS integer) AS player_id,
+               json_extract(s.value, '$[0]') AS meld_points,
+               json_extract(s.value, '$[1]') AS trick_points,
+               r.created_at,
+               r.updated_at
+        FROM score_tracker_round r, json_each(r.opponent_points) s
+    """,
+    'postgresql': """
+        CREATE VIEW score_tracker_score AS
+        SELECT r.id::text || ':' || s.key AS id,
+               r.id AS round_id,
+               s.key::bigint AS player_id,
+               (s.value ->> 0)::integer AS meld_points,
+               (s.value ->> 1)::integer AS trick_points,
+               r.created_at,
+               r.updated_at
+        FROM score_tracker_round r CROSS JOIN LATERAL jsonb_each(r.opponent_points) s
+    """,
+}
+
+
+def scores_to_rounds(apps, schema_editor):
+    """Copy every Score row into the opponent_points of its round."""
+    Round = apps.get_model('score_tracker', 'Round')
+    Score = apps.get_model('score_tracker', 'Score')
+    db = schema_editor.connection.alias
+    scores = (
+        Score.objects.using(db).order_by('round_id')
+        .values_list('round_id', 'player_id', 'meld_points', 'trick_points')
+    )
+    pending = {}
+
+    def flush():
+        rounds = Round.objects.using(db).in_bulk(list(pending))
+        for round_id, points in pending.items():
+            rounds[round_id].opponent_points = points
+        Round.objects.using(db).bulk_update(rounds.values(), ['opponent_points'])
+        pending.clear()
+
+    for round_id, player_id, meld_points, trick_points in scores.iterator(chunk_size=BATCH_SIZE):
+        if round_id not in pending and len(pending) >= BATCH_SIZE:
+            flush()
+        pending.setdefault(round_id, {})[str(player_id)] = [meld_points, trick_points]
+    if pending:
+        flush()
+
+
+def rounds_to_scores(apps, schema_editor):
+    Round = apps.get_model('score_tracker', 'Round')
+    Score = apps.get_model('score_tracker', 'Score')
+    db = schema_editor.connection.alias
+    batch = []
+    rounds = Round.objects.using(db).exclude(opponent_points={}).values_list('id', 'opponent_points')
+    for round_id, points in rounds.iterator(chunk_size=BATCH_SIZE):
+        batch.extend(
+            Score(round_id=round_id, player_id=int(player_id), meld_points=meld, trick_points=trick)
+            for player_id, (meld, trick) in points.items()
+        )
+        if len(batch) >= BATCH_SIZE:
+            Score.objects.using(db).bulk_create(batch)
+            batch = []
+    Score.objects.using(db).bulk_create(batch)
+
+
+def create_score_view(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in SCORE_VIEW_SQL:
+        raise NotImplementedError(f"The score view is not available on {vendor}.")
+    schema_editor.execute(SCORE_VIEW_SQL[vendor])
+
+
+def drop_score_view(apps, schema_editor):
+    schema_editor.execute("DROP VIEW score_tracker_score")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('score_tracker', '0005_round_outcome'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='round',
+            name='opponent_points',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(scores_to_rounds, rounds_to_scores),
+        migrations.DeleteModel(name='Score'),
+        migrations.CreateModel(
+            name='Score',
+            fields=[
+                ('id', models.CharField(editable=False, max_length=41, primary_key=True, serialize=False)),
+                ('meld_points', models.PositiveIntegerField(default=0)),
+                ('trick_points', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(editable=False, null=True)),
+                ('updated_at', models.DateTimeField(editable=False, null=True)),
+                ('player', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='scores', to='score_tracker.player')),
+                ('round', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='scores', to='score_tracker.round')),
+            ],
+            options={
+                'db_table': 'score_tracker_score',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_score_view, drop_score_view),
+    ]
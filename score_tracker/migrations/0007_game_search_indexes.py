@@ -0,0 +1,26 @@
+# Generated by Django 4.2.8 on 2026-10-19 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('score_tracker', '0006_round_opponent_points'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='player',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['start_date', 'id'], name='game_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['is_active', 'start_date', 'id'], name='game_active_start_idx'),
+        ),
+    ]
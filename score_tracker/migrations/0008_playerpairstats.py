@@ -0,0 +1,30 @@
+# Generated by Django 4.2.8 on 2026-10-19 19:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('score_tracker', '0007_game_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerPairStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('games', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('points_difference', models.IntegerField(default=0)),
+                ('opponent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='score_tracker.player')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pair_stats', to='score_tracker.player')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='playerpairstats',
+            constraint=models.UniqueConstraint(fields=('player', 'opponent'), name='unique_player_pair'),
+        ),
+    ]
@@ -1,10 +1,22 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.core.validators import MinValueValidator
 
 
 class Player(models.Model):
     """Player model to store player information."""
+    name = models.CharField(max_length=100, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Tournament(models.Model):
+    """Tournament model grouping games played in parallel."""
     name = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -13,58 +25,162 @@ class Player(models.Model):
         return self.name
 
 
+class GameManager(models.Manager):
+    """Leave the archive blob out unless it is accessed."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('archive')
+
+
 class Game(models.Model):
     """Game model to store game information."""
     name = models.CharField(max_length=100, default="Binokel Game")
     players = models.ManyToManyField(Player, related_name='games')
+    tournament = models.ForeignKey(
+        Tournament,
+        related_name='games',
+        on_delete=models.SET_NULL,
+        null=True, blank=True
+    )
     start_date = models.DateTimeField(default=timezone.now)
     end_date = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    # Completed games can be archived: their rounds and scores are packed into
+    # one compressed blob and the final standings are kept next to it
+    is_archived = models.BooleanField(default=False)
+    archive = models.BinaryField(null=True, blank=True, editable=False)
+    final_standings = models.JSONField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = GameManager()
+
+    class Meta:
+        indexes = [
+            # Newest first, for the game list and search (see search.py)
+            models.Index(fields=['start_date', 'id'], name='game_start_idx'),
+            models.Index(fields=['is_active', 'start_date', 'id'], name='game_active_start_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.start_date.strftime('%Y-%m-%d %H:%M')}"
 
+    def clean(self):
+        # An archived game has no Round rows left to continue from: its
+        # standings, round numbers and scorers would no longer agree
+        if self.is_archived and self.is_active:
+            raise ValidationError("Archived games cannot be reactivated.")
+
+    @cached_property
+    def roster(self):
+        """
+        The players of this game, loaded once per Game instance.
+
+        Views, forms and templates that handle one game share this list
+        instead of evaluating game.players.all() again each time.
+        """
+        return list(self.players.all())
+
+    def attach_players(self, rounds):
+        """
+        Set game_maker and last_trick_winner of rounds from the roster.
+
+        Players that have left the roster since are fetched in one query.
+        Returns rounds.
+        """
+        players = {player.id: player for player in self.roster}
+        referenced = {round_obj.game_maker_id for round_obj in rounds}
+        referenced |= {round_obj.last_trick_winner_id for round_obj in rounds} - {None}
+        if not referenced <= set(players):
+            players.update(Player.objects.in_bulk(referenced - set(players)))
+        for round_obj in rounds:
+            round_obj.game_maker = players[round_obj.game_maker_id]
+            if round_obj.last_trick_winner_id is not None:
+                round_obj.last_trick_winner = players[round_obj.last_trick_winner_id]
+        return rounds
+
+    @cached_property
+    def archived_rounds(self):
+        """Rounds of an archived game, unpacked from the archive on first access."""
+        from .archive import unpack_rounds
+        return unpack_rounds(self)
+
+    def get_rounds(self):
+        """Return the rounds of this game in order, archived or not."""
+        if self.is_archived:
+            return self.archived_rounds
+        return self.rounds.all().order_by('round_number')
+
+    def get_round_page(self, before=None, limit=20):
+        """
+        Return up to limit rounds, newest first, played before round number before.
+
+        Uses keyset pagination on round_number, so every page costs the same
+        however far back it is.
+        """
+        if self.is_archived:
+            rounds = self.archived_rounds
+            if before is not None:
+                rounds = [round_obj for round_obj in rounds if round_obj.round_number < before]
+            return rounds[::-1][:limit]
+        rounds = self.rounds.order_by('-round_number')
+        if before is not None:
+            rounds = rounds.filter(round_number__lt=before)
+        return self.attach_players(list(rounds[:limit]))
+
+    @property
+    def round_count(self):
+        """Number of rounds played in this game."""
+        if self.is_archived:
+            return self.final_standings['rounds']
+        if hasattr(self, 'rounds_played'):
+            # Annotated by list views to avoid one COUNT query per game
+            return self.rounds_played
+        return self.rounds.count()
+
     def end_game(self):
-        """End the game."""
-        self.is_active = False
-        self.end_date = timezone.now()
-        self.save()
+        """End the game and add it to the head-to-head statistics."""
+        from .headtohead import record_games
+        with transaction.atomic():
+            was_active = self.is_active
+            self.is_active = False
+            self.end_date = timezone.now()
+            self.save()
+            # Ending a game twice must not count it twice
+            if was_active:
+                record_games([self])
 
     def get_current_score(self):
         """Calculate the current score for each player."""
+        if self.is_archived:
+            return {
+                player.id: {
+                    'player': player,
+                    'score': self.final_standings['players'][str(player.id)][0],
+                    'rounds_won': self.final_standings['players'][str(player.id)][1],
+                }
+                for player in self.roster
+            }
+
         result = {}
-        for player in self.players.all():
+        # Process all rounds chronologically
+        all_rounds = list(self.rounds.all().order_by('round_number'))
+        for player in self.roster:
             score = 0
             rounds_won = 0
             
-            # Process all rounds chronologically
-            all_rounds = self.rounds.all().order_by('round_number')
-            
             for round_obj in all_rounds:
                 round_score = 0
                 
-                if round_obj.game_maker == player:
-                    # Game maker scoring
-                    if round_obj.is_success:
-                        round_score += round_obj.bid_amount
-                    elif round_obj.is_abgehen:
-                        round_score -= round_obj.bid_amount
-                    elif round_obj.is_doppelt_abgehen:
-                        round_score -= 2 * round_obj.bid_amount
-                    else:
-                        # Default case: if none of the above are set, it's considered a failed attempt (doppelt abgehen)
-                        round_score -= 2 * round_obj.bid_amount
-                    # Note: is_durch doesn't affect scoring differently, it's just a flag
+                if round_obj.game_maker_id == player.id:
+                    # Game maker scoring: won, lost or doubly lost bid
+                    round_score += BID_FACTORS[round_obj.outcome] * round_obj.bid_amount
                     
                     # Add meld points and trick points
                     round_score += round_obj.meld_points + round_obj.trick_points
                 else:
                     # Other player scoring - only meld and trick points
-                    player_score = Score.objects.filter(round=round_obj, player=player).first()
-                    if player_score:
-                        round_score += player_score.meld_points + player_score.trick_points
+                    round_score += round_obj.get_opponent_points(player.id)
                 
                 # Add round score to total
                 score += round_score
@@ -83,16 +199,52 @@ class Game(models.Model):
         return result
 
 
+class Outcome(models.IntegerChoices):
+    """How a round ended for the game maker."""
+    FAILED = 0, 'Failed'
+    SUCCESS = 1, 'Success'
+    ABGEHEN = 2, 'Abgehen'  # Game maker chose to "go down"
+    DOPPELT_ABGEHEN = 3, 'Doppelt abgehen'  # Game maker failed to reach the bid amount
+    DURCH = 4, 'Durch'  # Successful "Durch"
+    DURCH_FAILED = 5, 'Durch (failed)'
+
+
+# Multiple of the bid amount the game maker scores, indexed by outcome
+BID_FACTORS = (-2, 1, -1, -2, 1, -2)
+
+OUTCOME_BADGES = {
+    Outcome.FAILED: 'bg-danger',
+    Outcome.SUCCESS: 'bg-success',
+    Outcome.ABGEHEN: 'bg-warning text-dark',
+    Outcome.DOPPELT_ABGEHEN: 'bg-danger',
+    Outcome.DURCH: 'bg-primary',
+    Outcome.DURCH_FAILED: 'bg-primary',
+}
+
+# The boolean flags rounds were described with before the outcome column
+OUTCOME_FLAGS = ('is_success', 'is_abgehen', 'is_durch', 'is_doppelt_abgehen')
+
+
+def outcome_from_flags(is_success=False, is_abgehen=False, is_durch=False, is_doppelt_abgehen=False):
+    """Return the outcome for a combination of the old boolean flags."""
+    if is_success:
+        return Outcome.DURCH if is_durch else Outcome.SUCCESS
+    if is_abgehen:
+        return Outcome.ABGEHEN
+    if is_durch:
+        return Outcome.DURCH_FAILED
+    if is_doppelt_abgehen:
+        return Outcome.DOPPELT_ABGEHEN
+    return Outcome.FAILED
+
+
 class Round(models.Model):
     """Round model to store information about each round of the game."""
     game = models.ForeignKey(Game, related_name='rounds', on_delete=models.CASCADE)
     round_number = models.PositiveIntegerField()
     game_maker = models.ForeignKey(Player, related_name='rounds_as_game_maker', on_delete=models.CASCADE)
     bid_amount = models.PositiveIntegerField(validators=[MinValueValidator(1)])
-    is_success = models.BooleanField(default=False)
-    is_abgehen = models.BooleanField(default=False)  # If game maker chooses to "go down"
-    is_durch = models.BooleanField(default=False)    # If game maker attempts a "Durch"
-    is_doppelt_abgehen = models.BooleanField(default=False)  # If game maker fails to reach bid amount
+    outcome = models.PositiveSmallIntegerField(choices=Outcome.choices, default=Outcome.FAILED, db_index=True)
     meld_points = models.PositiveIntegerField(default=0)  # Meld points for the game maker
     trick_points = models.PositiveIntegerField(default=0)  # Trick points for the game maker
     last_trick_winner = models.ForeignKey(
@@ -101,6 +253,8 @@ class Round(models.Model):
         on_delete=models.CASCADE,
         null=True, blank=True
     )
+    # Meld and trick points of the other players: {"<player id>": [meld, trick]}
+    opponent_points = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -109,20 +263,159 @@ class Round(models.Model):
         ordering = ['game', 'round_number']
 
     def __str__(self):
-        return f"Game {self.game.id} - Round {self.round_number}"
+        return f"Game {self.game_id} - Round {self.round_number}"
+
+    def get_opponent_points(self, player_id):
+        """Meld plus trick points of an opponent, 0 if none were entered."""
+        meld_points, trick_points = self.opponent_points.get(str(player_id), (0, 0))
+        return meld_points + trick_points
+
+    def set_opponent_points(self, player_id, meld_points, trick_points):
+        """Store an opponent's points on the round (saved with the round)."""
+        self.opponent_points[str(player_id)] = [meld_points, trick_points]
+
+    @property
+    def outcome_badge(self):
+        """CSS classes of the badge showing the outcome."""
+        return OUTCOME_BADGES[self.outcome]
+
+    # The old boolean flags, derived from outcome. Setting one recomputes the
+    # outcome from all four, so Round(is_success=True, is_durch=True) works.
+
+    def _set_flag(self, flag, value):
+        flags = {name: getattr(self, name) for name in OUTCOME_FLAGS}
+        flags[flag] = bool(value)
+        self.outcome = outcome_from_flags(**flags)
+
+    is_success = property(
+        lambda self: self.outcome in (Outcome.SUCCESS, Outcome.DURCH),
+        lambda self, value: self._set_flag('is_success', value),
+    )
+    is_abgehen = property(
+        lambda self: self.outcome == Outcome.ABGEHEN,
+        lambda self, value: self._set_flag('is_abgehen', value),
+    )
+    is_durch = property(
+        lambda self: self.outcome in (Outcome.DURCH, Outcome.DURCH_FAILED),
+        lambda self, value: self._set_flag('is_durch', value),
+    )
+    is_doppelt_abgehen = property(
+        lambda self: self.outcome == Outcome.DOPPELT_ABGEHEN,
+        lambda self, value: self._set_flag('is_doppelt_abgehen', value),
+    )
+
+
+class ScoreQuerySet(models.QuerySet):
+    """Writes to Score rows go to the opponent points of their rounds."""
+
+    def bulk_create(self, objs, **kwargs):
+        from .signals import invalidate_games
+        objs = list(objs)
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            rounds = Round.objects.using(self.db).select_for_update().in_bulk(
+                {score.round_id for score in objs}
+            )
+            for score in objs:
+                round_obj = rounds[score.round_id]
+                if str(score.player_id) in round_obj.opponent_points:
+                    raise IntegrityError(f"Round {score.round_id} already has a score for player {score.player_id}.")
+                round_obj.set_opponent_points(score.player_id, score.meld_points, score.trick_points)
+                round_obj.updated_at = now
+                score.id = Score.make_id(score.round_id, score.player_id)
+                score._state.adding = False
+                score._state.db = self.db
+            # bulk_update() neither sets updated_at nor sends signals
+            Round.objects.using(self.db).bulk_update(rounds.values(), ['opponent_points', 'updated_at'])
+            invalidate_games({round_obj.game_id for round_obj in rounds.values()})
+        return objs
+
+    def delete(self):
+        deleted = 0
+        with transaction.atomic(using=self.db):
+            for score in self.select_related(None):
+                score.delete()
+                deleted += 1
+        return deleted, {Score._meta.label: deleted}
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def update(self, **kwargs):
+        updated = 0
+        with transaction.atomic(using=self.db):
+            for score in self:
+                for name, value in kwargs.items():
+                    setattr(score, name, value)
+                score.save()
+                updated += 1
+        return updated
+
+    update.alters_data = True
 
 
 class Score(models.Model):
-    """Score model to store the score of each player in a round."""
-    round = models.ForeignKey(Round, related_name='scores', on_delete=models.CASCADE)
-    player = models.ForeignKey(Player, related_name='scores', on_delete=models.CASCADE)
+    """
+    Score of an opponent in a round.
+
+    Compatibility model over the score_tracker_score database view, which
+    lists the opponent_points of every round as one row per opponent. Scores
+    can still be created, changed and deleted; the changes are written to
+    Round.opponent_points.
+    """
+    # "<round id>:<player id>"
+    id = models.CharField(primary_key=True, max_length=41, editable=False)
+    round = models.ForeignKey(Round, related_name='scores', on_delete=models.DO_NOTHING, db_constraint=False)
+    player = models.ForeignKey(Player, related_name='scores', on_delete=models.DO_NOTHING, db_constraint=False)
     meld_points = models.PositiveIntegerField(default=0)  # Meld points
     trick_points = models.PositiveIntegerField(default=0)  # Trick points
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(editable=False, null=True)
+    updated_at = models.DateTimeField(editable=False, null=True)
+
+    objects = ScoreQuerySet.as_manager()
 
     class Meta:
-        unique_together = ['round', 'player']
+        managed = False
+        db_table = 'score_tracker_score'
+
+    @staticmethod
+    def make_id(round_id, player_id):
+        return f"{round_id}:{player_id}"
+
+    def validate_unique(self, exclude=None):
+        super().validate_unique(exclude)
+        if self._state.adding and Score.objects.filter(round_id=self.round_id, player_id=self.player_id).exists():
+            raise ValidationError("This player already has a score in this round.")
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if not self._state.adding and self.id != self.make_id(self.round_id, self.player_id):
+                # Moved to another round or player: remove the old entry
+                old_round_id, old_player_id = self.id.split(':')
+                Score(id=self.id, round_id=int(old_round_id), player_id=int(old_player_id)).delete()
+                self._state.adding = True
+            round_obj = Round.objects.select_for_update().get(pk=self.round_id)
+            key = str(self.player_id)
+            if self._state.adding and key in round_obj.opponent_points:
+                raise IntegrityError(f"Round {self.round_id} already has a score for player {self.player_id}.")
+            round_obj.set_opponent_points(self.player_id, self.meld_points, self.trick_points)
+            round_obj.save(update_fields=['opponent_points', 'updated_at'])
+        self.id = self.make_id(self.round_id, self.player_id)
+        self.created_at = self.created_at or round_obj.created_at
+        self.updated_at = round_obj.updated_at
+        self._state.adding = False
+        self._state.db = round_obj._state.db
+
+    save.alters_data = True
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            round_obj = Round.objects.select_for_update().filter(pk=self.round_id).first()
+            if round_obj is not None and round_obj.opponent_points.pop(str(self.player_id), None) is not None:
+                round_obj.save(update_fields=['opponent_points', 'updated_at'])
+        return 1, {Score._meta.label: 1}
+
+    delete.alters_data = True
 
     def __str__(self):
         return f"{self.player.name} - Round {self.round.round_number}"
@@ -140,4 +433,38 @@ class Score(models.Model):
         if remainder >= 5:
             return points + (10 - remainder)  # Round up
         else:
-            return points - remainder  # Round down
\ No newline at end of file
+            return points - remainder  # Round down
+
+
+class PlayerPairStats(models.Model):
+    """
+    Head-to-head record of a player against one opponent in completed games.
+
+    Every pair is stored in both directions: the (A, B) row mirrors the
+    (B, A) row. Rows are updated when a game ends and can be rebuilt with
+    ``manage.py rebuild_head_to_head``; see headtohead.py.
+    """
+    player = models.ForeignKey(Player, related_name='pair_stats', on_delete=models.CASCADE)
+    opponent = models.ForeignKey(Player, related_name='+', on_delete=models.CASCADE)
+    games = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)  # Games the player finished ahead of the opponent
+    losses = models.PositiveIntegerField(default=0)
+    # Sum over the shared games of the player's points minus the opponent's
+    points_difference = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['player', 'opponent'], name='unique_player_pair'),
+        ]
+
+    def __str__(self):
+        return f"{self.player} vs {self.opponent}"
+
+    @property
+    def draws(self):
+        return self.games - self.wins - self.losses
+
+    @property
+    def average_difference(self):
+        """Average points difference per shared game."""
+        return self.points_difference / self.games if self.games else 0
@@ -0,0 +1,370 @@
+"""
+Set-based scoring for many games at once.
+
+Implements the rules of Game.get_current_score from a fixed number of queries,
+independent of the number of games, players and rounds involved.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Max, Q
+
+from .models import BID_FACTORS, OUTCOME_FLAGS, Game, Round, outcome_from_flags
+
+ROUND_WIN_POINTS = 1000
+
+ROUND_FIELDS = (
+    'id', 'game_id', 'round_number', 'game_maker_id', 'bid_amount',
+    'outcome', 'meld_points', 'trick_points',
+)
+
+TOURNAMENT_CACHE_TIMEOUT = 60 * 60
+STREAM_CHUNK_SIZE = 2000
+
+
+def game_maker_points(round_row):
+    """Points the game maker gets for a round (a row of ROUND_FIELDS)."""
+    return (
+        BID_FACTORS[round_row['outcome']] * round_row['bid_amount']
+        + round_row['meld_points'] + round_row['trick_points']
+    )
+
+
+def apply_round(state, round_row, opponent_points):
+    """
+    Add one round to a game's running state.
+
+    state maps player id -> [score, rounds_won] and is updated in place;
+    opponent_points maps player id -> meld + trick points of that round.
+    """
+    game_maker_id = round_row['game_maker_id']
+    for player_id, player_state in state.items():
+        if player_id == game_maker_id:
+            player_state[0] += game_maker_points(round_row)
+        else:
+            player_state[0] += opponent_points.get(player_id, 0)
+        while player_state[0] >= ROUND_WIN_POINTS:
+            player_state[1] += 1
+            player_state[0] -= ROUND_WIN_POINTS
+
+
+def load_rosters(games):
+    """Return {game_id: [player, ...]} for the given games in one query."""
+    rosters = defaultdict(list)
+    memberships = (
+        Game.players.through.objects
+        .filter(game__in=games)
+        .select_related('player')
+        .order_by('id')
+    )
+    for membership in memberships:
+        rosters[membership.game_id].append(membership.player)
+    return rosters
+
+
+def iter_rounds(round_filter):
+    """
+    Stream the rounds matching round_filter together with their opponent points.
+
+    Yields (round row, {player_id: points}) ordered by game and round number,
+    from one query read in chunks, so memory use does not grow with the
+    number of rounds.
+    """
+    rounds = (
+        Round.objects.filter(round_filter)
+        .order_by('game_id', 'round_number')
+        .values(*ROUND_FIELDS, 'opponent_points')
+    )
+    for round_row in rounds.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        opponent_points = {
+            int(player_id): meld_points + trick_points
+            for player_id, (meld_points, trick_points) in round_row['opponent_points'].items()
+        }
+        yield round_row, opponent_points
+
+
+def initial_state(game, roster):
+    """Running state of a game before its first stored round."""
+    if game.is_archived:
+        # Archived games no longer have rounds, start from the final standings
+        players = game.final_standings['players']
+        return {player.id: list(players[str(player.id)]) for player in roster}
+    return {player.id: [0, 0] for player in roster}
+
+
+def build_standings(roster, state):
+    """Turn a running state into the get_current_score() result format."""
+    return {
+        player.id: {
+            'player': player,
+            'score': state[player.id][0],
+            'rounds_won': state[player.id][1],
+        }
+        for player in roster
+    }
+
+
+def get_standings_for_games(games, backend=None):
+    """
+    Calculate the current score of every player in every game.
+
+    games is a list or queryset of games. Returns {game_id: get_current_score()
+    result} from a fixed number of queries, however many games are passed.
+    backend is 'python' or 'sql'; by default settings.SCORING_BACKEND decides,
+    where 'auto' picks the SQL backend on PostgreSQL and the Python backend
+    everywhere else.
+    """
+    backend = backend or getattr(settings, 'SCORING_BACKEND', 'auto')
+    if backend == 'auto':
+        backend = 'sql' if connection.vendor == 'postgresql' else 'python'
+    if backend == 'sql':
+        return sql_standings(games)
+    if backend == 'python':
+        return python_standings(games)
+    raise ValueError(f"Unknown scoring backend '{backend}'.")
+
+
+def python_standings(games):
+    """Score games in Python from their rounds, using two queries."""
+    game_ids = [game.pk for game in games]
+    rosters = load_rosters(game_ids)
+    states = {game.pk: initial_state(game, rosters[game.pk]) for game in games}
+    for round_row, opponent_points in iter_rounds(Q(game_id__in=game_ids)):
+        apply_round(states[round_row['game_id']], round_row, opponent_points)
+    return {
+        game_id: build_standings(rosters[game_id], states[game_id])
+        for game_id in game_ids
+    }
+
+
+# The carry rule looks path-dependent, but it is not: after every round a
+# player's rounds_won equals floor(peak / 1000) for the highest running total
+# (without carry) reached so far, or 0 while that peak is below 1000. Each
+# crossing happens exactly when the running total first reaches the next
+# multiple of 1000, because negative scores are never carried. So the final
+# standings follow from the total and the peak of the running sum per player.
+STANDINGS_SQL = """
+SELECT game_id, player_id, SUM(points), MAX(running)
+FROM (
+    SELECT game_id, player_id, points,
+           SUM(points) OVER (
+               PARTITION BY game_id, player_id ORDER BY round_number
+               ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+           ) AS running
+    FROM (
+        SELECT gp.game_id, gp.player_id, r.round_number,
+               CASE WHEN r.game_maker_id = gp.player_id THEN
+                   {bid_factor} * r.bid_amount + r.meld_points + r.trick_points
+               ELSE {opponent_points}
+               END AS points
+        FROM {game_players} gp
+        JOIN {round} r ON r.game_id = gp.game_id
+        WHERE gp.game_id IN ({game_ids})
+    ) round_points
+) running_points
+GROUP BY game_id, player_id
+"""
+
+# BID_FACTORS as an SQL expression over the outcome of round r
+BID_FACTOR_SQL = "CASE r.outcome {} END".format(
+    ' '.join(f"WHEN {outcome} THEN {factor}" for outcome, factor in enumerate(BID_FACTORS))
+)
+
+# Meld plus trick points of player gp.player_id from round r's opponent_points
+OPPONENT_POINTS_SQL = {
+    'postgresql': (
+        "COALESCE((r.opponent_points -> gp.player_id::text ->> 0)::integer"
+        " + (r.opponent_points -> gp.player_id::text ->> 1)::integer, 0)"
+    ),
+    'sqlite': (
+        "COALESCE(json_extract(r.opponent_points, '$.\"' || gp.player_id || '\"[0]')"
+        " + json_extract(r.opponent_points, '$.\"' || gp.player_id || '\"[1]'), 0)"
+    ),
+}
+
+
+def sql_standings(games):
+    """
+    Score games inside the database, using two queries.
+
+    Only one row per player is transferred instead of every round and score.
+    """
+    game_ids = [game.pk for game in games]
+    rosters = load_rosters(game_ids)
+    states = {game.pk: initial_state(game, rosters[game.pk]) for game in games}
+
+    live_ids = [game.pk for game in games if not game.is_archived]
+    if live_ids:
+        sql = STANDINGS_SQL.format(
+            game_players=Game.players.through._meta.db_table,
+            round=Round._meta.db_table,
+            game_ids=', '.join(['%s'] * len(live_ids)),
+            bid_factor=BID_FACTOR_SQL,
+            opponent_points=OPPONENT_POINTS_SQL[connection.vendor],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, live_ids)
+            for game_id, player_id, total, peak in cursor.fetchall():
+                rounds_won = peak // ROUND_WIN_POINTS if peak >= ROUND_WIN_POINTS else 0
+                states[game_id][player_id] = [total - rounds_won * ROUND_WIN_POINTS, rounds_won]
+
+    return {
+        game_id: build_standings(rosters[game_id], states[game_id])
+        for game_id in game_ids
+    }
+
+
+def _tournament_cache_key(tournament_id):
+    return f'tournament-standings:{tournament_id}'
+
+
+def invalidate_tournament_standings(tournament_id):
+    """Drop the cached standings of a tournament, forcing a full recount."""
+    cache.delete(_tournament_cache_key(tournament_id))
+
+
+def _rounds_after(last_round):
+    """Q for the rounds after last_round ({game_id: round number}) of every game."""
+    if not last_round:
+        return Q(pk__in=[])
+    return Q(
+        *[Q(game_id=game_id, round_number__gt=number) for game_id, number in last_round.items()],
+        _connector=Q.OR,
+    )
+
+
+def get_tournament_standings(tournament):
+    """
+    Return the per-game standings of all games in a tournament.
+
+    The running state of every game is cached together with the last round
+    number it includes, so a refresh only fetches rounds added since then.
+    The cache entry also records how many rounds it includes and when the
+    latest of them was saved. Every refresh checks both against the database,
+    so a round edited or deleted in another process forces a full recount
+    even where the cache is not shared. A refresh costs three queries when
+    nothing changed and five with new rounds, however many tables are playing.
+    """
+    key = _tournament_cache_key(tournament.pk)
+    cached = cache.get(key)
+
+    games = list(tournament.games.order_by('pk'))
+    rosters = load_rosters(games)
+    tournament_rounds = Round.objects.filter(game__in=[game.pk for game in games])
+    rounds = tournament_rounds.aggregate(count=Count('pk'), saved=Max('updated_at'))
+
+    players = {game.pk: {player.id for player in rosters[game.pk]} for game in games}
+    if cached is not None and {
+        game_id: set(state) for game_id, state in cached['states'].items()
+    } != players:
+        cached = None
+    if cached is not None:
+        if (rounds['count'], rounds['saved']) == (cached['count'], cached['saved']):
+            # Nothing added, changed or deleted: the cached standings are current
+            return _tournament_tables(games, rosters, cached)
+        new_rounds = _rounds_after(cached['last_round'])
+        included = tournament_rounds.exclude(new_rounds).aggregate(count=Count('pk'), saved=Max('updated_at'))
+        if (included['count'], included['saved']) != (cached['count'], cached['saved']):
+            # A round the cache already includes was changed or deleted
+            cached = None
+
+    if cached is None:
+        # Tables, players or old rounds changed, or nothing cached yet: count every round again
+        cached = {
+            'states': {game.pk: initial_state(game, rosters[game.pk]) for game in games},
+            'last_round': {game.pk: game.final_standings['rounds'] if game.is_archived else 0
+                           for game in games},
+        }
+
+    for round_row, opponent_points in iter_rounds(_rounds_after(cached['last_round'])):
+        game_id = round_row['game_id']
+        apply_round(cached['states'][game_id], round_row, opponent_points)
+        cached['last_round'][game_id] = round_row['round_number']
+    # A round saved between the aggregate and the read above makes the next
+    # refresh count everything again, which is safe
+    cached['count'], cached['saved'] = rounds['count'], rounds['saved']
+    cache.set(key, cached, TOURNAMENT_CACHE_TIMEOUT)
+    return _tournament_tables(games, rosters, cached)
+
+
+def _tournament_tables(games, rosters, cached):
+    return {
+        game.pk: {
+            'game': game,
+            'rounds_played': cached['last_round'][game.pk],
+            'scores': build_standings(rosters[game.pk], cached['states'][game.pk]),
+        }
+        for game in games
+    }
+
+
+def scoring_rules():
+    """
+    The scoring rules as plain data, for scorers outside this module.
+
+    static/js/scoring.js implements apply_round from these rules; both are
+    checked against the same test vectors. outcome_by_flags maps a bitmask
+    of the OUTCOME_FLAGS checkboxes (first flag = lowest bit) to an outcome.
+    """
+    return {
+        'round_win_points': ROUND_WIN_POINTS,
+        'bid_factors': list(BID_FACTORS),
+        'flags': list(OUTCOME_FLAGS),
+        'outcome_by_flags': [
+            int(outcome_from_flags(**{
+                flag: bool(mask & (1 << bit)) for bit, flag in enumerate(OUTCOME_FLAGS)
+            }))
+            for mask in range(1 << len(OUTCOME_FLAGS))
+        ],
+    }
+
+
+def standings_payload(standings):
+    """Return a get_current_score() result with the scoring rules as JSON-ready data."""
+    return {
+        'rules': scoring_rules(),
+        'players': [
+            {
+                'id': player_id,
+                'name': data['player'].name,
+                'score': data['score'],
+                'rounds_won': data['rounds_won'],
+            }
+            for player_id, data in standings.items()
+        ],
+    }
+
+
+def get_leader(standings):
+    """Return the leading entry of a get_current_score() result, or None."""
+    return max(
+        standings.values(),
+        key=lambda data: (data['rounds_won'], data['score']),
+        default=None,
+    )
+
+
+def rank_players(tables):
+    """
+    Combine per-game standings into an overall player ranking.
+
+    Players are ranked by rounds won, then by current score.
+    """
+    totals = {}
+    for table in tables.values():
+        for player_id, data in table['scores'].items():
+            entry = totals.setdefault(player_id, {
+                'player': data['player'],
+                'score': 0,
+                'rounds_won': 0,
+                'games': 0,
+            })
+            entry['score'] += data['score']
+            entry['rounds_won'] += data['rounds_won']
+            entry['games'] += 1
+    return sorted(
+        totals.values(),
+        key=lambda entry: (-entry['rounds_won'], -entry['score'], entry['player'].name),
+    )
@@ -0,0 +1,89 @@
+"""
+Searching the games.
+
+Games are filtered by players, by the dates they were played on and by
+status, newest first. Pages are cut with keyset pagination on
+(start_date, id): the cursor of the next page is the sort key of the last
+game shown, so every page is one range scan of the game_start index,
+however far back it is. A search for players starts from the membership
+table's player index instead and only sorts the games of those players.
+Players are searched by name; a name shared by several players matches
+the games of any of them.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Game, Round
+
+CURSOR_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not made by make_cursor."""
+
+
+def make_cursor(game):
+    """The cursor of the page after game."""
+    return f"{game.start_date.astimezone(dt_timezone.utc).strftime(CURSOR_FORMAT)}-{game.pk}"
+
+
+def parse_cursor(cursor):
+    """Return the (start_date, pk) sort key encoded in cursor."""
+    try:
+        start_date, pk = cursor.split('-')
+        return datetime.strptime(start_date, CURSOR_FORMAT).replace(tzinfo=dt_timezone.utc), int(pk)
+    except ValueError as exc:
+        raise InvalidCursor(f"Invalid cursor {cursor!r}.") from exc
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def search_games(players=(), date_from=None, date_to=None, status=None):
+    """
+    Games with all of the named players, played within the dates, in status, newest first.
+
+    A game is played within the range if it started on or after date_from
+    and started, and if completed ended, on or before date_to. status is
+    'active', 'completed' or None for both.
+    """
+    games = Game.objects.all()
+    memberships = Game.players.through.objects
+    for name in players:
+        # A subquery, not a join: two players of one game sharing the name
+        # must not return the game twice
+        games = games.filter(pk__in=memberships.filter(player__name=name).values('game_id'))
+    if date_from is not None:
+        games = games.filter(start_date__gte=_day_start(date_from))
+    if date_to is not None:
+        until = _day_start(date_to + timedelta(days=1))
+        games = games.filter(Q(end_date__isnull=True) | Q(end_date__lt=until), start_date__lt=until)
+    if status is not None:
+        games = games.filter(is_active=status == 'active')
+    return games.order_by('-start_date', '-pk')
+
+
+def get_page(games, cursor=None, limit=25):
+    """
+    Return a page of games from search_games and the cursor of the next page.
+
+    The games come with their players and round counts loaded.
+    """
+    if cursor is not None:
+        start_date, pk = parse_cursor(cursor)
+        # The plain bound lets the database start the index scan at the cursor
+        games = games.filter(start_date__lte=start_date).exclude(start_date=start_date, pk__gte=pk)
+    page = list(games.prefetch_related('players')[:limit + 1])
+    next_cursor = make_cursor(page[limit - 1]) if len(page) > limit else None
+    page = page[:limit]
+
+    counts = dict(
+        Round.objects.filter(game__in=[game.pk for game in page if not game.is_archived])
+        .values_list('game').annotate(Count('pk')).order_by()
+    )
+    for game in page:
+        game.rounds_played = counts.get(game.pk, 0)
+    return page, next_cursor
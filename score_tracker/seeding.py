@@ -0,0 +1,108 @@
+"""
+Generate realistic games in bulk for benchmarks and load tests.
+
+Everything is written with bulk_create, so millions of rows can be seeded in
+minutes instead of hours.
+"""
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Game, Outcome, Player, Round
+
+TRICK_POINTS_PER_ROUND = 250
+
+
+def random_round(rng, roster):
+    """Return (round fields, {player: (meld, trick)}) for one random round."""
+    game_maker = rng.choice(roster)
+    opponents = [player for player in roster if player != game_maker]
+    bid_amount = rng.randrange(150, 410, 10)
+
+    # Split the 250 trick points between the game maker and the opponents
+    cuts = sorted(rng.randint(0, TRICK_POINTS_PER_ROUND) for _ in opponents)
+    shares = [b - a for a, b in zip([0] + cuts, cuts + [TRICK_POINTS_PER_ROUND])]
+    trick_points = shares[0]
+    meld_points = rng.randrange(0, 210, 10)
+
+    outcome = rng.random()
+    if outcome < 0.6:
+        outcome = Outcome.SUCCESS
+    elif outcome < 0.75:
+        outcome = Outcome.ABGEHEN
+    elif outcome < 0.98:
+        outcome = Outcome.DOPPELT_ABGEHEN
+    else:
+        outcome = Outcome.DURCH_FAILED
+    fields = {
+        'game_maker': game_maker,
+        'bid_amount': bid_amount,
+        'outcome': outcome,
+        'meld_points': meld_points,
+        'trick_points': trick_points,
+        'last_trick_winner': rng.choice(roster),
+    }
+    opponent_points = {
+        player: (rng.randrange(0, 160, 10), share)
+        for player, share in zip(opponents, shares[1:])
+    }
+    return fields, opponent_points
+
+
+def seed_players(count, prefix='Player'):
+    """Create count players and return them."""
+    return Player.objects.bulk_create(
+        [Player(name=f"{prefix} {index}") for index in range(1, count + 1)],
+        batch_size=1000,
+    )
+
+
+def seed_games(count, players, players_per_game=3, rounds_per_game=20,
+               tournament=None, active_ratio=1.0, seed=None, batch_size=500):
+    """
+    Create count games with random rosters drawn from players.
+
+    Games are written batch_size at a time to bound memory use.
+    Returns the number of games created.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    created = 0
+    Membership = Game.players.through
+
+    while created < count:
+        size = min(batch_size, count - created)
+        rosters = [rng.sample(players, players_per_game) for _ in range(size)]
+        games = []
+        for index in range(size):
+            start_date = now - timedelta(minutes=rng.randrange(0, 60 * 24 * 365 * 3))
+            is_active = rng.random() < active_ratio
+            games.append(Game(
+                name=f"Game {created + index + 1}",
+                start_date=start_date,
+                end_date=None if is_active else start_date + timedelta(hours=3),
+                is_active=is_active,
+                tournament=tournament,
+            ))
+        games = Game.objects.bulk_create(games)
+
+        Membership.objects.bulk_create([
+            Membership(game=game, player=player)
+            for game, roster in zip(games, rosters)
+            for player in roster
+        ], batch_size=5000)
+
+        rounds = []
+        for game, roster in zip(games, rosters):
+            for round_number in range(1, rounds_per_game + 1):
+                fields, opponent_points = random_round(rng, roster)
+                round_obj = Round(game=game, round_number=round_number, **fields)
+                for player, (meld, trick) in opponent_points.items():
+                    round_obj.set_opponent_points(player.id, meld, trick)
+                rounds.append(round_obj)
+        Round.objects.bulk_create(rounds, batch_size=5000)
+
+        created += size
+
+    return created
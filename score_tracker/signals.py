@@ -0,0 +1,104 @@
+"""
+Keeping derived data in step with the games and rounds.
+
+The receivers drop the cached tournament standings and the snapshots that
+a saved or deleted game or round makes stale. Bulk operations that bypass
+the per-row signals (QuerySet.update(), bulk_update(), delete_rows()) call
+invalidate_games() for the games they touched instead, or
+invalidate_all_games() when they replace the whole data set.
+"""
+from django.db import connections, router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Game, Round, Tournament
+from .scoring import invalidate_tournament_standings
+from .snapshots import delete_all_snapshots, delete_snapshot
+
+
+def invalidate_games(game_ids):
+    """Do what the receivers do for changed rounds, once for every game in game_ids."""
+    game_ids = list(game_ids)
+    tournament_ids = set(
+        Game.objects.filter(pk__in=game_ids, tournament__isnull=False).values_list('tournament_id', flat=True)
+    )
+    for tournament_id in tournament_ids:
+        invalidate_tournament_standings(tournament_id)
+    for game_id in game_ids:
+        delete_snapshot(game_id)
+
+
+def invalidate_all_games():
+    """
+    invalidate_games() for every game, without loading their ids.
+
+    One cache key per tournament and a single removal of the snapshot
+    directory, so the work does not grow with the number of games.
+    """
+    for tournament_id in Tournament.objects.values_list('pk', flat=True).iterator():
+        invalidate_tournament_standings(tournament_id)
+    delete_all_snapshots()
+
+
+def delete_rows(queryset):
+    """
+    Delete the rows of queryset with a single DELETE, without signals.
+
+    QuerySet.delete() loads every row and sends post_delete for each one
+    when receivers are connected, as they are for Game and Round. For bulk
+    deletions callers use this instead and call invalidate_games(), unless
+    what they delete leaves the pages unchanged. Only for models nothing
+    cascades to: no related rows are collected. Returns the rows deleted.
+    """
+    model = queryset.model
+    connection = connections[router.db_for_write(model)]
+    sql, params = queryset.values('pk').query.get_compiler(connection=connection).as_sql()
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({sql})", params)
+        return cursor.rowcount
+
+
+def _game_changed(game_id, edited=True):
+    tournament_id, is_active = Game.objects.filter(pk=game_id).values_list(
+        'tournament_id', 'is_active').first() or (None, True)
+    if edited and tournament_id is not None:
+        invalidate_tournament_standings(tournament_id)
+    if not is_active:
+        delete_snapshot(game_id)
+
+
+@receiver(post_save, sender=Round)
+def round_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    New rounds are picked up incrementally, edits to old ones are not.
+
+    Saving a Score saves its round, so edited scores end up here as well.
+    Any change to a completed game drops its snapshot.
+    """
+    if not raw:
+        _game_changed(instance.game_id, edited=not created)
+
+
+@receiver(post_delete, sender=Round)
+def round_deleted(sender, instance, **kwargs):
+    _game_changed(instance.game_id)
+
+
+# What archive_game saves: how the rounds are stored, not what the page shows
+ARCHIVE_FIELDS = frozenset({'archive', 'final_standings', 'is_archived', 'updated_at'})
+
+
+@receiver(post_save, sender=Game)
+def game_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Whatever the new state: a reactivated game must not be served from its
+    # old snapshot. Games loaded without their deferred archive are saved
+    # with update_fields too, so only archiving itself is told apart.
+    if not raw and not (update_fields and update_fields <= ARCHIVE_FIELDS):
+        delete_snapshot(instance.pk)
+
+
+@receiver(post_delete, sender=Game)
+def game_deleted(sender, instance, **kwargs):
+    delete_snapshot(instance.pk)
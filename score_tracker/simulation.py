@@ -0,0 +1,179 @@
+"""
+Monte Carlo projection of who reaches the next 1000 points.
+
+The remaining rounds of a game are played out many times from the current
+standings. Each simulated round picks a game maker (weighted by how often each
+player made the game historically) and draws the game maker's result and the
+opponents' points from that player's own history of rounds.
+Opponents' points are drawn independently, so the 250 trick points of a
+simulated round do not add up exactly.
+"""
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.cache import cache
+
+from .models import Game, Round
+from .scoring import ROUND_WIN_POINTS, game_maker_points, get_standings_for_games
+
+DEFAULT_PLAYOUTS = 10000
+DEFAULT_HORIZON = 10
+MAX_PLAYOUTS = 200000
+MAX_HORIZON = 50
+# Playouts times horizon a web request may ask for: about a second on one core
+MAX_PLAYOUT_ROUNDS = 200000
+CHUNK_SIZE = 1000
+CACHE_TIMEOUT = 60 * 60
+
+
+class NotEnoughHistory(Exception):
+    """Raised when there are no played rounds to draw results from."""
+
+
+def load_history(player_ids):
+    """
+    Return the result distributions of the given players.
+
+    Returns (maker_points, opponent_points), each mapping player id to a list
+    of points that player scored in past rounds as game maker or opponent.
+    """
+    maker_points = {player_id: [] for player_id in player_ids}
+    opponent_points = {player_id: [] for player_id in player_ids}
+    rounds = Round.objects.filter(game_maker_id__in=player_ids).values(
+        'game_maker_id', 'bid_amount', 'outcome', 'meld_points', 'trick_points',
+    )
+    for round_row in rounds.iterator():
+        maker_points[round_row['game_maker_id']].append(game_maker_points(round_row))
+    # Opponent points are kept on the rounds of the games these players joined
+    keys = {str(player_id): player_id for player_id in player_ids}
+    played = Round.objects.filter(
+        game__in=Game.players.through.objects.filter(player_id__in=player_ids).values('game_id')
+    ).values_list('opponent_points', flat=True)
+    for points in played.iterator():
+        for key, (meld_points, trick_points) in points.items():
+            if key in keys:
+                opponent_points[keys[key]].append(meld_points + trick_points)
+    return maker_points, opponent_points
+
+
+def run_playouts(start_scores, maker_weights, maker_points, opponent_points, horizon, playouts, seed):
+    """
+    Play out horizon rounds playouts times and count who crosses the next 1000.
+
+    All arguments are plain lists indexed by player position so the function
+    can run in a worker process without touching the database.
+    """
+    rng = random.Random(seed)
+    players = range(len(start_scores))
+    hits = [0] * len(start_scores)
+    for _ in range(playouts):
+        scores = list(start_scores)
+        reached = [False] * len(start_scores)
+        for _ in range(horizon):
+            game_maker = rng.choices(players, maker_weights)[0]
+            for index in players:
+                if index == game_maker:
+                    scores[index] += rng.choice(maker_points[index])
+                else:
+                    scores[index] += rng.choice(opponent_points[index])
+                if scores[index] >= ROUND_WIN_POINTS:
+                    reached[index] = True
+                    scores[index] %= ROUND_WIN_POINTS
+        for index in players:
+            hits[index] += reached[index]
+    return hits
+
+
+_worker_inputs = None
+
+
+def _init_worker(inputs):
+    # Sent once per worker process instead of once per chunk
+    global _worker_inputs
+    _worker_inputs = inputs
+
+
+def _run_chunk(chunk):
+    return run_playouts(*_worker_inputs, *chunk)
+
+
+def simulate(start_scores, maker_points, opponent_points, playouts=DEFAULT_PLAYOUTS,
+             horizon=DEFAULT_HORIZON, seed=0, workers=None):
+    """
+    Estimate for every player the probability to reach the next 1000.
+
+    Playouts are split into fixed-size chunks with their own derived seed, so
+    results only depend on the seed, never on the number of worker processes.
+    Returns a list of probabilities in the order of start_scores.
+    """
+    pooled_maker = [points for history in maker_points for points in history]
+    pooled_opponent = [points for history in opponent_points for points in history]
+    if not pooled_maker or not pooled_opponent:
+        raise NotEnoughHistory("No rounds have been played by these players yet.")
+
+    # Players without history of their own draw from everybody's results
+    maker_weights = [len(history) + 1 for history in maker_points]
+    maker_points = [history or pooled_maker for history in maker_points]
+    opponent_points = [history or pooled_opponent for history in opponent_points]
+
+    inputs = (start_scores, maker_weights, maker_points, opponent_points, horizon)
+    chunks = [
+        (min(CHUNK_SIZE, playouts - start), f"{seed}:{start // CHUNK_SIZE}")
+        for start in range(0, playouts, CHUNK_SIZE)
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) == 1:
+        results = [run_playouts(*inputs, *chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(inputs,)) as executor:
+            results = list(executor.map(_run_chunk, chunks))
+
+    hits = [0] * len(start_scores)
+    for chunk_hits in results:
+        hits = [total + chunk for total, chunk in zip(hits, chunk_hits)]
+    return [count / playouts for count in hits]
+
+
+def project_game(game, playouts=DEFAULT_PLAYOUTS, horizon=DEFAULT_HORIZON, seed=0, workers=None):
+    """
+    Return the win projection of a game, cached per game and round number.
+
+    The result lists every player with the current score, rounds won and the
+    probability of reaching the next 1000 within horizon rounds.
+    """
+    round_count = game.rounds.count()
+    key = f'win-projection:{game.pk}:{round_count}:{playouts}:{horizon}:{seed}'
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    standings = get_standings_for_games([game])[game.pk]
+    player_ids = list(standings)
+    maker_points, opponent_points = load_history(player_ids)
+    probabilities = simulate(
+        [standings[pid]['score'] for pid in player_ids],
+        [maker_points[pid] for pid in player_ids],
+        [opponent_points[pid] for pid in player_ids],
+        playouts=playouts, horizon=horizon, seed=seed, workers=workers,
+    )
+    result = {
+        'game': game.pk,
+        'round': round_count,
+        'playouts': playouts,
+        'horizon': horizon,
+        'seed': seed,
+        'players': [
+            {
+                'id': pid,
+                'name': standings[pid]['player'].name,
+                'score': standings[pid]['score'],
+                'rounds_won': standings[pid]['rounds_won'],
+                'probability': probability,
+            }
+            for pid, probability in zip(player_ids, probabilities)
+        ],
+    }
+    cache.set(key, result, CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,158 @@
+"""
+Pre-rendered pages of completed games.
+
+A completed game does not change any more, so its game_detail page is
+rendered once into SNAPSHOT_ROOT, next to a JSON twin with the standings
+and all rounds, and compressed the way WhiteNoise expects:
+
+    games/<id>/index.html (+ .gz, .br)
+    games/<id>/index.json (+ .gz, .br)
+    games/<id>/timeline.json (+ .gz, .br), served as /games/<id>/timeline/
+
+binokel_project.middleware.SnapshotMiddleware serves these files instead
+of calling the view. Snapshots are written when a game is ended and by
+``manage.py snapshot_games``, and removed again when the game or one of
+its rounds changes.
+"""
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.urls import reverse
+from whitenoise.compress import Compressor
+
+from .models import Game
+from .scoring import get_standings_for_games
+from .timeline import score_timeline
+
+CHUNK_SIZE = 50
+
+
+def snapshot_dir(game_id):
+    return os.path.join(settings.SNAPSHOT_ROOT, 'games', str(game_id))
+
+
+def snapshot_data(game):
+    """The JSON twin of a completed game's page."""
+    standings = get_standings_for_games([game])[game.pk]
+    return {
+        'id': game.pk,
+        'name': game.name,
+        'tournament': game.tournament_id,
+        'start_date': game.start_date,
+        'end_date': game.end_date,
+        'players': [
+            {'id': player_id, 'name': data['player'].name,
+             'score': data['score'], 'rounds_won': data['rounds_won']}
+            for player_id, data in standings.items()
+        ],
+        'rounds': [
+            {
+                'round_number': round_obj.round_number,
+                'game_maker': round_obj.game_maker_id,
+                'bid_amount': round_obj.bid_amount,
+                'outcome': round_obj.outcome,
+                'meld_points': round_obj.meld_points,
+                'trick_points': round_obj.trick_points,
+                'last_trick_winner': round_obj.last_trick_winner_id,
+                'opponent_points': round_obj.opponent_points,
+            }
+            for round_obj in game.get_rounds()
+        ],
+    }
+
+
+def _write_file(directory, name, content, compressor):
+    # Write next to the target and rename, so readers never see half a file
+    path = os.path.join(directory, name)
+    temporary = os.path.join(directory, f'.{name}.tmp')
+    with open(temporary, 'wb') as f:
+        f.write(content)
+    suffixes = set()
+    for compressed in compressor.compress(temporary):
+        suffix = compressed[len(temporary):]
+        os.replace(compressed, path + suffix)
+        suffixes.add(suffix)
+    for stale in {'.gz', '.br'} - suffixes:
+        if os.path.exists(path + stale):
+            os.remove(path + stale)
+    os.replace(temporary, path)
+    return len(content)
+
+
+def write_snapshot(game):
+    """
+    Render the page, JSON twin and timeline of a completed game to SNAPSHOT_ROOT.
+
+    Returns the number of bytes written (uncompressed).
+    """
+    # Imported here: django.test would add ~40 ms to every worker's boot
+    from django.test import RequestFactory
+
+    from .views import game_detail
+
+    if game.is_active:
+        raise ValueError(f"Game {game.pk} is still active and cannot be snapshotted.")
+
+    path = reverse('score_tracker:game_detail', args=[game.pk])
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    html = game_detail(request, pk=game.pk).content
+    data = json.dumps(snapshot_data(game), cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    timeline = json.dumps(score_timeline(game), separators=(',', ':')).encode()
+
+    directory = snapshot_dir(game.pk)
+    os.makedirs(directory, exist_ok=True)
+    compressor = Compressor(quiet=True)
+    return (
+        _write_file(directory, 'index.html', html, compressor)
+        + _write_file(directory, 'index.json', data, compressor)
+        + _write_file(directory, 'timeline.json', timeline, compressor)
+    )
+
+
+def delete_snapshot(game_id):
+    """Remove the snapshot of a game, if there is one."""
+    shutil.rmtree(snapshot_dir(game_id), ignore_errors=True)
+
+
+def delete_all_snapshots():
+    """Remove the snapshots of all games at once."""
+    shutil.rmtree(os.path.join(settings.SNAPSHOT_ROOT, 'games'), ignore_errors=True)
+
+
+def _init_worker():
+    # Forked workers must not share the parent's database connections
+    django.setup()
+    connections.close_all()
+
+
+def _snapshot_chunk(game_ids):
+    written = 0
+    for game in Game.objects.filter(pk__in=game_ids, is_active=False):
+        written += write_snapshot(game)
+    return len(game_ids), written
+
+
+def write_snapshots(game_ids, workers=None):
+    """
+    Snapshot many completed games, split into chunks over a pool of processes.
+
+    Yields (games, bytes written) per finished chunk.
+    """
+    chunks = [game_ids[start:start + CHUNK_SIZE] for start in range(0, len(game_ids), CHUNK_SIZE)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield _snapshot_chunk(chunk)
+        return
+
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        yield from executor.map(_snapshot_chunk, chunks)
@@ -0,0 +1,49 @@
+"""
+Closing abandoned games.
+
+A game nobody ends stays active forever and shows up in every count and
+list of active games. A game is stale once it started before the cutoff
+and no round has been entered since; close_stale_games ends stale games
+the way Game.end_game does, including their head-to-head statistics, but
+with one UPDATE per batch instead of a save per game.
+``manage.py close_stale_games`` runs it, from cron for example.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .headtohead import record_games
+from .models import Game, Round
+
+BATCH_SIZE = 500
+
+
+def stale_games(cutoff):
+    """Active games started before cutoff without a round entered since."""
+    # Correlated per game, so the (game, round_number) index does the work
+    recent_rounds = Round.objects.filter(game=OuterRef('pk'), created_at__gte=cutoff)
+    return Game.objects.filter(is_active=True, start_date__lt=cutoff).exclude(Exists(recent_rounds))
+
+
+def close_stale_games(idle, batch_size=BATCH_SIZE, now=None):
+    """
+    End every game without a new round for the timedelta idle.
+
+    Games are closed batch_size at a time, so no single statement holds
+    its locks for long. Yields the ids of the games closed by every batch.
+    """
+    now = now or timezone.now()
+    stale = stale_games(now - idle)
+    last_pk = 0
+    while True:
+        game_ids = list(stale.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not game_ids:
+            return
+        last_pk = game_ids[-1]
+        with transaction.atomic():
+            # One statement per batch, with the stale check applied again: a
+            # round may have come in since the ids were read
+            stale.filter(pk__in=game_ids).update(is_active=False, end_date=now, updated_at=now)
+            closed = list(Game.objects.filter(pk__in=game_ids, is_active=False, end_date=now))
+            record_games(closed)
+        yield [game.pk for game in closed]
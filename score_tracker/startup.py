@@ -0,0 +1,82 @@
+"""
+Cold-start profile of the project.
+
+Every measurement starts a fresh interpreter that imports one of TARGETS
+under a given settings module, the way a gunicorn worker or manage.py
+starts. Wall time and peak resident memory come from plain runs; one
+extra run with ``python -X importtime`` tells which modules the time
+goes to.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+TARGETS = {
+    # What a WSGI worker imports before it serves its first request
+    'wsgi': 'import binokel_project.wsgi',
+    # What every manage.py command pays before it runs
+    'setup': 'import django; django.setup()',
+}
+
+# Printed by the child after the import
+REPORT = "import resource, sys; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, len(sys.modules))"
+
+
+def _run(settings_module, code, importtime=False):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    start = time.perf_counter()
+    result = subprocess.run(command, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode:
+        raise RuntimeError(f"Starting with {settings_module} failed:\n{result.stderr}")
+    return elapsed, result
+
+
+def parse_importtime(output):
+    """Return [(module, self µs, cumulative µs)] from the output of -X importtime."""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def by_package(imports):
+    """Sum the self time of the imports per top-level package, largest first."""
+    totals = defaultdict(int)
+    for name, self_us, _ in imports:
+        totals[name.split('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def profile_startup(settings_module, target='wsgi', repeat=5):
+    """
+    Start repeat fresh interpreters importing TARGETS[target] and profile one more.
+
+    Returns {'ms': median wall time, 'rss_kb': median peak RSS, 'modules':
+    modules loaded, 'imports': [(module, self µs, cumulative µs)]}.
+    """
+    code = f"{TARGETS[target]}\n{REPORT}"
+    timings = []
+    memory = []
+    modules = 0
+    for _ in range(repeat):
+        elapsed, result = _run(settings_module, code)
+        rss_kb, modules = map(int, result.stdout.split()[-2:])
+        timings.append(elapsed)
+        memory.append(rss_kb)
+    _, result = _run(settings_module, code, importtime=True)
+    return {
+        'ms': statistics.median(timings),
+        'rss_kb': statistics.median(memory),
+        'modules': modules,
+        'imports': parse_importtime(result.stderr),
+    }
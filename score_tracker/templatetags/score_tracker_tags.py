@@ -2,6 +2,7 @@ from django import template
 
 register = template.Library()
 
+
 @register.filter
 def get_field_by_name(form, field_name):
     """
@@ -13,6 +14,7 @@ def get_field_by_name(form, field_name):
     except:
         return None
 
+
 @register.filter
 def add(value, arg):
     """
@@ -22,4 +24,38 @@ def add(value, arg):
     try:
         return str(value) + str(arg)
     except (ValueError, TypeError):
-        return value
\ No newline at end of file
+        return value
+
+
+def _point_field(form, name):
+    """Values for the number input of one points field, marked up like bootstrap_field."""
+    field = form[name]
+    css_class = 'form-control'
+    if field.errors:
+        css_class += ' is-invalid'
+    elif form.is_bound:
+        css_class += ' is-valid'
+    value = field.field.widget.format_value(field.value())
+    return {
+        'name': field.html_name,
+        'id': field.auto_id,
+        'label': field.label,
+        'value': value,
+        'min_value': field.field.min_value,
+        'css_class': css_class,
+        'errors': field.errors,
+    }
+
+
+@register.inclusion_tag('score_tracker/_player_points_fields.html')
+def player_points_fields(form, players):
+    """
+    Renders the meld and trick points fields of every player in one pass.
+    Usage: {% player_points_fields form game.roster %}
+    """
+    rows = []
+    for player in players:
+        names = [f'player_{player.id}_meld_points', f'player_{player.id}_trick_points']
+        if all(name in form.fields for name in names):
+            rows.append({'player': player, 'fields': [_point_field(form, name) for name in names]})
+    return {'rows': rows}
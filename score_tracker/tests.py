@@ -1,10 +1,71 @@
-from django.test import TestCase, Client
+import gzip
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import zlib
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F, Q
+from django.http import HttpResponse
+from django.template import engines
+from django.templatetags.static import static
+from django.db.migrations.executor import MigrationExecutor
+from django.core.servers.basehttp import WSGIServer
+from django.test import TestCase, SimpleTestCase, TransactionTestCase, LiveServerTestCase, Client, RequestFactory
+from django.test.testcases import LiveServerThread, QuietWSGIRequestHandler
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth.models import User
 from datetime import datetime, timedelta
-from .models import Player, Game, Round, Score
-from .forms import GameForm, RoundForm
+from .models import Outcome, Player, PlayerPairStats, Game, Round, Score, Tournament, outcome_from_flags
+from .forms import MAX_BATCH_ROUNDS, GameForm, GameSearchForm, HeadToHeadForm, RoundForm
+from .archive import archive_game, unpack_rounds
+from .assets import trim_css, used_class_names
+from .backup import BackupError, restore_backup, write_backup
+from .fuzzing import fuzz
+from .headtohead import head_to_head_matrix, pair_results, rebuild_pair_stats, record_games
+from .loadtest import GAME_CREATE_PATH, GAME_DETAIL_PATH, ROUND_CREATE_PATH, percentile, round_data, run_load
+from .scoring import (
+    apply_round, game_maker_points, get_leader, get_standings_for_games, get_tournament_standings, iter_rounds,
+    rank_players, scoring_rules,
+)
+from .seeding import seed_games, seed_players
+from .snapshots import delete_snapshot, snapshot_dir, write_snapshot
+from .startup import by_package, parse_importtime, profile_startup
+from .timeline import downsample, score_timeline
+from .search import InvalidCursor, get_page, make_cursor, parse_cursor, search_games
+from .stale import close_stale_games, stale_games
+from .simulation import MAX_HORIZON, MAX_PLAYOUT_ROUNDS, NotEnoughHistory, project_game, simulate
+from binokel_project.middleware import ReplicaPinningMiddleware, PRIMARY_COOKIE_NAME
+from binokel_project.routers import PrimaryReplicaRouter, pin_to_primary, unpin
+
+
+# Ended games get snapshots; keep them out of the project. Tests that write
+# one delete it again, the next test may reuse the game's primary key.
+_snapshot_root = tempfile.TemporaryDirectory()
+_snapshot_settings = override_settings(SNAPSHOT_ROOT=_snapshot_root.name)
+
+
+def setUpModule():
+    _snapshot_settings.enable()
+
+
+def tearDownModule():
+    _snapshot_settings.disable()
+    _snapshot_root.cleanup()
 
 
 class PlayerModelTest(TestCase):
@@ -520,6 +581,7 @@ class ViewTests(TestCase):
         self.assertTrue(self.game.is_active)
         
         response = self.client.post(reverse('score_tracker:end_game', args=[self.game.pk]))
+        self.addCleanup(delete_snapshot, self.game.pk)
         self.assertEqual(response.status_code, 302)  # Redirect to game detail
         
         # Check that the game was ended
@@ -776,3 +838,1841 @@ class IntegrationTests(TestCase):
         game.end_game()
         self.assertFalse(game.is_active)
         self.assertIsNotNone(game.end_date)
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    """Test read-replica routing and read-your-writes pinning."""
+    
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+    
+    def test_reads_use_primary_without_replicas(self):
+        """Test that reads stay on the primary when no replicas are configured."""
+        with self.settings(REPLICA_DATABASES=[]):
+            self.assertEqual(self.router.db_for_read(Game), 'default')
+    
+    def test_reads_use_replica(self):
+        """Test that reads are routed to a replica."""
+        with self.settings(REPLICA_DATABASES=['replica_1']):
+            self.assertEqual(self.router.db_for_read(Game), 'replica_1')
+            self.assertEqual(self.router.db_for_write(Game), 'default')
+    
+    def test_pinned_reads_use_primary(self):
+        """Test that pinned requests read from the primary."""
+        with self.settings(REPLICA_DATABASES=['replica_1']):
+            token = pin_to_primary()
+            try:
+                self.assertEqual(self.router.db_for_read(Game), 'default')
+            finally:
+                unpin(token)
+            self.assertEqual(self.router.db_for_read(Game), 'replica_1')
+    
+    def test_reads_in_transaction_use_primary(self):
+        """Test that reads inside an atomic block read from the primary."""
+        with self.settings(REPLICA_DATABASES=['replica_1']):
+            with patch.object(connections['default'], 'in_atomic_block', True):
+                self.assertEqual(self.router.db_for_read(Game), 'default')
+    
+    def test_replicas_are_not_migrated(self):
+        """Test that migrations only run against the primary."""
+        with self.settings(REPLICA_DATABASES=['replica_1']):
+            self.assertTrue(self.router.allow_migrate('default', 'score_tracker'))
+            self.assertFalse(self.router.allow_migrate('replica_1', 'score_tracker'))
+    
+    def _route_read(self, request):
+        """Run the pinning middleware and return where a read would be routed."""
+        seen = {}
+        
+        def get_response(request):
+            seen['db'] = self.router.db_for_read(Game)
+            return HttpResponse()
+        
+        with self.settings(REPLICA_DATABASES=['replica_1']):
+            response = ReplicaPinningMiddleware(get_response)(request)
+        return seen['db'], response
+    
+    def test_write_request_pins_and_sets_cookie(self):
+        """Test that a POST reads from the primary and pins the follow-up requests."""
+        db, response = self._route_read(self.factory.post('/games/1/round/new/'))
+        self.assertEqual(db, 'default')
+        self.assertIn(PRIMARY_COOKIE_NAME, response.cookies)
+    
+    def test_read_request_after_write_uses_primary(self):
+        """Test that the redirect after a write still reads from the primary."""
+        request = self.factory.get('/games/1/')
+        request.COOKIES[PRIMARY_COOKIE_NAME] = '1'
+        db, response = self._route_read(request)
+        self.assertEqual(db, 'default')
+        self.assertNotIn(PRIMARY_COOKIE_NAME, response.cookies)
+    
+    def test_plain_read_request_uses_replica(self):
+        """Test that ordinary reads go to the replica."""
+        db, response = self._route_read(self.factory.get('/games/1/'))
+        self.assertEqual(db, 'replica_1')
+
+
+class TournamentTests(TestCase):
+    """Test batched scoring and tournament standings."""
+    
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.create(name="Spring Cup")
+        self.players = seed_players(9, prefix="Tournament Player")
+        seed_games(3, self.players, rounds_per_game=12, tournament=self.tournament, seed=7)
+        self.games = list(self.tournament.games.all())
+    
+    def assertMatchesReference(self, standings, game):
+        """Check batched standings against Game.get_current_score()."""
+        expected = game.get_current_score()
+        self.assertEqual(
+            {pid: (data['score'], data['rounds_won']) for pid, data in standings.items()},
+            {pid: (data['score'], data['rounds_won']) for pid, data in expected.items()},
+        )
+    
+    def test_batch_standings_match_reference(self):
+        """Test that the batch scorer agrees with get_current_score()."""
+        standings = get_standings_for_games(self.games)
+        for game in self.games:
+            self.assertMatchesReference(standings[game.pk], game)
+    
+    def test_batch_standings_query_count_is_fixed(self):
+        """Test that batch scoring does not issue queries per game."""
+        with self.assertNumQueries(2):
+            get_standings_for_games(self.games)
+        seed_games(5, self.players, rounds_per_game=12, tournament=self.tournament, seed=8)
+        games = list(self.tournament.games.all())
+        with self.assertNumQueries(2):
+            get_standings_for_games(games)
+    
+    def test_tournament_standings_refresh_incrementally(self):
+        """Test that new rounds are added to the cached standings."""
+        get_tournament_standings(self.tournament)
+        game = self.games[0]
+        roster = list(game.players.all())
+        Round.objects.create(
+            game=game, round_number=13, game_maker=roster[0],
+            bid_amount=900, is_success=True, meld_points=100, trick_points=100
+        )
+        
+        with self.assertNumQueries(5):
+            tables = get_tournament_standings(self.tournament)
+        self.assertEqual(tables[game.pk]['rounds_played'], 13)
+        for table_game in self.games:
+            self.assertMatchesReference(tables[table_game.pk]['scores'], table_game)
+    
+    def test_tournament_standings_without_new_rounds(self):
+        """Test that a refresh without new rounds does not read any rounds."""
+        get_tournament_standings(self.tournament)
+        with self.assertNumQueries(3):
+            get_tournament_standings(self.tournament)
+    
+    def test_edited_score_invalidates_standings(self):
+        """Test that editing an old score forces a full recount."""
+        get_tournament_standings(self.tournament)
+        score = Score.objects.filter(round__game=self.games[0]).first()
+        score.meld_points += 500
+        score.save()
+        
+        tables = get_tournament_standings(self.tournament)
+        self.assertMatchesReference(tables[self.games[0].pk]['scores'], self.games[0])
+    
+    def test_changes_from_other_processes(self):
+        """Test that rounds edited or deleted without this process's signals still force a recount."""
+        get_tournament_standings(self.tournament)
+        game = self.games[0]
+        later = timezone.now() + timedelta(seconds=1)
+        # QuerySet.update() sends no signals, like a save in another worker
+        Round.objects.filter(game=game, round_number=1).update(bid_amount=F('bid_amount') + 500, updated_at=later)
+        tables = get_tournament_standings(self.tournament)
+        self.assertMatchesReference(tables[game.pk]['scores'], game)
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {Round._meta.db_table} WHERE game_id = %s AND round_number = 2", [game.pk],
+            )
+        tables = get_tournament_standings(self.tournament)
+        self.assertMatchesReference(tables[game.pk]['scores'], game)
+    
+    def test_rank_players(self):
+        """Test that the overall ranking orders by rounds won, then score."""
+        ranking = rank_players(get_tournament_standings(self.tournament))
+        self.assertEqual(len(ranking), len({p.id for g in self.games for p in g.players.all()}))
+        keys = [(entry['rounds_won'], entry['score']) for entry in ranking]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+    
+    def test_tournament_detail_view(self):
+        """Test the tournament standings view."""
+        response = self.client.get(reverse('score_tracker:tournament_detail', args=[self.tournament.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Spring Cup")
+        self.assertEqual(len(response.context['tables']), 3)
+    
+    def test_tournament_list_view(self):
+        """Test the tournament list view."""
+        response = self.client.get(reverse('score_tracker:tournament_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Spring Cup")
+
+
+class SimulationTests(TestCase):
+    """Test the Monte Carlo win projection."""
+    
+    def setUp(self):
+        cache.clear()
+        self.players = seed_players(6, prefix="Simulated Player")
+        seed_games(4, self.players, rounds_per_game=15, seed=3)
+        self.game = Game.objects.first()
+    
+    def test_simulation_is_reproducible(self):
+        """Test that the same seed gives the same result, however many workers run."""
+        args = ([900, 0, -200], [[100, -300], [50], []], [[40, 80], [], [120]])
+        first = simulate(*args, playouts=3000, horizon=5, seed=42, workers=1)
+        self.assertEqual(first, simulate(*args, playouts=3000, horizon=5, seed=42, workers=1))
+        self.assertEqual(first, simulate(*args, playouts=3000, horizon=5, seed=42, workers=2))
+        self.assertNotEqual(first, simulate(*args, playouts=3000, horizon=5, seed=43, workers=1))
+    
+    def test_simulation_probabilities(self):
+        """Test that a player who always scores 1000 certainly reaches it."""
+        probabilities = simulate([0, 0, 0], [[1000], [0], [0]], [[1000], [0], [0]],
+                                 playouts=100, horizon=1, workers=1)
+        self.assertEqual(probabilities, [1.0, 0.0, 0.0])
+    
+    def test_simulation_without_history(self):
+        """Test that a projection needs played rounds."""
+        with self.assertRaises(NotEnoughHistory):
+            simulate([0, 0, 0], [[], [], []], [[], [], []], workers=1)
+    
+    def test_project_game_is_cached_per_round(self):
+        """Test that projections are cached until the next round is added."""
+        projection = project_game(self.game, playouts=500, workers=1)
+        self.assertEqual(len(projection['players']), 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(project_game(self.game, playouts=500, workers=1), projection)
+    
+    def test_projection_view(self):
+        """Test the projection endpoint."""
+        url = reverse('score_tracker:game_projection', args=[self.game.pk])
+        with patch('score_tracker.simulation.ProcessPoolExecutor', side_effect=AssertionError):
+            response = self.client.get(url, {'playouts': 5000, 'horizon': 3})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['round'], 15)
+        for player in data['players']:
+            self.assertTrue(0 <= player['probability'] <= 1)
+    
+    def test_projection_view_limits(self):
+        """Test that the horizon and the total work of a request are capped."""
+        url = reverse('score_tracker:game_projection', args=[self.game.pk])
+        data = self.client.get(url, {'horizon': 10 ** 9, 'playouts': 10 ** 9, 'seed': 7}).json()
+        self.assertEqual(data['horizon'], MAX_HORIZON)
+        self.assertEqual(data['playouts'], MAX_PLAYOUT_ROUNDS // MAX_HORIZON)
+    
+    def test_projection_view_invalid_parameters(self):
+        """Test that invalid parameters are rejected."""
+        url = reverse('score_tracker:game_projection', args=[self.game.pk])
+        self.assertEqual(self.client.get(url, {'playouts': 'many'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'horizon': 0}).status_code, 400)
+
+
+class ArchiveTests(TestCase):
+    """Test archiving completed games."""
+    
+    def setUp(self):
+        cache.clear()
+        self.players = seed_players(6, prefix="Archived Player")
+        seed_games(2, self.players, rounds_per_game=25, active_ratio=0, seed=5)
+        self.game = Game.objects.first()
+        self.expected_scores = self.game.get_current_score()
+        self.expected_rounds = list(
+            self.game.rounds.order_by('round_number').values_list(
+                'round_number', 'game_maker_id', 'bid_amount', 'outcome',
+                'meld_points', 'trick_points', 'last_trick_winner_id'
+            )
+        )
+        self.expected_score_rows = sorted(
+            Score.objects.filter(round__game=self.game).values_list(
+                'round__round_number', 'player_id', 'meld_points', 'trick_points'
+            )
+        )
+    
+    def archive(self):
+        archive_game(self.game)
+        return Game.objects.get(pk=self.game.pk)
+    
+    def test_archive_removes_rows(self):
+        """Test that archiving replaces the Round and Score rows."""
+        game = self.archive()
+        self.assertTrue(game.is_archived)
+        self.assertFalse(Round.objects.filter(game=game).exists())
+        self.assertFalse(Score.objects.filter(round__game=game).exists())
+        self.assertEqual(game.round_count, 25)
+    
+    def test_archive_keeps_snapshot(self):
+        """Test that deleting the archived rows leaves the unchanged page's snapshot in place."""
+        with tempfile.TemporaryDirectory() as root, override_settings(SNAPSHOT_ROOT=root):
+            write_snapshot(self.game)
+            self.archive()
+            self.assertTrue(os.path.exists(os.path.join(snapshot_dir(self.game.pk), 'index.html')))
+    
+    def test_archive_round_trip(self):
+        """Test that unpacked rounds and scores match the original rows."""
+        game = self.archive()
+        rounds = game.get_rounds()
+        self.assertEqual(
+            [(r.round_number, r.game_maker_id, r.bid_amount, r.outcome,
+              r.meld_points, r.trick_points, r.last_trick_winner_id)
+             for r in rounds],
+            self.expected_rounds,
+        )
+        self.assertEqual(
+            sorted((r.round_number, s.player_id, s.meld_points, s.trick_points)
+                   for r in rounds for s in r.archived_scores),
+            self.expected_score_rows,
+        )
+    
+    def test_archived_scores(self):
+        """Test that archived games keep their final standings."""
+        game = self.archive()
+        self.assertEqual(game.get_current_score(), self.expected_scores)
+        self.assertEqual(get_standings_for_games([game])[game.pk], self.expected_scores)
+    
+    def test_archive_is_loaded_lazily(self):
+        """Test that the archive blob is only loaded when rounds are needed."""
+        self.archive()
+        game = Game.objects.get(pk=self.game.pk)
+        self.assertIn('archive', game.get_deferred_fields())
+        game.get_rounds()
+        self.assertNotIn('archive', game.get_deferred_fields())
+    
+    def test_active_game_cannot_be_archived(self):
+        """Test that active games are not archived."""
+        game = Game.objects.create(name="Still Playing")
+        with self.assertRaises(ValueError):
+            archive_game(game)
+    
+    def test_archived_game_cannot_be_reactivated(self):
+        """Test that validation and the admin keep an archived game completed."""
+        archive_game(self.game)
+        game = Game.objects.get(pk=self.game.pk)
+        game.is_active = True
+        with self.assertRaisesMessage(ValidationError, "cannot be reactivated"):
+            game.full_clean()
+        
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        url = reverse('admin:score_tracker_game_change', args=[self.game.pk])
+        self.assertNotContains(self.client.get(url), 'name="is_active"')
+        response = self.client.post(url, {
+            'name': self.game.name, 'is_active': 'on',
+            'players': list(self.game.players.values_list('pk', flat=True)),
+            'start_date_0': '2026-01-01', 'start_date_1': '12:00:00', 'tournament': '',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Game.objects.get(pk=self.game.pk).is_active)
+    
+    def test_archived_game_detail_view(self):
+        """Test that archived games are still shown in full."""
+        self.archive()
+        response = self.client.get(reverse('score_tracker:game_detail', args=[self.game.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Archived")
+        self.assertEqual([r.round_number for r in response.context['rounds']], list(range(25, 5, -1)))
+        self.assertEqual(response.context['scores'], self.expected_scores)
+    
+    def test_archive_games_command(self):
+        """Test the archive_games management command."""
+        out = StringIO()
+        call_command('archive_games', stdout=out)
+        self.assertIn("Archived 2 games", out.getvalue())
+        self.assertFalse(Round.objects.exists())
+
+
+class RoundHistoryPaginationTests(TestCase):
+    """Test the keyset-paginated round history on game_detail."""
+    
+    def setUp(self):
+        players = seed_players(3, prefix="Paged Player")
+        seed_games(1, players, rounds_per_game=45, seed=11)
+        self.game = Game.objects.get()
+    
+    def test_first_page_is_newest_rounds(self):
+        """Test that game_detail shows only the newest page of rounds."""
+        response = self.client.get(reverse('score_tracker:game_detail', args=[self.game.pk]))
+        self.assertEqual([r.round_number for r in response.context['rounds']], list(range(45, 25, -1)))
+        self.assertEqual(response.context['next_before'], 26)
+        self.assertContains(response, "?before=26")
+    
+    def test_older_pages(self):
+        """Test that older pages are rendered as row fragments until the first round."""
+        url = reverse('score_tracker:game_rounds', args=[self.game.pk])
+        response = self.client.get(url, {'before': 26})
+        self.assertEqual([r.round_number for r in response.context['rounds']], list(range(25, 5, -1)))
+        self.assertNotContains(response, "<html")
+        
+        response = self.client.get(url, {'before': 6})
+        self.assertEqual([r.round_number for r in response.context['rounds']], [5, 4, 3, 2, 1])
+        self.assertIsNone(response.context['next_before'])
+        self.assertNotContains(response, "Load older rounds")
+    
+    def test_page_cost_does_not_grow_with_game_length(self):
+        """Test that a history page costs the same number of queries on any game length."""
+        url = reverse('score_tracker:game_rounds', args=[self.game.pk])
+        with CaptureQueriesContext(connection) as short_game:
+            self.client.get(url, {'before': 26})
+        seed_games(1, list(self.game.players.all()), rounds_per_game=400, seed=12)
+        long_game = Game.objects.order_by('-pk').first()
+        with self.assertNumQueries(len(short_game)):
+            self.client.get(reverse('score_tracker:game_rounds', args=[long_game.pk]), {'before': 390})
+    
+    def test_missing_cursor(self):
+        """Test that the fragment view needs a round number."""
+        url = reverse('score_tracker:game_rounds', args=[self.game.pk])
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'before': 'x'}).status_code, 400)
+
+
+class RosterQueryTests(TestCase):
+    """Test that a request loads the roster of its game once."""
+    
+    def setUp(self):
+        self.players = seed_players(4, prefix="Roster Player")
+        seed_games(1, self.players[:3], rounds_per_game=30, active_ratio=1, seed=13)
+        self.game = Game.objects.get()
+        self.outsider = self.players[3]
+    
+    def round_data(self, **data):
+        roster = self.game.roster
+        return {
+            'game_maker': roster[0].pk, 'bid_amount': 200, 'is_success': True,
+            'meld_points': 20, 'trick_points': 100, 'last_trick_winner': roster[1].pk,
+            **data,
+        }
+    
+    def test_game_detail_query_count(self):
+        """Test that game_detail needs the same queries for 30 rounds as for 300."""
+        url = reverse('score_tracker:game_detail', args=[self.game.pk])
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertContains(response, self.game.roster[0].name)
+        seed_games(1, self.game.roster, rounds_per_game=300, active_ratio=1, seed=14)
+        long_game = Game.objects.order_by('-pk').first()
+        with self.assertNumQueries(4):
+            self.client.get(reverse('score_tracker:game_detail', args=[long_game.pk]))
+    
+    def test_round_create_query_count(self):
+        """Test that showing and submitting the round form do not query players per field."""
+        url = reverse('score_tracker:round_create', args=[self.game.pk])
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertContains(response, f'value="{self.game.roster[0].pk}"')
+        # Game, roster, savepoint, game row lock where the database has row
+        # locks, count, insert, signal lookup, release
+        with self.assertNumQueries(7 + connection.features.has_select_for_update):
+            response = self.client.post(url, self.round_data())
+        self.assertEqual(response.status_code, 302)
+        round_obj = self.game.rounds.get(round_number=31)
+        self.assertEqual(round_obj.game_maker, self.game.roster[0])
+        self.assertEqual(round_obj.last_trick_winner, self.game.roster[1])
+    
+    def test_form_rejects_players_outside_roster(self):
+        """Test that only players of the game can be chosen."""
+        form = RoundForm(self.round_data(game_maker=self.outsider.pk), game=self.game)
+        self.assertFalse(form.is_valid())
+        self.assertIn('game_maker', form.errors)
+        self.assertNotIn(str(self.outsider.pk), [str(value) for value, _ in form.fields['game_maker'].choices])
+    
+    def test_rounds_of_removed_players(self):
+        """Test that rounds made by a player no longer on the roster still show the player."""
+        game_maker = self.game.rounds.order_by('-round_number').first().game_maker
+        self.game.players.remove(game_maker)
+        game = Game.objects.get(pk=self.game.pk)
+        rounds = game.get_round_page(limit=5)
+        self.assertEqual(rounds[0].game_maker, game_maker)
+        self.assertNotIn(game_maker, game.roster)
+
+
+class PlayerPointsFieldsTests(TestCase):
+    """Test the player_points_fields tag of the round form."""
+    
+    def setUp(self):
+        players = seed_players(4, prefix="Field Player")
+        self.game = Game.objects.create(name="Field Game")
+        self.game.players.set(players)
+        engine = engines['django']
+        self.tag = engine.from_string("{% load score_tracker_tags %}{% player_points_fields form game.roster %}")
+        self.bootstrap = engine.from_string("{% load django_bootstrap5 %}{% bootstrap_field field %}")
+    
+    def assertMatchesBootstrap(self, form):
+        """Check that every points field is marked up as bootstrap_field would."""
+        html = re.sub(r'>\s+<', '><', self.tag.render({'form': form, 'game': self.game}))
+        for player in self.game.roster:
+            for kind in ('meld_points', 'trick_points'):
+                field = form[f'player_{player.id}_{kind}']
+                expected = re.sub(r'>\s+<', '><', self.bootstrap.render({'field': field}).strip())
+                self.assertIn(expected, html)
+    
+    def test_unbound_form(self):
+        """Test that an empty round form renders every player's fields."""
+        form = RoundForm(game=self.game)
+        self.assertMatchesBootstrap(form)
+        html = self.tag.render({'form': form, 'game': self.game})
+        self.assertEqual(html.count('type="number"'), 8)
+    
+    def test_bound_form_with_errors(self):
+        """Test that invalid and valid fields are marked after a submit."""
+        player = self.game.roster[1]
+        form = RoundForm({
+            'game_maker': self.game.roster[0].pk, 'bid_amount': 200,
+            'meld_points': 0, 'trick_points': 100,
+            f'player_{player.id}_meld_points': -10,
+            f'player_{player.id}_trick_points': 'x',
+        }, game=self.game)
+        self.assertFalse(form.is_valid())
+        self.assertMatchesBootstrap(form)
+        html = self.tag.render({'form': form, 'game': self.game})
+        self.assertEqual(html.count('is-invalid'), 2)
+        self.assertIn('value="x"', html)
+
+
+class VendoredAssetsTests(TestCase):
+    """Test the self-hosted Bootstrap assets."""
+    
+    def test_trim_css(self):
+        """Test that only rules matching used classes survive trimming."""
+        css = (
+            '@charset "UTF-8";/*! banner */:root{--x:1}.btn{a:1}.carousel{b:2}'
+            '.btn:not(.carousel),.carousel .btn{c:3}[class*=col-]{d:4}'
+            '@media (min-width:576px){.carousel{e:5}.btn{content:"}"}}'
+            '@keyframes spin{from{f:6}to{g:7}}/*# sourceMappingURL=x.map */'
+        )
+        self.assertEqual(
+            trim_css(css, {'btn'}),
+            '@charset "UTF-8";/*! banner */:root{--x:1}.btn{a:1}.btn:not(.carousel){c:3}[class*=col-]{d:4}'
+            '@media (min-width:576px){.btn{content:"}"}}@keyframes spin{from{f:6}to{g:7}}',
+        )
+    
+    def test_used_class_names(self):
+        """Test that classes from templates, bootstrap_field and runtime are kept."""
+        names = used_class_names()
+        for name in ('navbar-toggler-icon', 'invalid-feedback', 'alert-success', 'show', 'modal-dialog'):
+            self.assertIn(name, names)
+    
+    def test_pages_use_local_assets(self):
+        """Test that pages load Bootstrap from the static files, not a CDN."""
+        response = self.client.get(reverse('score_tracker:home'))
+        self.assertNotContains(response, 'cdn.jsdelivr.net')
+        for name in ('vendor/bootstrap/css/bootstrap.min.css', 'vendor/bootstrap/js/bootstrap.min.js'):
+            self.assertContains(response, f'"{static(name)}"')
+
+
+class ScoringBackendTests(TestCase):
+    """Test that the Python and SQL scoring backends agree with get_current_score()."""
+    
+    def setUp(self):
+        self.players = seed_players(5, prefix="Backend Player")
+        seed_games(6, self.players, rounds_per_game=40, seed=21)
+        seed_games(2, self.players, players_per_game=4, rounds_per_game=40, seed=22)
+        self.games = list(Game.objects.all())
+    
+    def assertBackendsMatchReference(self, games):
+        for backend in ('python', 'sql'):
+            standings = get_standings_for_games(games, backend=backend)
+            for game in games:
+                self.assertEqual(standings[game.pk], game.get_current_score(), f"{backend} backend, {game}")
+    
+    def test_seeded_games(self):
+        """Test both backends on random games."""
+        self.assertBackendsMatchReference(self.games)
+    
+    def test_negative_scores_and_multiple_crossings(self):
+        """Test negative running scores and a single round crossing 1000 twice."""
+        p1, p2, p3 = self.players[:3]
+        game = Game.objects.create(name="Edge Cases")
+        game.players.set([p1, p2, p3])
+        rounds = [
+            (p1, 300, {}, 0, 0),                          # default: -600
+            (p1, 400, {'is_abgehen': True}, 0, 0),        # -400, running -1000
+            (p2, 1200, {'is_success': True}, 500, 250),   # 1950: one crossing
+            (p1, 1500, {'is_success': True}, 700, 250),   # -1000 + 2450 = 1450: one crossing
+            (p3, 1500, {'is_success': True}, 800, 250),   # 2550: two crossings at once
+            (p2, 600, {'is_doppelt_abgehen': True}, 0, 0),
+            (p2, 900, {'is_success': True}, 100, 50),     # back above the old peak
+        ]
+        for number, (maker, bid, flags, meld, trick) in enumerate(rounds, start=1):
+            Round.objects.create(game=game, round_number=number, game_maker=maker,
+                                 bid_amount=bid, meld_points=meld, trick_points=trick, **flags)
+        expected = game.get_current_score()
+        self.assertEqual(expected[p3.id]['rounds_won'], 2)
+        self.assertBackendsMatchReference([game])
+    
+    def test_game_without_rounds(self):
+        """Test that players without rounds score zero."""
+        game = Game.objects.create(name="Empty")
+        game.players.set(self.players[:3])
+        self.assertBackendsMatchReference([game])
+    
+    def test_archived_games(self):
+        """Test that both backends use the stored standings of archived games."""
+        game = self.games[0]
+        game.end_game()
+        expected = game.get_current_score()
+        archive_game(game)
+        game = Game.objects.get(pk=game.pk)
+        for backend in ('python', 'sql'):
+            self.assertEqual(get_standings_for_games([game], backend=backend)[game.pk], expected)
+    
+    def test_sql_backend_query_count(self):
+        """Test that the SQL backend needs two queries for any number of games."""
+        with self.assertNumQueries(2):
+            get_standings_for_games(self.games, backend='sql')
+    
+    def test_backend_setting(self):
+        """Test that the backend is chosen through SCORING_BACKEND."""
+        with self.settings(SCORING_BACKEND='sql'):
+            with self.assertNumQueries(2):
+                get_standings_for_games(self.games)
+        with self.settings(SCORING_BACKEND='nonsense'):
+            with self.assertRaises(ValueError):
+                get_standings_for_games(self.games)
+
+
+class BatchStandingsTests(TestCase):
+    """Test standings for many games from a fixed number of queries."""
+    
+    def setUp(self):
+        self.client = Client()
+        self.players = seed_players(6, prefix="Batch Player")
+    
+    def test_queryset_of_games(self):
+        """Test that a queryset of games is scored like the reference, in three queries."""
+        seed_games(5, self.players, rounds_per_game=25, seed=31)
+        # Evaluating the queryset is the third query
+        with self.assertNumQueries(3):
+            standings = get_standings_for_games(Game.objects.all(), backend='python')
+        for game in Game.objects.all():
+            self.assertEqual(standings[game.pk], game.get_current_score())
+    
+    def test_query_count_independent_of_games(self):
+        """Test that scoring 20 games takes as many queries as scoring 2."""
+        seed_games(2, self.players, rounds_per_game=10, seed=32)
+        with CaptureQueriesContext(connection) as few:
+            get_standings_for_games(list(Game.objects.all()), backend='python')
+        seed_games(18, self.players, rounds_per_game=10, seed=33)
+        with CaptureQueriesContext(connection) as many:
+            get_standings_for_games(list(Game.objects.all()), backend='python')
+        self.assertEqual(len(few), len(many))
+    
+    def test_get_leader(self):
+        """Test that the leader is ranked by rounds won, then score."""
+        p1, p2 = self.players[:2]
+        standings = {
+            p1.id: {'player': p1, 'score': 900, 'rounds_won': 0},
+            p2.id: {'player': p2, 'score': 100, 'rounds_won': 1},
+        }
+        self.assertEqual(get_leader(standings)['player'], p2)
+        self.assertIsNone(get_leader({}))
+    
+    def test_game_list_leader_column(self):
+        """Test that game_list shows the leader of active games with a fixed number of queries."""
+        seed_games(3, self.players, rounds_per_game=15, seed=34)
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.get(reverse('score_tracker:game_list'))
+        game = Game.objects.first()
+        leader = get_leader(game.get_current_score())
+        self.assertContains(response, f"({leader['rounds_won']} / {leader['score']})")
+        
+        seed_games(12, self.players, rounds_per_game=15, seed=35)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse('score_tracker:game_list'))
+        self.assertEqual(len(few), len(many))
+
+
+class AdminScalabilityTests(TestCase):
+    """Test that the admin changelists stay cheap on large tables."""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+        self.players = seed_players(6, prefix="Admin Player")
+    
+    def assertConstantQueries(self, url):
+        seed_games(2, self.players, rounds_per_game=5, seed=41)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        seed_games(8, self.players, rounds_per_game=10, seed=42)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(few), len(many))
+    
+    def test_round_changelist_query_count(self):
+        """Test that the Round changelist needs the same queries for 10 or 90 rounds."""
+        self.assertConstantQueries(reverse('admin:score_tracker_round_changelist'))
+    
+    def test_score_changelist_query_count(self):
+        """Test that the Score changelist needs the same queries for 20 or 180 scores."""
+        self.assertConstantQueries(reverse('admin:score_tracker_score_changelist'))
+    
+    def test_round_change_form_query_count(self):
+        """Test that the round form does not list every player in its inline."""
+        seed_games(1, self.players, rounds_per_game=1, seed=43)
+        round_obj = Round.objects.get()
+        url = reverse('admin:score_tracker_round_change', args=[round_obj.pk])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        seed_players(200, prefix="Extra Player")
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(len(few), len(many))
+        self.assertNotContains(response, "Extra Player 1<")
+    
+    def test_input_filters(self):
+        """Test filtering rounds by game id or name and scores by player name."""
+        seed_games(3, self.players, rounds_per_game=4, seed=44)
+        game = Game.objects.order_by('pk').first()
+        url = reverse('admin:score_tracker_round_changelist')
+        response = self.client.get(url, {'game': game.pk})
+        self.assertEqual(response.context['cl'].result_count, 4)
+        response = self.client.get(url, {'game': game.name})
+        self.assertEqual(response.context['cl'].result_count, 4)
+        
+        player = self.players[0]
+        response = self.client.get(reverse('admin:score_tracker_score_changelist'), {'player': player.name})
+        self.assertEqual(response.context['cl'].result_count, Score.objects.filter(player=player).count())
+    
+    def test_game_changelist_lists_no_tournaments(self):
+        """Test that the Game changelist filters tournaments by input instead of listing them."""
+        tournament = Tournament.objects.create(name="Admin Cup")
+        Tournament.objects.bulk_create([Tournament(name=f"Other Cup {number}") for number in range(5)])
+        seed_games(2, self.players, rounds_per_game=1, tournament=tournament, seed=45)
+        seed_games(1, self.players, rounds_per_game=1, seed=46)
+        url = reverse('admin:score_tracker_game_changelist')
+        self.assertNotContains(self.client.get(url), "Other Cup")
+        self.assertEqual(self.client.get(url, {'tournament': tournament.pk}).context['cl'].result_count, 2)
+        self.assertEqual(self.client.get(url, {'tournament': 'admin'}).context['cl'].result_count, 2)
+
+
+class SQLiteHighConcurrencyTests(SimpleTestCase):
+    """Test the SQLite backend tuned for concurrent writers."""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings['concurrency'] = {
+            **connection.settings_dict,
+            'ENGINE': 'binokel_project.sqlite_backend',
+            'NAME': os.path.join(directory.name, 'concurrency.sqlite3'),
+            'OPTIONS': {'timeout': 0.1},
+        }
+        self.addCleanup(self.remove_connection)
+        with connections['concurrency'].cursor() as cursor:
+            cursor.execute("CREATE TABLE counter (value integer)")
+    
+    def remove_connection(self):
+        connections['concurrency'].close()
+        del connections['concurrency']
+        del connections.settings['concurrency']
+    
+    def test_pragmas(self):
+        """Test that new connections use WAL journaling and relaxed syncing."""
+        with connections['concurrency'].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+    
+    def test_transactions_take_the_write_lock_immediately(self):
+        """Test that a second writer waits at the start of its transaction, not mid-way."""
+        errors = []
+        
+        def second_writer():
+            try:
+                with transaction.atomic(using='concurrency'):
+                    connections['concurrency'].cursor().execute("SELECT count(*) FROM counter")
+            except OperationalError as exc:
+                errors.append(str(exc))
+            finally:
+                connections['concurrency'].close()
+        
+        with transaction.atomic(using='concurrency'):
+            # Only read so far, but the write lock is already taken
+            connections['concurrency'].cursor().execute("SELECT count(*) FROM counter")
+            thread = threading.Thread(target=second_writer)
+            thread.start()
+            thread.join()
+        self.assertEqual(errors, ["database is locked"])
+
+
+class RoundOutcomeTests(TestCase):
+    """Test the outcome column that replaced the four boolean flags."""
+    
+    def setUp(self):
+        self.players = seed_players(3, prefix="Outcome Player")
+        self.game = Game.objects.create(name="Outcome Game")
+        self.game.players.set(self.players)
+    
+    def test_outcome_from_flags(self):
+        """Test that flag combinations map to outcomes in scoring order."""
+        cases = [
+            ({}, Outcome.FAILED),
+            ({'is_success': True}, Outcome.SUCCESS),
+            ({'is_success': True, 'is_durch': True}, Outcome.DURCH),
+            ({'is_durch': True}, Outcome.DURCH_FAILED),
+            ({'is_abgehen': True}, Outcome.ABGEHEN),
+            ({'is_abgehen': True, 'is_durch': True}, Outcome.ABGEHEN),
+            ({'is_doppelt_abgehen': True}, Outcome.DOPPELT_ABGEHEN),
+            ({'is_success': True, 'is_doppelt_abgehen': True}, Outcome.SUCCESS),
+        ]
+        for flags, outcome in cases:
+            self.assertEqual(outcome_from_flags(**flags), outcome, flags)
+            # The compatibility properties accept the same combinations
+            self.assertEqual(Round(**flags).outcome, outcome, flags)
+    
+    def test_flag_properties(self):
+        """Test that the old flags read from and write to the outcome."""
+        round_obj = Round(outcome=Outcome.DURCH)
+        self.assertTrue(round_obj.is_success)
+        self.assertTrue(round_obj.is_durch)
+        round_obj.is_success = False
+        self.assertEqual(round_obj.outcome, Outcome.DURCH_FAILED)
+        round_obj.is_durch = False
+        self.assertEqual(round_obj.outcome, Outcome.FAILED)
+    
+    def test_every_outcome_is_scored_like_the_flags(self):
+        """Test the bid factor of every outcome in the reference and both backends."""
+        maker = self.players[0]
+        expected = {
+            Outcome.FAILED: -200, Outcome.SUCCESS: 100, Outcome.ABGEHEN: -100,
+            Outcome.DOPPELT_ABGEHEN: -200, Outcome.DURCH: 100, Outcome.DURCH_FAILED: -200,
+        }
+        for number, outcome in enumerate(Outcome, start=1):
+            Round.objects.create(game=self.game, round_number=number, game_maker=maker,
+                                 bid_amount=100, outcome=outcome)
+        standings = self.game.get_current_score()
+        self.assertEqual(standings[maker.id]['score'], sum(expected.values()))
+        for backend in ('python', 'sql'):
+            self.assertEqual(get_standings_for_games([self.game], backend=backend)[self.game.pk], standings)
+    
+    def test_round_form_maps_checkboxes(self):
+        """Test that the round form stores its checkboxes as one outcome."""
+        response = self.client.post(reverse('score_tracker:round_create', args=[self.game.pk]), {
+            'game_maker': self.players[0].id,
+            'bid_amount': 300,
+            'is_success': True,
+            'is_durch': True,
+            'meld_points': 0,
+            'trick_points': 250,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Round.objects.get(game=self.game).outcome, Outcome.DURCH)
+    
+    def test_version_1_archives(self):
+        """Test that archives written with the flag bitmask can still be read."""
+        maker = self.players[0]
+        payload = {
+            'v': 1,
+            'rounds': {
+                'round_number': [1, 2], 'game_maker_id': [maker.id, maker.id], 'bid_amount': [150, 150],
+                # is_success | is_durch, then is_abgehen
+                'flags': [0b0101, 0b0010], 'meld_points': [0, 0], 'trick_points': [0, 0],
+                'last_trick_winner_id': [None, None], 'created_at': [0, 0],
+            },
+            'scores': {'round': [], 'player_id': [], 'meld_points': [], 'trick_points': []},
+        }
+        self.game.archive = zlib.compress(json.dumps(payload).encode())
+        self.assertEqual([r.outcome for r in unpack_rounds(self.game)], [Outcome.DURCH, Outcome.ABGEHEN])
+    
+    def test_round_history_badges(self):
+        """Test that the round history shows the outcome label."""
+        Round.objects.create(game=self.game, round_number=1, game_maker=self.players[0],
+                             bid_amount=150, outcome=Outcome.DOPPELT_ABGEHEN)
+        response = self.client.get(reverse('score_tracker:game_detail', args=[self.game.pk]))
+        self.assertContains(response, '<span class="badge bg-danger">Doppelt abgehen</span>', html=True)
+
+
+class RoundOutcomeMigrationTests(TransactionTestCase):
+    """Test the data migration from the boolean flags to the outcome column."""
+    
+    def test_flags_are_migrated(self):
+        """Test that existing rounds keep their score through the migration."""
+        executor = MigrationExecutor(connection)
+        executor.migrate([('score_tracker', '0004_game_archive')])
+        apps = executor.loader.project_state([('score_tracker', '0004_game_archive')]).apps
+        OldGame = apps.get_model('score_tracker', 'Game')
+        OldPlayer = apps.get_model('score_tracker', 'Player')
+        OldRound = apps.get_model('score_tracker', 'Round')
+        player = OldPlayer.objects.create(name="Migrated Player")
+        game = OldGame.objects.create(name="Migrated Game")
+        flag_sets = [
+            {}, {'is_success': True}, {'is_success': True, 'is_durch': True},
+            {'is_durch': True}, {'is_abgehen': True}, {'is_doppelt_abgehen': True},
+        ]
+        for number, flags in enumerate(flag_sets, start=1):
+            OldRound.objects.create(game=game, round_number=number, game_maker=player, bid_amount=100, **flags)
+        
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        self.assertEqual(
+            list(Round.objects.order_by('round_number').values_list('outcome', flat=True)),
+            [Outcome.FAILED, Outcome.SUCCESS, Outcome.DURCH, Outcome.DURCH_FAILED,
+             Outcome.ABGEHEN, Outcome.DOPPELT_ABGEHEN],
+        )
+
+
+class OpponentPointsTests(TestCase):
+    """Test opponent points stored on the round and the Score compatibility model."""
+    
+    def setUp(self):
+        self.players = seed_players(3, prefix="Opponent Player")
+        self.game = Game.objects.create(name="Opponent Game")
+        self.game.players.set(self.players)
+        self.round_obj = Round.objects.create(game=self.game, round_number=1,
+                                              game_maker=self.players[0], bid_amount=150)
+    
+    def test_score_writes_go_to_the_round(self):
+        """Test that creating, changing and deleting scores updates opponent_points."""
+        p2, p3 = self.players[1:]
+        score = Score.objects.create(round=self.round_obj, player=p2, meld_points=20, trick_points=30)
+        self.assertEqual(score.pk, f"{self.round_obj.pk}:{p2.pk}")
+        Score.objects.bulk_create([Score(round=self.round_obj, player=p3, meld_points=0, trick_points=60)])
+        self.round_obj.refresh_from_db()
+        self.assertEqual(self.round_obj.opponent_points, {str(p2.pk): [20, 30], str(p3.pk): [0, 60]})
+        
+        score.trick_points = 40
+        score.save()
+        self.assertEqual(Score.objects.get(pk=score.pk).trick_points, 40)
+        Score.objects.filter(player=p3).update(meld_points=10)
+        self.round_obj.refresh_from_db()
+        self.assertEqual(self.round_obj.get_opponent_points(p3.pk), 70)
+        
+        score.delete()
+        Score.objects.filter(round=self.round_obj).delete()
+        self.round_obj.refresh_from_db()
+        self.assertEqual(self.round_obj.opponent_points, {})
+    
+    def test_bulk_created_scores_invalidate(self):
+        """Test that bulk-created scores drop the cached standings and the snapshot, and count as a change."""
+        tournament = Tournament.objects.create(name="Bulk Cup")
+        Game.objects.filter(pk=self.game.pk).update(tournament=tournament, is_active=False)
+        before = self.round_obj.updated_at
+        with patch('score_tracker.signals.invalidate_tournament_standings') as invalidate, \
+                patch('score_tracker.signals.delete_snapshot') as delete:
+            Score.objects.bulk_create([Score(round=self.round_obj, player=self.players[1], trick_points=60)])
+        invalidate.assert_called_once_with(tournament.pk)
+        delete.assert_called_once_with(self.game.pk)
+        self.round_obj.refresh_from_db()
+        self.assertGreater(self.round_obj.updated_at, before)
+    
+    def test_score_view(self):
+        """Test that the Score view lists one row per opponent."""
+        seed_games(2, self.players, rounds_per_game=5, seed=51)
+        rows = Score.objects.filter(round__game__name="Game 1").select_related('round')
+        self.assertEqual(len(rows), 10)
+        for score in rows:
+            self.assertEqual(score.round.opponent_points[str(score.player_id)], [score.meld_points, score.trick_points])
+    
+    def test_round_create_writes_one_row(self):
+        """Test that entering a round is a single insert without Score rows."""
+        url = reverse('score_tracker:round_create', args=[self.game.pk])
+        data = {
+            'game_maker': self.players[0].id, 'bid_amount': 200, 'is_success': True,
+            'meld_points': 40, 'trick_points': 180,
+            f'player_{self.players[1].id}_meld_points': 20, f'player_{self.players[1].id}_trick_points': 40,
+            f'player_{self.players[2].id}_meld_points': 0, f'player_{self.players[2].id}_trick_points': 30,
+        }
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, data)
+        self.assertEqual(sum(query['sql'].startswith('INSERT') for query in queries), 1)
+        round_obj = self.game.rounds.get(round_number=2)
+        self.assertEqual(round_obj.opponent_points, {
+            str(self.players[1].id): [20, 40], str(self.players[2].id): [0, 30],
+        })
+
+
+class OpponentPointsMigrationTests(TransactionTestCase):
+    """Test the migration from Score rows to Round.opponent_points and back."""
+    
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('score_tracker', target)])
+        return executor.loader.project_state([('score_tracker', target)]).apps
+    
+    def test_scores_are_migrated(self):
+        """Test that Score rows move onto their rounds and come back on reverse."""
+        apps = self.migrate('0005_round_outcome')
+        OldPlayer = apps.get_model('score_tracker', 'Player')
+        OldGame = apps.get_model('score_tracker', 'Game')
+        OldRound = apps.get_model('score_tracker', 'Round')
+        OldScore = apps.get_model('score_tracker', 'Score')
+        maker, p2, p3 = [OldPlayer.objects.create(name=f"Migrated {index}") for index in range(3)]
+        game = OldGame.objects.create(name="Migrated Game")
+        first = OldRound.objects.create(game=game, round_number=1, game_maker=maker, bid_amount=150)
+        OldRound.objects.create(game=game, round_number=2, game_maker=maker, bid_amount=150)
+        OldScore.objects.create(round=first, player=p2, meld_points=20, trick_points=30)
+        OldScore.objects.create(round=first, player=p3, meld_points=0, trick_points=60)
+        
+        self.migrate('0006_round_opponent_points')
+        self.assertEqual(
+            dict(Round.objects.values_list('round_number', 'opponent_points')),
+            {1: {str(p2.pk): [20, 30], str(p3.pk): [0, 60]}, 2: {}},
+        )
+        self.assertEqual(Score.objects.count(), 2)
+        
+        apps = self.migrate('0005_round_outcome')
+        self.assertEqual(
+            sorted(apps.get_model('score_tracker', 'Score').objects.values_list('player_id', 'meld_points', 'trick_points')),
+            sorted([(p2.pk, 20, 30), (p3.pk, 0, 60)]),
+        )
+        self.migrate('0006_round_opponent_points')
+
+
+class ScoringVectorTests(SimpleTestCase):
+    """Test the Python and JavaScript scorers against the shared test vectors."""
+    
+    vectors_path = Path(__file__).resolve().parent / 'scoring_vectors.json'
+    scorer_path = Path(settings.BASE_DIR) / 'static' / 'js' / 'scoring.js'
+    
+    def setUp(self):
+        self.vectors = json.loads(self.vectors_path.read_text())
+    
+    def test_rules_match_vectors(self):
+        """Test that the vectors were generated from the current rules."""
+        self.assertEqual(scoring_rules(), self.vectors['rules'])
+    
+    def test_python_scorer(self):
+        """Test apply_round on every vector."""
+        for case in self.vectors['cases']:
+            round_data = case['round']
+            state = {int(pid): list(value) for pid, value in case['standings'].items()}
+            apply_round(state, {
+                'game_maker_id': round_data['game_maker_id'],
+                'bid_amount': round_data['bid_amount'],
+                'outcome': outcome_from_flags(**round_data['flags']),
+                'meld_points': round_data['meld_points'],
+                'trick_points': round_data['trick_points'],
+            }, {int(pid): points for pid, points in round_data['opponent_points'].items()})
+            self.assertEqual({str(pid): value for pid, value in state.items()}, case['expected'], case['name'])
+    
+    @skipUnless(shutil.which('node'), "Node.js is not installed")
+    def test_javascript_scorer(self):
+        """Test static/js/scoring.js on every vector."""
+        script = """
+            const scoring = require(process.argv[1]);
+            const vectors = require(process.argv[2]);
+            const results = vectors.cases.map(function(testCase) {
+                const round = Object.assign({}, testCase.round, {
+                    outcome: scoring.outcomeFromFlags(vectors.rules, testCase.round.flags),
+                });
+                return scoring.applyRound(vectors.rules, testCase.standings, round);
+            });
+            process.stdout.write(JSON.stringify(results));
+        """
+        output = subprocess.run(
+            ['node', '-e', script, str(self.scorer_path), str(self.vectors_path)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        for case, result in zip(self.vectors['cases'], json.loads(output), strict=True):
+            self.assertEqual(result, case['expected'], case['name'])
+
+
+class RoundFormPayloadTests(TestCase):
+    """Test the standings payload of the round form."""
+    
+    def test_round_form_embeds_payload(self):
+        """Test that the round form ships the current standings and rules as JSON."""
+        players = seed_players(3, prefix="Preview Player")
+        seed_games(1, players, rounds_per_game=10, seed=37)
+        game = Game.objects.get()
+        response = self.client.get(reverse('score_tracker:round_create', args=[game.pk]))
+        payload = response.context['standings_payload']
+        self.assertEqual(payload['rules'], scoring_rules())
+        self.assertEqual(
+            {entry['id']: [entry['score'], entry['rounds_won']] for entry in payload['players']},
+            {pid: [data['score'], data['rounds_won']] for pid, data in game.get_current_score().items()},
+        )
+        self.assertContains(response, 'id="standings-payload"')
+        self.assertContains(response, 'js/scoring.')
+
+
+class RoundBatchTests(TestCase):
+    """Test entering several rounds in one submit."""
+    
+    def setUp(self):
+        self.player1 = Player.objects.create(name="Player 1")
+        self.player2 = Player.objects.create(name="Player 2")
+        self.player3 = Player.objects.create(name="Player 3")
+        self.game = Game.objects.create(name="Test Game")
+        self.game.players.set([self.player1, self.player2, self.player3])
+        Round.objects.create(game=self.game, round_number=1, game_maker=self.player3, bid_amount=150)
+        self.url = reverse('score_tracker:round_batch_create', args=[self.game.pk])
+    
+    def json_round(self, game_maker, trick_points=80, **extra):
+        others = [p for p in (self.player1, self.player2, self.player3) if p != game_maker]
+        return {
+            'game_maker': game_maker.pk,
+            'bid_amount': 150,
+            'is_success': True,
+            'meld_points': 60,
+            'trick_points': trick_points,
+            'opponent_points': {str(others[0].pk): [40, 90], str(others[1].pk): [30, 80]},
+            **extra,
+        }
+    
+    def post_json(self, rounds):
+        return self.client.post(self.url, json.dumps({'rounds': rounds}), content_type='application/json')
+    
+    def form_data(self, rows):
+        data = {
+            'form-TOTAL_FORMS': len(rows),
+            'form-INITIAL_FORMS': 0,
+            'form-MIN_NUM_FORMS': 0,
+            'form-MAX_NUM_FORMS': 100,
+        }
+        for index, row in enumerate(rows):
+            # Blank rows post the initial values, like the rendered form
+            data[f'form-{index}-meld_points'] = 0
+            data[f'form-{index}-trick_points'] = 0
+            for player in (self.player1, self.player2, self.player3):
+                data[f'form-{index}-player_{player.pk}_meld_points'] = 0
+                data[f'form-{index}-player_{player.pk}_trick_points'] = 0
+            data.update({f'form-{index}-{key}': value for key, value in row.items()})
+        return data
+    
+    def test_get(self):
+        """Test that the batch form shows one row per round to enter."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['formset'].forms), 10)
+    
+    def test_form_post(self):
+        """Test that filled rows are saved with contiguous round numbers and blank rows are skipped."""
+        rows = [
+            {'game_maker': self.player1.pk, 'bid_amount': 150, 'is_success': 'on', 'meld_points': 60,
+             'trick_points': 80, f'player_{self.player2.pk}_meld_points': 40,
+             f'player_{self.player2.pk}_trick_points': 90},
+            {},
+            {'game_maker': self.player2.pk, 'bid_amount': 200, 'meld_points': 20, 'trick_points': 100},
+        ]
+        response = self.client.post(self.url, self.form_data(rows))
+        self.assertRedirects(response, reverse('score_tracker:game_detail', args=[self.game.pk]))
+        
+        rounds = list(self.game.rounds.order_by('round_number'))
+        self.assertEqual([r.round_number for r in rounds], [1, 2, 3])
+        self.assertEqual(rounds[1].opponent_points[str(self.player2.pk)], [40, 90])
+        self.assertEqual(rounds[1].outcome, Outcome.SUCCESS)
+        self.assertEqual(rounds[2].game_maker, self.player2)
+        self.assertEqual(rounds[2].outcome, Outcome.FAILED)
+    
+    def test_form_post_invalid_row(self):
+        """Test that one invalid row keeps every round from being saved."""
+        rows = [
+            {'game_maker': self.player1.pk, 'bid_amount': 150, 'meld_points': 0, 'trick_points': 80},
+            {'game_maker': self.player1.pk, 'bid_amount': 150, 'meld_points': 0, 'trick_points': 200,
+             f'player_{self.player2.pk}_trick_points': 100},
+        ]
+        response = self.client.post(self.url, self.form_data(rows))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "cannot exceed 250")
+        self.assertEqual(self.game.rounds.count(), 1)
+    
+    def test_form_post_blank(self):
+        """Test that a batch without any filled row is rejected."""
+        response = self.client.post(self.url, self.form_data([{}, {}]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Enter at least one round.")
+    
+    def test_json_post(self):
+        """Test that a JSON batch is written with one insert and returns the new standings."""
+        rounds = [self.json_round(player) for player in (self.player1, self.player2, self.player3)] * 5
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_json(rounds)
+        self.assertEqual(response.status_code, 201)
+        payload = response.json()
+        self.assertEqual(payload['rounds'], list(range(2, 17)))
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        
+        current = Game.objects.get(pk=self.game.pk).get_current_score()
+        self.assertEqual(
+            {entry['id']: [entry['score'], entry['rounds_won']] for entry in payload['players']},
+            {pid: [data['score'], data['rounds_won']] for pid, data in current.items()},
+        )
+        self.assertEqual(self.game.rounds.get(round_number=2).opponent_points[str(self.player2.pk)], [40, 90])
+    
+    def test_json_post_invalid_round(self):
+        """Test that JSON errors are reported per round and nothing is saved."""
+        response = self.post_json([self.json_round(self.player1), self.json_round(self.player2, trick_points=200)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['1'])
+        self.assertEqual(self.game.rounds.count(), 1)
+    
+    def test_json_post_malformed(self):
+        """Test that malformed and empty JSON batches are rejected."""
+        for body in ('not json', '{}', '[]', '{"rounds": "x"}', '{"rounds": [1]}', '{"rounds": []}'):
+            response = self.client.post(self.url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+        self.assertEqual(self.game.rounds.count(), 1)
+    
+    def test_json_post_too_many_rounds(self):
+        """Test that an oversized batch is rejected before any round is validated."""
+        entries = [self.json_round(self.player1)] * (MAX_BATCH_ROUNDS + 1)
+        with patch('score_tracker.views.RoundForm', side_effect=AssertionError):
+            response = self.post_json(entries)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.game.rounds.count(), 1)
+    
+    def test_inactive_game(self):
+        """Test that rounds cannot be added to inactive games."""
+        self.game.end_game()
+        self.assertEqual(self.post_json([self.json_round(self.player1)]).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        self.assertEqual(self.game.rounds.count(), 1)
+
+
+class BackupTests(TestCase):
+    """Test the backup and restore commands."""
+    
+    def setUp(self):
+        players = seed_players(4, prefix="Backup Player")
+        tournament = Tournament.objects.create(name="Backup Cup")
+        seed_games(3, players, rounds_per_game=5, tournament=tournament, active_ratio=0, seed=39)
+        archive_game(Game.objects.order_by('pk').first())
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'binokel.backup.gz')
+    
+    def read_lines(self, path):
+        with gzip.open(path, 'rt') as stream:
+            return stream.readlines()
+    
+    def test_round_trip(self):
+        """Test that restoring a backup reproduces every row exactly."""
+        counts = write_backup(self.path)
+        self.assertEqual(counts['score_tracker.round'], 10)
+        self.assertEqual(counts['score_tracker.game_players'], 9)
+        standings = {game.pk: game.get_current_score() for game in Game.objects.all()}
+        
+        Player.objects.create(name="Added after the backup")
+        self.assertEqual(restore_backup(self.path, flush=True), counts)
+        self.assertFalse(Player.objects.filter(name="Added after the backup").exists())
+        self.assertEqual({game.pk: game.get_current_score() for game in Game.objects.all()}, standings)
+        self.assertEqual(Score.objects.count(), 20)
+        
+        second = os.path.join(self.directory.name, 'second.backup.gz')
+        write_backup(second)
+        self.assertEqual(self.read_lines(second), self.read_lines(self.path))
+    
+    def test_restore_drops_snapshots(self):
+        """Test that restoring with --flush removes all snapshots and cached tournament standings."""
+        write_backup(self.path)
+        game = Game.objects.order_by('pk').last()
+        with tempfile.TemporaryDirectory() as root, override_settings(SNAPSHOT_ROOT=root):
+            write_snapshot(game)
+            with patch('score_tracker.signals.invalidate_tournament_standings') as invalidate:
+                restore_backup(self.path, flush=True)
+            self.assertFalse(os.path.exists(os.path.join(root, 'games')))
+        tournament = Tournament.objects.get()
+        self.assertEqual([call.args for call in invalidate.call_args_list], [(tournament.pk,), (tournament.pk,)])
+    
+    def test_unknown_model(self):
+        """Test that a model the backup header did not announce is rejected."""
+        write_backup(self.path)
+        lines = self.read_lines(self.path)
+        index = next(index for index, line in enumerate(lines) if line.startswith('{"model"'))
+        lines[index] = lines[index].replace('score_tracker.', 'elsewhere.', 1)
+        with gzip.open(self.path, 'wt') as stream:
+            stream.writelines(lines)
+        with self.assertRaisesMessage(BackupError, "unknown model: elsewhere."):
+            restore_backup(self.path, flush=True)
+    
+    def test_restore_requires_empty_tables(self):
+        """Test that restoring over existing data needs --flush."""
+        write_backup(self.path)
+        with self.assertRaisesMessage(BackupError, "Use --flush"):
+            restore_backup(self.path)
+    
+    def test_damaged_backup(self):
+        """Test that a changed value fails the checksum and leaves the data alone."""
+        write_backup(self.path)
+        lines = self.read_lines(self.path)
+        # The first batch holds players; move one player's updated_at by 1 µs
+        index = next(index for index, line in enumerate(lines) if line.startswith('{"data"'))
+        data = json.loads(lines[index])
+        data['data'][-1][0] += 1
+        lines[index] = json.dumps(data) + '\n'
+        with gzip.open(self.path, 'wt') as stream:
+            stream.writelines(lines)
+        
+        rounds = Round.objects.count()
+        with self.assertRaisesMessage(BackupError, "checksum mismatch"):
+            restore_backup(self.path, flush=True)
+        self.assertEqual(Round.objects.count(), rounds)
+    
+    def test_not_a_backup(self):
+        """Test that other files are rejected."""
+        with open(self.path, 'w') as stream:
+            stream.write("not a backup")
+        with self.assertRaises(CommandError):
+            call_command('restore', self.path, '--flush', stdout=StringIO())
+    
+    def test_commands(self):
+        """Test the backup and restore management commands."""
+        out = StringIO()
+        call_command('backup', self.path, stdout=out)
+        self.assertIn("score_tracker.round", out.getvalue())
+        call_command('restore', self.path, '--flush', stdout=out)
+        self.assertIn("checksums match", out.getvalue())
+
+
+class ScoringFuzzTests(TestCase):
+    """Test every scoring implementation against Game.get_current_score on random games."""
+    
+    def test_scorers_agree(self):
+        """Test that no scorer differs from the reference."""
+        self.assertEqual(fuzz(10, seed=40), [])
+    
+    def test_detects_single_carry(self):
+        """Test that the harness catches a scorer that carries over 1000 only once per round."""
+        def single_carry(games):
+            states = {game.pk: {player.id: [0, 0] for player in game.players.all()} for game in games}
+            for round_row, opponent_points in iter_rounds(Q(game__in=games)):
+                for player_id, player_state in states[round_row['game_id']].items():
+                    if player_id == round_row['game_maker_id']:
+                        player_state[0] += game_maker_points(round_row)
+                    else:
+                        player_state[0] += opponent_points.get(player_id, 0)
+                    if player_state[0] >= 1000:
+                        player_state[1] += 1
+                        player_state[0] -= 1000
+            return {
+                game_id: {player_id: tuple(value) for player_id, value in state.items()}
+                for game_id, state in states.items()
+            }
+        
+        mismatches = fuzz(10, seed=40, scorers={'single carry': single_carry})
+        self.assertTrue(mismatches)
+        self.assertTrue(all(mismatch.split('] ')[1].startswith('single carry:') for mismatch in mismatches))
+
+
+class SnapshotTests(TestCase):
+    """Test the pre-rendered pages of completed games."""
+    
+    def setUp(self):
+        players = seed_players(3, prefix="Snapshot Player")
+        seed_games(2, players, rounds_per_game=12, active_ratio=0, seed=41)
+        self.game, self.other = Game.objects.order_by('pk')
+        self.url = reverse('score_tracker:game_detail', args=[self.game.pk])
+        for game in (self.game, self.other):
+            self.addCleanup(delete_snapshot, game.pk)
+    
+    def get_content(self, response):
+        return b''.join(response.streaming_content)
+    
+    def test_end_game_writes_snapshot(self):
+        """Test that ending a game renders its page and JSON twin."""
+        game = Game.objects.create(name="Ending Game")
+        game.players.set(Player.objects.all())
+        self.addCleanup(delete_snapshot, game.pk)
+        self.client.post(reverse('score_tracker:end_game', args=[game.pk]))
+        # .br variants are only written when Brotli is installed
+        self.assertEqual(
+            sorted(name for name in os.listdir(snapshot_dir(game.pk)) if not name.endswith('.br')),
+            ['index.html', 'index.html.gz', 'index.json', 'index.json.gz', 'timeline.json', 'timeline.json.gz'],
+        )
+    
+    def test_active_game(self):
+        """Test that active games cannot be snapshotted."""
+        game = Game.objects.create(name="Active Game")
+        with self.assertRaises(ValueError):
+            write_snapshot(game)
+    
+    def test_served_from_disk(self):
+        """Test that a snapshot is served without queries, compressed and revalidated on every use."""
+        expected = self.client.get(self.url).content
+        write_snapshot(self.game)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(zlib.decompress(self.get_content(response), 16 + zlib.MAX_WBITS), expected)
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+    
+    def test_json_twin(self):
+        """Test the JSON twin of a snapshot."""
+        write_snapshot(self.game)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url + 'index.json')
+        data = json.loads(self.get_content(response))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(len(data['rounds']), 12)
+        self.assertEqual(
+            {entry['id']: [entry['score'], entry['rounds_won']] for entry in data['players']},
+            {pid: [d['score'], d['rounds_won']] for pid, d in self.game.get_current_score().items()},
+        )
+    
+    def test_flash_messages_skip_snapshot(self):
+        """Test that a request with pending messages is answered by the view."""
+        write_snapshot(self.game)
+        self.client.cookies['messages'] = 'pending'
+        response = self.client.get(self.url)
+        self.assertIn('scores', response.context)
+    
+    def test_timeline_served_from_disk(self):
+        """Test that the chart's timeline of a snapshotted game is served without queries."""
+        timeline_url = reverse('score_tracker:game_timeline', args=[self.game.pk])
+        expected = self.client.get(timeline_url).json()
+        write_snapshot(self.game)
+        with self.assertNumQueries(0):
+            response = self.client.get(timeline_url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(self.get_content(response)), expected)
+        
+        # Other sizes are not snapshotted
+        response = self.client.get(timeline_url, {'points': 5})
+        self.assertEqual(len(response.json()['rounds']), 5)
+    
+    def test_changes_drop_snapshot(self):
+        """Test that editing a round or the game removes the snapshot, archiving does not."""
+        write_snapshot(self.game)
+        write_snapshot(self.other)
+        archive_game(self.other)
+        self.assertTrue(os.path.isdir(snapshot_dir(self.other.pk)))
+        
+        round_obj = self.game.rounds.first()
+        round_obj.bid_amount += 10
+        round_obj.save()
+        self.assertFalse(os.path.isdir(snapshot_dir(self.game.pk)))
+        
+        self.other.name = "Renamed"
+        self.other.save()
+        self.assertFalse(os.path.isdir(snapshot_dir(self.other.pk)))
+        
+        # Reopened, e.g. in the admin: the live game must be shown again
+        write_snapshot(self.game)
+        self.game.is_active = True
+        self.game.save()
+        self.assertFalse(os.path.isdir(snapshot_dir(self.game.pk)))
+        self.assertIn('scores', self.client.get(self.url).context)
+    
+    def test_command(self):
+        """Test that snapshot_games renders completed games that have no snapshot yet."""
+        out = StringIO()
+        call_command('snapshot_games', '--workers', '1', stdout=out)
+        self.assertIn("Snapshotted 2 games", out.getvalue())
+        self.assertTrue(os.path.isfile(os.path.join(snapshot_dir(self.other.pk), 'index.html')))
+        call_command('snapshot_games', '--workers', '1', stdout=out)
+        self.assertIn("Snapshotted 0 games", out.getvalue())
+
+
+class StaleGameTests(TestCase):
+    """Test closing games that nobody ended."""
+    
+    def setUp(self):
+        players = seed_players(3, prefix="Stale Player")
+        seed_games(4, players, rounds_per_game=3, seed=47)
+        self.abandoned, self.idle, self.playing, self.new = Game.objects.order_by('pk')
+        month_ago = timezone.now() - timedelta(days=30)
+        Game.objects.exclude(pk=self.new.pk).update(start_date=month_ago)
+        Game.objects.filter(pk=self.new.pk).update(start_date=timezone.now())
+        Round.objects.filter(game__in=[self.abandoned, self.idle]).update(created_at=month_ago)
+        # A round entered recently keeps a game open, however old it is
+        Round.objects.filter(game=self.playing).update(created_at=month_ago)
+        Round.objects.filter(game=self.playing, round_number=3).update(created_at=timezone.now())
+        self.idle.rounds.all().delete()
+    
+    def test_stale_games(self):
+        """Test that only games without a recent round or start count as stale."""
+        stale = stale_games(timezone.now() - timedelta(days=7))
+        self.assertEqual(set(stale), {self.abandoned, self.idle})
+    
+    def test_close_in_batches(self):
+        """Test that stale games are ended batch by batch like end_game does."""
+        now = timezone.now()
+        batches = list(close_stale_games(timedelta(days=7), batch_size=1, now=now))
+        self.assertEqual(batches, [[self.abandoned.pk], [self.idle.pk]])
+        for game in (self.abandoned, self.idle):
+            game.refresh_from_db()
+            self.assertFalse(game.is_active)
+            self.assertEqual(game.end_date, now)
+        self.assertEqual(Game.objects.filter(is_active=True).count(), 2)
+        self.assertEqual(list(close_stale_games(timedelta(days=7))), [])
+    
+    def test_command(self):
+        """Test the dry run, the report and the snapshots of close_stale_games."""
+        out = StringIO()
+        call_command('close_stale_games', '--dry-run', stdout=out)
+        self.assertIn("2 games without a new round for 7 days would be closed", out.getvalue())
+        self.assertEqual(Game.objects.filter(is_active=True).count(), 4)
+        
+        with tempfile.TemporaryDirectory() as root, override_settings(SNAPSHOT_ROOT=root):
+            out = StringIO()
+            call_command('close_stale_games', '--days', '10', '--snapshot', stdout=out)
+            self.assertIn("Closed 2 games without a new round for 10 days", out.getvalue())
+            self.assertTrue(os.path.exists(os.path.join(snapshot_dir(self.abandoned.pk), 'index.html')))
+        self.assertEqual(Game.objects.filter(is_active=True).count(), 2)
+
+class GameSearchTests(TestCase):
+    """Test searching games by players, dates and status."""
+    
+    def setUp(self):
+        self.anna, self.bert, self.carl, self.dora = [
+            Player.objects.create(name=name) for name in ("Anna", "Bert", "Carl", "Dora")
+        ]
+        self.now = timezone.now()
+        
+        def game(name, players, days_ago, active=False, hours=3):
+            start = self.now - timedelta(days=days_ago)
+            game = Game.objects.create(
+                name=name, start_date=start, is_active=active,
+                end_date=None if active else start + timedelta(hours=hours),
+            )
+            game.players.set(players)
+            return game
+        
+        self.old = game("Old", [self.anna, self.bert, self.carl], 100)
+        self.long = game("Long", [self.anna, self.carl, self.dora], 50, hours=24 * 20)
+        self.recent = game("Recent", [self.anna, self.bert, self.dora], 10)
+        self.running = game("Running", [self.bert, self.carl, self.dora], 1, active=True)
+    
+    def search(self, **filters):
+        return list(search_games(**filters))
+    
+    def test_players(self):
+        """Test that only games with all of the named players match."""
+        self.assertEqual(self.search(players=["Anna"]), [self.recent, self.long, self.old])
+        self.assertEqual(self.search(players=["Anna", "Bert"]), [self.recent, self.old])
+        self.assertEqual(self.search(players=["Anna", "Bert", "Carl", "Dora"]), [])
+        
+        # Two players of one game with the same name: the game is listed once
+        namesake = Player.objects.create(name="Anna")
+        self.old.players.add(namesake)
+        self.assertEqual(self.search(players=["Anna"]), [self.recent, self.long, self.old])
+        self.assertEqual(get_page(search_games(players=["Anna"]), limit=2)[0], [self.recent, self.long])
+    
+    def test_dates_and_status(self):
+        """Test that games must start and end within the range, and the status filter."""
+        today = self.now.date()
+        self.assertEqual(self.search(date_from=today - timedelta(days=60)), [self.running, self.recent, self.long])
+        # Long started 50 days ago but went on for 20 days
+        self.assertEqual(
+            self.search(date_from=today - timedelta(days=60), date_to=today - timedelta(days=40)), [],
+        )
+        self.assertEqual(self.search(date_to=today - timedelta(days=5)), [self.recent, self.long, self.old])
+        self.assertEqual(self.search(status='active'), [self.running])
+        self.assertEqual(self.search(status='completed', players=["Dora"]), [self.recent, self.long])
+    
+    def test_keyset_pages(self):
+        """Test that paging with cursors visits every game once, newest first, in the same number of queries."""
+        Game.objects.filter(pk=self.long.pk).update(start_date=self.recent.start_date)
+        expected = list(Game.objects.order_by('-start_date', '-pk'))
+        seen = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(3):
+                page, cursor = get_page(search_games(), cursor=cursor, limit=1)
+            seen += page
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(get_page(search_games(), cursor=make_cursor(self.old))[0], [])
+    
+    def test_form(self):
+        """Test that unknown players and reversed date ranges are rejected."""
+        form = GameSearchForm({'players': "Anna, Bert,, Anna"})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['players'], ["Anna", "Bert"])
+        self.assertIsNone(form.cleaned_data['status'])
+        
+        form = GameSearchForm({'players': "Anna, Zoe"})
+        self.assertFalse(form.is_valid())
+        self.assertIn("No player named Zoe.", form.errors['players'])
+        
+        form = GameSearchForm({'date_from': '2024-05-02', 'date_to': '2024-05-01'})
+        self.assertFalse(form.is_valid())
+    
+    def test_view(self):
+        """Test the search page, its link to the next page and invalid cursors."""
+        url = reverse('score_tracker:game_search')
+        response = self.client.get(url, {'players': "Anna", 'status': 'completed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['games'], [self.recent, self.long, self.old])
+        self.assertIsNone(response.context['next_url'])
+        
+        with patch('score_tracker.views.SEARCH_PAGE_SIZE', 2):
+            response = self.client.get(url, {'players': "Anna"})
+        self.assertEqual(len(response.context['games']), 2)
+        next_url = response.context['next_url']
+        self.assertContains(response, 'Older games')
+        response = self.client.get(url + next_url)
+        self.assertEqual(response.context['games'], [self.old])
+        
+        self.assertEqual(self.client.get(url, {'after': 'nonsense'}).status_code, 400)
+        with self.assertRaises(InvalidCursor) as raised:
+            parse_cursor('nonsense')
+        self.assertIsInstance(raised.exception.__cause__, ValueError)
+        response = self.client.get(url, {'players': "Zoe"})
+        self.assertContains(response, "No player named Zoe.")
+
+
+class ScoreTimelineTests(TestCase):
+    """Test the per-round score timeline behind the game chart."""
+    
+    def setUp(self):
+        cache.clear()
+        players = seed_players(4, prefix="Timeline Player")
+        seed_games(1, players, players_per_game=4, rounds_per_game=40, seed=49)
+        self.game = Game.objects.get()
+    
+    def test_every_round_matches_current_score(self):
+        """Test that each point of the timeline is what get_current_score says after that round."""
+        timeline = score_timeline(self.game, max_points=1000)
+        self.assertEqual(timeline['rounds'], list(range(41)))
+        for index in range(40, -1, -1):
+            Round.objects.filter(game=self.game, round_number__gt=index).delete()
+            expected = Game.objects.get(pk=self.game.pk).get_current_score()
+            for player in timeline['players']:
+                self.assertEqual(
+                    (player['scores'][index], player['rounds_won'][index]),
+                    (expected[player['id']]['score'], expected[player['id']]['rounds_won']),
+                )
+    
+    def test_crossings(self):
+        """Test that every round adding to a player's rounds won is listed as a crossing."""
+        timeline = score_timeline(self.game, max_points=1000)
+        for player in timeline['players']:
+            won = player['rounds_won']
+            expected = [
+                [index, won[index], player['scores'][index]]
+                for index in range(1, len(won)) if won[index] > won[index - 1]
+            ]
+            self.assertEqual(player['crossings'], expected)
+        self.assertTrue(any(player['crossings'] for player in timeline['players']))
+    
+    def test_downsample(self):
+        """Test that downsampling keeps the ends and prefers the given points."""
+        self.assertEqual(downsample(5, [2], 10), [0, 1, 2, 3, 4])
+        kept = downsample(1000, [17, 500, 733], 50)
+        self.assertLessEqual(len(kept), 50)
+        self.assertTrue({0, 17, 500, 733, 999} <= set(kept))
+        # More points to keep than half the budget: an even spread of them
+        kept = downsample(1000, range(1, 1000, 2), 50)
+        self.assertLessEqual(len(kept), 50)
+        self.assertTrue({0, 1, 999} <= set(kept))
+        
+        full = score_timeline(self.game, max_points=1000)
+        short = score_timeline(self.game, max_points=10)
+        self.assertEqual(len(short['rounds']), 10)
+        self.assertEqual((short['rounds'][0], short['rounds'][-1]), (0, 40))
+        for full_player, short_player in zip(full['players'], short['players']):
+            self.assertEqual(short_player['crossings'], full_player['crossings'])
+            self.assertEqual(short_player['scores'][-1], full_player['scores'][-1])
+    
+    def test_archived_game(self):
+        """Test that an archived game has the same timeline as before archiving."""
+        expected = score_timeline(self.game)
+        self.game.end_game()
+        archive_game(self.game)
+        self.assertEqual(score_timeline(Game.objects.get(pk=self.game.pk)), expected)
+    
+    def test_endpoint_caching(self):
+        """Test that timelines are cached until a round is added or edited."""
+        url = reverse('score_tracker:game_timeline', args=[self.game.pk])
+        self.assertEqual(self.client.get(url).json()['round_count'], 40)
+        with self.assertNumQueries(2):
+            # The game and the round count and last change of its rounds
+            self.assertEqual(self.client.get(url).json()['round_count'], 40)
+        
+        round_obj = self.game.rounds.get(round_number=1)
+        round_obj.bid_amount += 500
+        round_obj.save()
+        players = self.client.get(url).json()['players']
+        self.assertEqual(players, score_timeline(self.game)['players'])
+        
+        Round.objects.filter(game=self.game, round_number=40).delete()
+        self.assertEqual(self.client.get(url).json()['round_count'], 39)
+        self.assertEqual(self.client.get(url, {'points': 5}).json()['rounds'][-1], 39)
+        self.assertEqual(self.client.get(url, {'points': 'many'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'points': 1}).status_code, 400)
+
+class HeadToHeadTests(TestCase):
+    """Test the incrementally kept head-to-head statistics."""
+    
+    def setUp(self):
+        self.players = seed_players(4, prefix="Pair Player")
+        seed_games(6, self.players, players_per_game=3, rounds_per_game=8, seed=50)
+        self.games = list(Game.objects.order_by('pk'))
+    
+    def stats(self):
+        return {
+            (row.player_id, row.opponent_id): (row.games, row.wins, row.losses, row.points_difference)
+            for row in PlayerPairStats.objects.all()
+        }
+    
+    def test_pair_results(self):
+        """Test that every pair is scored in both directions, as get_leader ranks the players."""
+        standings = self.games[0].get_current_score()
+        results = {(player, opponent): rest for player, opponent, *rest in pair_results(standings)}
+        self.assertEqual(len(results), 6)
+        leader = get_leader(standings)
+        for (player, opponent), (won, lost, difference) in results.items():
+            self.assertEqual(results[opponent, player], [lost, won, -difference])
+            if player == leader['player'].id:
+                self.assertEqual((won, lost), (1, 0))
+                self.assertGreater(difference, 0)
+    
+    def test_end_game(self):
+        """Test that ending a game adds it once, and only to its own players' pairs."""
+        game = self.games[0]
+        game.end_game()
+        stats = self.stats()
+        roster = {player.id for player in game.roster}
+        self.assertEqual(set(stats), {(a, b) for a in roster for b in roster if a != b})
+        for (player, opponent), (games, wins, losses, difference) in stats.items():
+            self.assertEqual(games, 1)
+            self.assertEqual(stats[opponent, player], (1, losses, wins, -difference))
+        game.end_game()
+        self.assertEqual(self.stats(), stats)
+    
+    def test_rebuild_matches_incremental(self):
+        """Test that recounting from scratch gives what ending the games one by one gave."""
+        for game in self.games:
+            game.end_game()
+        incremental = self.stats()
+        self.assertEqual(sum(games for games, *_ in incremental.values()), 6 * 6)
+        PlayerPairStats.objects.update(wins=0)
+        self.assertEqual(rebuild_pair_stats(chunk_size=4), (6, len(incremental)))
+        self.assertEqual(self.stats(), incremental)
+        
+        out = StringIO()
+        call_command('rebuild_head_to_head', stdout=out)
+        self.assertIn(f"Counted 6 completed games into {len(incremental)} player pairs", out.getvalue())
+        self.assertEqual(self.stats(), incremental)
+    
+    def test_close_stale_games(self):
+        """Test that games closed for being stale count like ended games."""
+        Game.objects.update(start_date=timezone.now() - timedelta(days=30))
+        Round.objects.update(created_at=timezone.now() - timedelta(days=30))
+        closed = [pk for batch in close_stale_games(timedelta(days=7), batch_size=4) for pk in batch]
+        self.assertEqual(len(closed), 6)
+        stats = self.stats()
+        PlayerPairStats.objects.all().delete()
+        rebuild_pair_stats()
+        self.assertEqual(self.stats(), stats)
+    
+    def test_record_games_queries(self):
+        """Test that recording games takes the same number of queries however many pairs they touch."""
+        with CaptureQueriesContext(connection) as one:
+            record_games(self.games[:1])
+        with CaptureQueriesContext(connection) as all_games:
+            record_games(self.games)
+        self.assertEqual(len(one), len(all_games))
+    
+    def test_matrix(self):
+        """Test that the matrix is read in one query, with nothing on the diagonal."""
+        for game in self.games:
+            game.end_game()
+        with self.assertNumQueries(1):
+            matrix = head_to_head_matrix(self.players)
+        self.assertEqual([player for player, _ in matrix], self.players)
+        for index, (player, row) in enumerate(matrix):
+            self.assertIsNone(row[index])
+            for opponent, stats in zip(self.players, row):
+                if stats is not None:
+                    self.assertEqual((stats.player_id, stats.opponent_id), (player.pk, opponent.pk))
+                    self.assertEqual(stats.draws, stats.games - stats.wins - stats.losses)
+    
+    def test_view(self):
+        """Test the head-to-head page, its player order and unknown names."""
+        self.games[0].end_game()
+        url = reverse('score_tracker:head_to_head')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        names = [player.name for player in reversed(self.players)]
+        response = self.client.get(url, {'players': ", ".join(names)})
+        self.assertEqual([player.name for player, _ in response.context['matrix']], names)
+        self.assertContains(response, "per game")
+        
+        form = HeadToHeadForm({'players': "Zoe"})
+        self.assertFalse(form.is_valid())
+        self.assertIn("No player named Zoe.", form.errors['players'])
+
+class SerialLiveServerThread(LiveServerThread):
+    """A live server answering one request at a time on the shared in-memory SQLite connection."""
+    
+    def _create_server(self, connections_override=None):
+        return WSGIServer((self.host, self.port), QuietWSGIRequestHandler, allow_reuse_address=False)
+
+
+class LoadTestTests(LiveServerTestCase):
+    """Test the load generator against a live server."""
+    
+    # Tables still run concurrently and interleave their sessions; only the
+    # server side is serialized, since threads sharing one in-memory SQLite
+    # connection fail with HTTP 500 in the test setup, not in the code under test.
+    server_thread_class = SerialLiveServerThread
+    
+    def test_paths(self):
+        """Test that the generator's hard-coded paths match the URLconf."""
+        self.assertEqual(GAME_CREATE_PATH, reverse('score_tracker:game_create'))
+        self.assertEqual(ROUND_CREATE_PATH.format(7), reverse('score_tracker:round_create', args=[7]))
+        self.assertEqual(GAME_DETAIL_PATH.format(7), reverse('score_tracker:game_detail', args=[7]))
+    
+    def test_round_data_is_valid(self):
+        """Test that generated rounds pass the round form."""
+        players = seed_players(4, prefix="Load Player")
+        game = Game.objects.create(name="Load Game")
+        game.players.set(players)
+        rng = random.Random(1)
+        for _ in range(50):
+            form = RoundForm(round_data(rng, [player.pk for player in players]), game=game)
+            self.assertTrue(form.is_valid(), form.errors)
+    
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, p) for p in (50, 90, 99, 100)], [50, 90, 99, 100])
+        self.assertEqual(percentile([7], 99), 7)
+    
+    def test_sessions(self):
+        """Test that simulated tables create games and enter rounds without errors."""
+        report = run_load(self.live_server_url, tables=2, rounds=3, polls=1, seed=5)
+        self.assertEqual(report['errors'], [])
+        self.assertEqual((report['tables'], report['rounds']), (2, 6))
+        self.assertEqual(Game.objects.count(), 2)
+        self.assertEqual(sorted(game.rounds.count() for game in Game.objects.all()), [3, 3])
+        self.assertEqual(report['requests']['round_create POST']['count'], 6)
+        self.assertEqual(report['requests']['game_detail GET']['count'], 6)
+        self.assertEqual(report['total']['errors'], 0)
+
+
+class StartupTests(SimpleTestCase):
+    """Test the cold-start profile of the settings profiles."""
+    
+    def test_parse_importtime(self):
+        """Test that -X importtime output is parsed into modules and summed per package."""
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   django.utils\n"
+            "import time:        30 |        150 | django\n"
+            "import time:        50 |         50 | json\n"
+        )
+        imports = parse_importtime(output)
+        self.assertEqual(imports, [('django.utils', 120, 120), ('django', 30, 150), ('json', 50, 50)])
+        self.assertEqual(by_package(imports), [('django', 150), ('json', 50)])
+    
+    def test_prod_boot_skips_development_modules(self):
+        """Test that a production worker boots without the test client or development apps."""
+        profile = profile_startup('binokel_project.settings.prod', repeat=1)
+        modules = {name for name, _, _ in profile['imports']}
+        self.assertIn('binokel_project.wsgi', modules)
+        self.assertNotIn('django.test', modules)
+        self.assertNotIn('behave_django', modules)
+        self.assertGreater(profile['ms'], 0)
+        self.assertGreater(profile['rss_kb'], 0)
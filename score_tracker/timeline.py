@@ -0,0 +1,125 @@
+"""
+Running scores of a game, round by round, for the chart on game_detail.
+
+score_timeline replays a game's rounds once with scoring.apply_round and
+records every player's score and rounds won after each round, plus every
+round in which a player reached the next 1000. Long games are thinned out
+to at most max_points rounds, preferring the rounds with a crossing. The
+crossings themselves are never dropped: each one is listed with the
+player's score right after it, so the chart marks it exactly.
+
+Timelines are cached under the game, its number of rounds and the time
+its last round was saved, so a new or edited round is never served stale.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+
+from .scoring import apply_round, iter_rounds
+
+MAX_POINTS = 200
+TIMELINE_CACHE_TIMEOUT = 60 * 60
+
+
+def _archived_round_rows(game):
+    """(round row, opponent points) of an archived game, like scoring.iter_rounds."""
+    for round_obj in game.archived_rounds:
+        round_row = {
+            'round_number': round_obj.round_number,
+            'game_maker_id': round_obj.game_maker_id,
+            'bid_amount': round_obj.bid_amount,
+            'outcome': round_obj.outcome,
+            'meld_points': round_obj.meld_points,
+            'trick_points': round_obj.trick_points,
+        }
+        opponent_points = {
+            int(player_id): meld_points + trick_points
+            for player_id, (meld_points, trick_points) in round_obj.opponent_points.items()
+        }
+        yield round_row, opponent_points
+
+
+def downsample(length, keep, max_points):
+    """
+    Indices of at most max_points of length points, preferring the indices in keep.
+
+    The first and last points are always kept, and so are the points in
+    keep while they fill at most half of max_points; otherwise an evenly
+    spread half of them. The remaining points are spread evenly.
+    """
+    if length <= max_points:
+        return list(range(length))
+    keep = sorted(set(keep))
+    share = max(max_points // 2 - 2, 0)
+    if len(keep) > share:
+        keep = [keep[round(step * (len(keep) - 1) / max(share - 1, 1))] for step in range(share)]
+    chosen = {0, length - 1} | set(keep)
+    spare = max_points - len(chosen)
+    chosen.update(round(step * (length - 1) / (spare + 1)) for step in range(1, spare + 1))
+    return sorted(chosen)
+
+
+def score_timeline(game, max_points=MAX_POINTS):
+    """
+    Return the running scores of a game, downsampled to at most max_points rounds.
+
+    The result is JSON-ready: 'rounds' lists the round numbers kept (0 is
+    the start). Each entry of 'players' holds the score and rounds won
+    after each of them, and as 'crossings' every round in which the player
+    reached the next 1000, as [round number, rounds won, score] after it.
+    """
+    roster = game.roster
+    state = {player.id: [0, 0] for player in roster}
+    round_numbers = [0]
+    scores = {player.id: [0] for player in roster}
+    rounds_won = {player.id: [0] for player in roster}
+    crossings = {player.id: [] for player in roster}
+    crossing_indices = []
+
+    rows = _archived_round_rows(game) if game.is_archived else iter_rounds(Q(game_id=game.pk))
+    for round_row, opponent_points in rows:
+        apply_round(state, round_row, opponent_points)
+        round_numbers.append(round_row['round_number'])
+        for player_id, (score, won) in state.items():
+            if won > rounds_won[player_id][-1]:
+                crossings[player_id].append([round_row['round_number'], won, score])
+                crossing_indices.append(len(round_numbers) - 1)
+            scores[player_id].append(score)
+            rounds_won[player_id].append(won)
+
+    kept = downsample(len(round_numbers), crossing_indices, max_points)
+    return {
+        'game': game.pk,
+        'round_count': len(round_numbers) - 1,
+        'rounds': [round_numbers[index] for index in kept],
+        'players': [
+            {
+                'id': player.id,
+                'name': player.name,
+                'scores': [scores[player.id][index] for index in kept],
+                'rounds_won': [rounds_won[player.id][index] for index in kept],
+                'crossings': crossings[player.id],
+            }
+            for player in roster
+        ],
+    }
+
+
+def _timeline_cache_key(game, max_points):
+    if game.is_archived:
+        # Archived games do not change any more
+        version = f"archived-{game.final_standings['rounds']}"
+    else:
+        rounds = game.rounds.aggregate(count=Count('pk'), saved=Max('updated_at'))
+        saved = rounds['saved'].timestamp() if rounds['saved'] else 0
+        version = f"{rounds['count']}-{saved}"
+    return f'score-timeline:{game.pk}:{version}:{max_points}'
+
+
+def get_score_timeline(game, max_points=MAX_POINTS):
+    """score_timeline(game), cached until a round of the game is added, changed or deleted."""
+    key = _timeline_cache_key(game, max_points)
+    timeline = cache.get(key)
+    if timeline is None:
+        timeline = score_timeline(game, max_points)
+        cache.set(key, timeline, TIMELINE_CACHE_TIMEOUT)
+    return timeline
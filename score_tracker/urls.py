@@ -6,8 +6,16 @@ app_name = 'score_tracker'
 urlpatterns = [
     path('', views.home, name='home'),
     path('games/', views.game_list, name='game_list'),
+    path('games/search/', views.game_search, name='game_search'),
     path('games/new/', views.game_create, name='game_create'),
     path('games/<int:pk>/', views.game_detail, name='game_detail'),
+    path('games/<int:pk>/rounds/', views.game_rounds, name='game_rounds'),
     path('games/<int:pk>/round/new/', views.round_create, name='round_create'),
+    path('games/<int:pk>/rounds/batch/', views.round_batch_create, name='round_batch_create'),
     path('games/<int:pk>/end/', views.end_game, name='end_game'),
+    path('games/<int:pk>/timeline/', views.game_timeline, name='game_timeline'),
+    path('games/<int:pk>/projection/', views.game_projection, name='game_projection'),
+    path('players/head-to-head/', views.head_to_head, name='head_to_head'),
+    path('tournaments/', views.tournament_list, name='tournament_list'),
+    path('tournaments/<int:pk>/', views.tournament_detail, name='tournament_detail'),
 ]
\ No newline at end of file
@@ -1,9 +1,26 @@
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.db import connection, transaction
+from django.db.models import Count
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.urls import reverse
 from django.utils import timezone
-from .models import Game, Player, Round, Score
-from .forms import GameForm, RoundForm, PlayerFormSet
+from .models import Game, Player, Round, Tournament
+from .forms import (
+    MAX_BATCH_ROUNDS, GameForm, GameSearchForm, HeadToHeadForm, RoundForm, PlayerFormSet, round_batch_formset,
+)
+from .headtohead import head_to_head_matrix
+from .scoring import (
+    get_leader, get_standings_for_games, get_tournament_standings, rank_players, standings_payload,
+)
+from .search import InvalidCursor, get_page, search_games
+from .simulation import (
+    DEFAULT_HORIZON, DEFAULT_PLAYOUTS, MAX_HORIZON, MAX_PLAYOUT_ROUNDS, MAX_PLAYOUTS, NotEnoughHistory, project_game,
+)
+from .snapshots import write_snapshot
+from .timeline import MAX_POINTS, get_score_timeline
 
 
 def home(request):
@@ -22,8 +39,13 @@ def home(request):
 
 def game_list(request):
     """List all games."""
-    active_games = Game.objects.filter(is_active=True).order_by('-start_date')
-    completed_games = Game.objects.filter(is_active=False).order_by('-end_date')
+    games = Game.objects.annotate(rounds_played=Count('rounds')).prefetch_related('players')
+    active_games = list(games.filter(is_active=True).order_by('-start_date'))
+    completed_games = games.filter(is_active=False).order_by('-end_date')
+
+    standings = get_standings_for_games(active_games)
+    for game in active_games:
+        game.leader = get_leader(standings[game.pk])
     
     context = {
         'active_games': active_games,
@@ -32,6 +54,33 @@ def game_list(request):
     return render(request, 'score_tracker/game_list.html', context)
 
 
+SEARCH_PAGE_SIZE = 25
+
+
+def game_search(request):
+    """Search games by players, dates and status, a page at a time."""
+    form = GameSearchForm(request.GET)
+    games = next_url = None
+    if form.is_valid():
+        try:
+            games, next_cursor = get_page(
+                search_games(**form.cleaned_data), cursor=request.GET.get('after'), limit=SEARCH_PAGE_SIZE,
+            )
+        except InvalidCursor as exc:
+            return HttpResponseBadRequest(str(exc))
+        if next_cursor is not None:
+            params = request.GET.copy()
+            params['after'] = next_cursor
+            next_url = f"?{params.urlencode()}"
+    
+    context = {
+        'form': form,
+        'games': games,
+        'next_url': next_url,
+    }
+    return render(request, 'score_tracker/game_search.html', context)
+
+
 def game_create(request):
     """Create a new game."""
     if request.method == 'POST':
@@ -83,10 +132,22 @@ def game_create(request):
     })
 
 
+ROUND_HISTORY_PAGE_SIZE = 20
+
+
+def _round_history_page(game, before=None):
+    """Return one page of the round history and the cursor of the next one."""
+    rounds = game.get_round_page(before=before, limit=ROUND_HISTORY_PAGE_SIZE + 1)
+    if len(rounds) > ROUND_HISTORY_PAGE_SIZE:
+        rounds = rounds[:ROUND_HISTORY_PAGE_SIZE]
+        return rounds, rounds[-1].round_number
+    return rounds, None
+
+
 def game_detail(request, pk):
     """Show game details and scoreboard."""
     game = get_object_or_404(Game, pk=pk)
-    rounds = game.rounds.all().order_by('round_number')
+    rounds, next_before = _round_history_page(game)
     current_scores = game.get_current_score()
     
     # Check if we have a winner
@@ -100,6 +161,7 @@ def game_detail(request, pk):
     context = {
         'game': game,
         'rounds': rounds,
+        'next_before': next_before,
         'scores': current_scores,
         'winner': winner,
         'max_rounds_won': max_rounds_won,
@@ -107,6 +169,37 @@ def game_detail(request, pk):
     return render(request, 'score_tracker/game_detail.html', context)
 
 
+def game_rounds(request, pk):
+    """Render an older page of a game's round history as table rows."""
+    game = get_object_or_404(Game, pk=pk)
+    try:
+        before = int(request.GET['before'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("A numeric 'before' round number is required.")
+    
+    rounds, next_before = _round_history_page(game, before=before)
+    context = {
+        'game': game,
+        'rounds': rounds,
+        'next_before': next_before,
+    }
+    return render(request, 'score_tracker/_round_rows.html', context)
+
+
+def _next_round_number(game):
+    """
+    The number of the next round of game, to be inserted in the current transaction.
+
+    Locks the game's row until the transaction ends, so rounds entered at
+    the same time are numbered one after the other instead of failing the
+    unique constraint. SQLite has no row locks and needs none: its write
+    transactions already run one at a time.
+    """
+    if connection.features.has_select_for_update:
+        Game.objects.select_for_update().only('pk').get(pk=game.pk)
+    return game.rounds.count() + 1
+
+
 def round_create(request, pk):
     """Create a new round for a game."""
     game = get_object_or_404(Game, pk=pk)
@@ -119,39 +212,197 @@ def round_create(request, pk):
         form = RoundForm(request.POST, game=game)
         
         if form.is_valid():
-            round_obj = form.save(commit=False)
-            round_obj.game = game
-            round_obj.round_number = game.rounds.count() + 1
-            round_obj.save()
-            
-            # Create scores for all players except game maker
-            for player in game.players.all():
-                if player != round_obj.game_maker:
-                    Score.objects.create(
-                        round=round_obj,
-                        player=player,
-                        meld_points=form.cleaned_data.get(f'player_{player.id}_meld_points', 0),
-                        trick_points=form.cleaned_data.get(f'player_{player.id}_trick_points', 0)
-                    )
+            with transaction.atomic():
+                round_obj = form.save(commit=False)
+                round_obj.game = game
+                round_obj.round_number = _next_round_number(game)
+                round_obj.save()
             
             messages.success(request, f"Round {round_obj.round_number} added successfully!")
             return redirect('score_tracker:game_detail', pk=game.pk)
     else:
         form = RoundForm(game=game)
     
+    # Current standings and rules for the live preview of the new totals
+    standings = get_standings_for_games([game])[game.pk]
     context = {
         'form': form,
         'game': game,
+        'standings_payload': standings_payload(standings),
     }
     return render(request, 'score_tracker/round_form.html', context)
 
 
+def _create_rounds(game, forms):
+    """Insert the rounds of valid RoundForms with contiguous round numbers."""
+    with transaction.atomic():
+        first = _next_round_number(game)
+        rounds = []
+        for round_number, form in enumerate(forms, start=first):
+            round_obj = form.save(commit=False)
+            round_obj.game = game
+            round_obj.round_number = round_number
+            rounds.append(round_obj)
+        return Round.objects.bulk_create(rounds)
+
+
+def _round_data(entry):
+    """Turn one round of a JSON batch into RoundForm data."""
+    data = {key: value for key, value in entry.items() if key != 'opponent_points'}
+    for player_id, (meld_points, trick_points) in entry.get('opponent_points', {}).items():
+        data[f'player_{player_id}_meld_points'] = meld_points
+        data[f'player_{player_id}_trick_points'] = trick_points
+    return data
+
+
+def round_batch_create(request, pk):
+    """
+    Enter several rounds of a game at once.
+
+    Takes either the batch form or a JSON body of the form
+    {"rounds": [{"game_maker": 1, "bid_amount": 300, "is_success": true,
+    "meld_points": 40, "trick_points": 160, "opponent_points": {"2": [20, 90]}}]}.
+    Every round is validated like a single round; nothing is saved unless all
+    of them are valid.
+    """
+    game = get_object_or_404(Game, pk=pk)
+    is_json = request.content_type == 'application/json'
+    
+    if not game.is_active:
+        if is_json:
+            return JsonResponse({'error': "Cannot add rounds to an inactive game."}, status=400)
+        messages.error(request, "Cannot add rounds to an inactive game.")
+        return redirect('score_tracker:game_detail', pk=game.pk)
+    
+    if request.method == 'POST' and is_json:
+        try:
+            entries = json.loads(request.body)['rounds']
+            if not isinstance(entries, list):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({'error': "Expected a JSON object with a list of rounds."}, status=400)
+        # Before any form is built, so an oversized batch costs nothing
+        if not 1 <= len(entries) <= MAX_BATCH_ROUNDS:
+            return JsonResponse({'error': f"Send between 1 and {MAX_BATCH_ROUNDS} rounds."}, status=400)
+        try:
+            round_forms = [RoundForm(_round_data(entry), game=game) for entry in entries]
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'error': "Expected a JSON object with a list of rounds."}, status=400)
+        errors = {
+            index: form.errors.get_json_data()
+            for index, form in enumerate(round_forms)
+            if not form.is_valid()
+        }
+        if errors:
+            return JsonResponse({'errors': errors}, status=400)
+        
+        rounds = _create_rounds(game, round_forms)
+        standings = get_standings_for_games([game])[game.pk]
+        return JsonResponse({
+            'rounds': [round_obj.round_number for round_obj in rounds],
+            'players': standings_payload(standings)['players'],
+        }, status=201)
+    
+    RoundBatchFormSet = round_batch_formset()
+    if request.method == 'POST':
+        formset = RoundBatchFormSet(request.POST, form_kwargs={'game': game})
+        if formset.is_valid():
+            rounds = _create_rounds(game, formset.filled_forms)
+            if len(rounds) == 1:
+                messages.success(request, f"Round {rounds[0].round_number} added successfully!")
+            else:
+                messages.success(
+                    request, f"Rounds {rounds[0].round_number} to {rounds[-1].round_number} added successfully!"
+                )
+            return redirect('score_tracker:game_detail', pk=game.pk)
+    else:
+        formset = RoundBatchFormSet(form_kwargs={'game': game})
+    
+    return render(request, 'score_tracker/round_batch_form.html', {'formset': formset, 'game': game})
+
+
+def game_projection(request, pk):
+    """Return each player's probability to reach the next 1000 as JSON."""
+    game = get_object_or_404(Game, pk=pk)
+    
+    try:
+        playouts = min(int(request.GET.get('playouts', DEFAULT_PLAYOUTS)), MAX_PLAYOUTS)
+        horizon = int(request.GET.get('horizon', DEFAULT_HORIZON))
+        seed = int(request.GET.get('seed', 0))
+    except ValueError:
+        return JsonResponse({'error': "playouts, horizon and seed must be integers."}, status=400)
+    if playouts < 1 or horizon < 1:
+        return JsonResponse({'error': "playouts and horizon must be positive."}, status=400)
+    horizon = min(horizon, MAX_HORIZON)
+    playouts = min(playouts, MAX_PLAYOUT_ROUNDS // horizon)
+    
+    try:
+        # In this process: a request must not occupy every core of the host
+        projection = project_game(game, playouts=playouts, horizon=horizon, seed=seed, workers=1)
+    except NotEnoughHistory as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse(projection)
+
+
+def game_timeline(request, pk):
+    """Return every player's running score and 1000-crossings as JSON, for the chart."""
+    game = get_object_or_404(Game, pk=pk)
+    
+    try:
+        points = int(request.GET.get('points', MAX_POINTS))
+    except ValueError:
+        return JsonResponse({'error': "points must be an integer."}, status=400)
+    if not 2 <= points <= 1000:
+        return JsonResponse({'error': "points must be between 2 and 1000."}, status=400)
+    
+    return JsonResponse(get_score_timeline(game, max_points=points))
+
+
 def end_game(request, pk):
     """End a game."""
     game = get_object_or_404(Game, pk=pk)
     
     if request.method == 'POST':
         game.end_game()
+        write_snapshot(game)
         messages.success(request, f"Game '{game.name}' has been ended.")
     
-    return redirect('score_tracker:game_detail', pk=game.pk)
\ No newline at end of file
+    return redirect('score_tracker:game_detail', pk=game.pk)
+
+
+def tournament_list(request):
+    """List all tournaments."""
+    tournaments = Tournament.objects.order_by('-created_at')
+    return render(request, 'score_tracker/tournament_list.html', {'tournaments': tournaments})
+
+
+def tournament_detail(request, pk):
+    """Show the live overall ranking of a tournament across all its tables."""
+    tournament = get_object_or_404(Tournament, pk=pk)
+    tables = get_tournament_standings(tournament)
+    
+    context = {
+        'tournament': tournament,
+        'tables': tables,
+        'ranking': rank_players(tables),
+    }
+    return render(request, 'score_tracker/tournament_detail.html', context)
+
+
+def head_to_head(request):
+    """Show how each of the selected players fared against the others."""
+    form = HeadToHeadForm(request.GET or None)
+    matrix = None
+    if form.is_valid():
+        names = form.cleaned_data['players']
+        # Several players may share a name; they are listed one after another
+        players = sorted(
+            Player.objects.filter(name__in=names), key=lambda player: (names.index(player.name), player.pk),
+        )
+        matrix = head_to_head_matrix(players)
+    
+    context = {
+        'form': form,
+        'matrix': matrix,
+    }
+    return render(request, 'score_tracker/head_to_head.html', context)
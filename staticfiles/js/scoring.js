@@ -0,0 +1,57 @@
+// Client-side Binokel scorer, the JavaScript twin of apply_round in
+// score_tracker/scoring.py. The rules come from scoring_rules() on the server;
+// both scorers are checked against score_tracker/scoring_vectors.json.
+
+(function(root) {
+    'use strict';
+
+    // Outcome for the checked outcome flags, e.g. {is_success: true}
+    function outcomeFromFlags(rules, flags) {
+        let mask = 0;
+        rules.flags.forEach(function(flag, bit) {
+            if (flags[flag]) {
+                mask |= 1 << bit;
+            }
+        });
+        return rules.outcome_by_flags[mask];
+    }
+
+    // Points the game maker gets for a round
+    function gameMakerPoints(rules, round) {
+        return rules.bid_factors[round.outcome] * round.bid_amount
+            + round.meld_points + round.trick_points;
+    }
+
+    // Return new standings {playerId: [score, roundsWon]} after one round.
+    // round.opponent_points maps player id to that opponent's meld + trick points.
+    function applyRound(rules, standings, round) {
+        const result = {};
+        Object.keys(standings).forEach(function(playerId) {
+            let score = standings[playerId][0];
+            let roundsWon = standings[playerId][1];
+            if (String(playerId) === String(round.game_maker_id)) {
+                score += gameMakerPoints(rules, round);
+            } else {
+                score += round.opponent_points[playerId] || 0;
+            }
+            while (score >= rules.round_win_points) {
+                roundsWon += 1;
+                score -= rules.round_win_points;
+            }
+            result[playerId] = [score, roundsWon];
+        });
+        return result;
+    }
+
+    const BinokelScoring = {
+        outcomeFromFlags: outcomeFromFlags,
+        gameMakerPoints: gameMakerPoints,
+        applyRound: applyRound,
+    };
+
+    if (typeof module !== 'undefined' && module.exports) {
+        module.exports = BinokelScoring;
+    } else {
+        root.BinokelScoring = BinokelScoring;
+    }
+})(this);